@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the access_logs table for the batched API access trail.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.base import engine
+from app.models.base import AccessLog
+
+def create_access_logs_table():
+    """Create the access_logs table."""
+    try:
+        AccessLog.__table__.create(engine, checkfirst=True)
+        print("✅ 'access_logs' table is in place")
+    except Exception as e:
+        print(f"❌ Error creating 'access_logs' table: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("🔄 Creating access_logs table...")
+    create_access_logs_table()
+    print("✅ Migration completed successfully!")
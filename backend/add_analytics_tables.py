@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the stage-aging aggregate tables
+(sample_stage_intervals, stage_daily_counts, analytics_watermarks).
+
+The tables fill themselves from the existing status_change logs on the
+workers' next pass (or POST /api/v1/analytics/refresh).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.base import engine
+from app.models.analytics import SampleStageInterval, StageDailyCount, AnalyticsWatermark
+
+def create_analytics_tables():
+    """Create the analytics tables."""
+    try:
+        for model in (SampleStageInterval, StageDailyCount, AnalyticsWatermark):
+            model.__table__.create(engine, checkfirst=True)
+            print(f"✅ '{model.__tablename__}' table is in place")
+    except Exception as e:
+        print(f"❌ Error creating analytics tables: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("🔄 Creating analytics tables...")
+    create_analytics_tables()
+    print("✅ Migration completed successfully!")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the settled-id columns of analytics_watermarks, used
+by the stage analytics to tell which sample logs can no longer appear below
+the watermark (app.core.stage_analytics).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect, text
+
+from app.db.base import engine
+
+COLUMNS = {
+    # Existing watermarks were advanced by the old settle delay, so they start settled up to last_id
+    "settled_id": "BIGINT NOT NULL DEFAULT 0",
+    "pending_id": "BIGINT",
+    "pending_xmax": "BIGINT",
+}
+
+def add_columns():
+    """Add the missing columns."""
+    existing = {column["name"] for column in inspect(engine).get_columns("analytics_watermarks")}
+    with engine.begin() as conn:
+        for name, ddl in COLUMNS.items():
+            if name in existing:
+                print(f"✅ '{name}' already exists")
+                continue
+            conn.execute(text(f"ALTER TABLE analytics_watermarks ADD COLUMN {name} {ddl}"))
+            print(f"✅ Added '{name}'")
+        conn.execute(text("UPDATE analytics_watermarks SET settled_id = last_id WHERE settled_id < last_id"))
+
+if __name__ == "__main__":
+    print("🔄 Adding analytics watermark columns...")
+    try:
+        add_columns()
+    except Exception as e:
+        print(f"❌ Error adding columns: {e}")
+        raise
+    print("✅ Migration completed successfully!")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the *_archive tables that finished samples and their
+logs and results are moved into (app.core.archive).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect
+
+from app.db.base import engine
+from app.models.archive import (
+    ArchivedSample, ArchivedSampleLog, ArchivedExtractionResult, ArchivedLibraryPrepResult,
+    ArchivedSequencingRunSample, ArchivedPlateWellAssignment, ArchivedSampleStageInterval
+)
+
+MODELS = [
+    ArchivedSample, ArchivedSampleLog, ArchivedExtractionResult, ArchivedLibraryPrepResult,
+    ArchivedSequencingRunSample, ArchivedPlateWellAssignment, ArchivedSampleStageInterval,
+]
+
+def create_archive_tables():
+    """Create the archive tables, and the indexes added since on existing ones."""
+    try:
+        for model in MODELS:
+            table = model.__table__
+            table.create(engine, checkfirst=True)
+            existing = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(engine)
+                    print(f"✅ Created '{index.name}'")
+            print(f"✅ '{table.name}' table is in place")
+    except Exception as e:
+        print(f"❌ Error creating archive tables: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("🔄 Creating sample archive tables...")
+    create_archive_tables()
+    print("✅ Migration completed successfully!")
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the idempotency_keys table used by Idempotency-Key support.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.base import engine
+from app.models.idempotency import IdempotencyKey
+
+def create_idempotency_keys_table():
+    """Create the idempotency_keys table."""
+    try:
+        IdempotencyKey.__table__.create(engine, checkfirst=True)
+        print("✅ 'idempotency_keys' table is in place")
+    except Exception as e:
+        print(f"❌ Error creating idempotency_keys table: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("🔄 Creating idempotency_keys table...")
+    create_idempotency_keys_table()
+    print("✅ Migration completed successfully!")
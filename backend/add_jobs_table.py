@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the jobs and job_artifacts tables used by background jobs.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.base import engine
+from app.models.job import Job, JobArtifact
+
+def create_jobs_tables():
+    """Create the jobs and job_artifacts tables."""
+    try:
+        Job.__table__.create(engine, checkfirst=True)
+        JobArtifact.__table__.create(engine, checkfirst=True)
+        print("✅ 'jobs' and 'job_artifacts' tables are in place")
+    except Exception as e:
+        print(f"❌ Error creating jobs tables: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("🔄 Creating jobs tables...")
+    create_jobs_tables()
+    print("✅ Migration completed successfully!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Migration script for the sample and project log storage (app.core.log_storage).
+
+Creates the (sample_id, created_at DESC) and (project_id, created_at DESC)
+indexes. On PostgreSQL it also converts sample_logs and project_logs into
+tables range-partitioned by month on created_at: the existing rows are
+copied into monthly partitions (plus a DEFAULT partition) in one
+transaction per table. Writes to the table being converted wait for it.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, text
+
+from app.core.config import settings
+from app.core.log_storage import LOG_TABLES, add_months, create_month_partitions, is_partitioned, month_start
+from app.db.base import engine
+
+def partition_table(table):
+    """Swap the table for a partitioned copy holding the same rows."""
+    name = table.name
+    old = f"{name}_unpartitioned"
+    with engine.begin() as conn:
+        if is_partitioned(conn, name):
+            print(f"✅ '{name}' is already partitioned")
+            return
+        conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text(f"UPDATE {name} SET created_at = now() WHERE created_at IS NULL"))
+        conn.execute(text(f"ALTER TABLE {name} RENAME TO {old}"))
+        conn.execute(text(f"ALTER INDEX {name}_pkey RENAME TO {old}_pkey"))
+        conn.execute(text(f"CREATE TABLE {name} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"))
+        # The partition key has to be part of the primary key
+        conn.execute(text(f"ALTER TABLE {name} ALTER COLUMN created_at SET NOT NULL, ADD PRIMARY KEY (id, created_at)"))
+        for fk in table.foreign_keys:
+            conn.execute(text(
+                f"ALTER TABLE {name} ADD FOREIGN KEY ({fk.parent.name}) "
+                f"REFERENCES {fk.column.table.name} ({fk.column.name})"
+            ))
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": old}).scalar()
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {name}.id"))
+
+        oldest = conn.execute(text(f"SELECT min(created_at) FROM {old}")).scalar()
+        current = month_start(datetime.now(timezone.utc))
+        create_month_partitions(
+            conn, name, month_start(oldest) if oldest else current,
+            add_months(current, settings.LOG_PARTITION_PREMAKE_MONTHS)
+        )
+        conn.execute(text(f"CREATE TABLE {name}_default PARTITION OF {name} DEFAULT"))
+        rows = conn.execute(text(f"INSERT INTO {name} SELECT * FROM {old}")).rowcount
+        conn.execute(text(f"DROP TABLE {old}"))
+    print(f"✅ Partitioned '{name}' ({rows} rows)")
+
+def create_indexes(table):
+    """Create the table's indexes that do not exist yet."""
+    existing = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        index.create(engine)
+        print(f"✅ Created '{index.name}'")
+
+if __name__ == "__main__":
+    print("🔄 Setting up log storage...")
+    try:
+        for table in LOG_TABLES:
+            if engine.dialect.name == "postgresql":
+                partition_table(table)
+            create_indexes(table)
+    except Exception as e:
+        print(f"❌ Error setting up log storage: {e}")
+        raise
+    print("✅ Migration completed successfully!")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the plate indexes used by the extraction plate
+list summaries (sample and control aggregates per plate) and the plate
+detail sample list.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect
+
+from app.db.base import engine
+from app.models.sample import Sample
+from app.models.control_sample import ControlSample
+
+INDEXES = [
+    (Sample, "ix_samples_extraction_plate_ref_id"),
+    (ControlSample, "ix_control_samples_plate_id"),
+]
+
+def create_indexes():
+    """Create the indexes that do not exist yet."""
+    inspector = inspect(engine)
+    for model, name in INDEXES:
+        existing = {index["name"] for index in inspector.get_indexes(model.__tablename__)}
+        if name in existing:
+            print(f"✅ '{name}' already exists")
+            continue
+        index = next(i for i in model.__table__.indexes if i.name == name)
+        index.create(engine)
+        print(f"✅ Created '{name}'")
+
+if __name__ == "__main__":
+    print("🔄 Creating plate summary indexes...")
+    try:
+        create_indexes()
+    except Exception as e:
+        print(f"❌ Error creating indexes: {e}")
+        raise
+    print("✅ Migration completed successfully!")
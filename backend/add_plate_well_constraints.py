@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Migration script for concurrent plate building:
+- gives controls added in the plate editor their plate_well_assignments row
+- adds the unique (plate_id, well_position) index on plate_well_assignments
+  (stops and lists the doubly-assigned wells if there are any - fix them first)
+- adds the (status, due_date) index on samples used to claim queue samples
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import and_, func, inspect, select
+
+from app.db.base import engine, SessionLocal
+from app.api.api_v1.endpoints.plate_editor import CONTROL_WELL_TYPES
+from app.models import ControlSample, PlateWellAssignment, Sample
+
+WELL_INDEX = "uq_plate_well_assignments_well"
+QUEUE_INDEX = "ix_samples_status_due_date"
+
+def create_index(model, name):
+    existing = {index["name"] for index in inspect(engine).get_indexes(model.__tablename__)}
+    if name in existing:
+        print(f"✅ '{name}' already exists")
+        return
+    index = next(i for i in model.__table__.indexes if i.name == name)
+    index.create(engine)
+    print(f"✅ Created '{name}'")
+
+def migrate():
+    db = SessionLocal()
+    try:
+        missing = db.execute(
+            select(ControlSample)
+            .outerjoin(PlateWellAssignment, and_(
+                PlateWellAssignment.plate_id == ControlSample.plate_id,
+                PlateWellAssignment.well_position == ControlSample.well_position,
+            ))
+            .where(PlateWellAssignment.id.is_(None))
+        ).scalars().all()
+        for control in missing:
+            db.add(PlateWellAssignment(
+                plate_id=control.plate_id,
+                well_position=control.well_position,
+                well_row=control.well_row,
+                well_column=control.well_column,
+                is_control=True,
+                control_type=CONTROL_WELL_TYPES.get((control.control_category, control.control_type)),
+            ))
+        db.commit()
+        print(f"✅ Added well assignments for {len(missing)} control(s)")
+
+        existing = {index["name"] for index in inspect(engine).get_indexes(PlateWellAssignment.__tablename__)}
+        if WELL_INDEX not in existing:
+            key = (PlateWellAssignment.plate_id, PlateWellAssignment.well_position)
+            duplicates = db.execute(
+                select(*key, func.count()).group_by(*key).having(func.count() > 1)
+            ).all()
+            if duplicates:
+                print("❌ Wells assigned more than once - fix these before adding the unique index:")
+                for plate_id, well_position, count in duplicates:
+                    print(f"  - plate {plate_id} well {well_position}: {count} assignments")
+                sys.exit(1)
+        create_index(PlateWellAssignment, WELL_INDEX)
+        create_index(Sample, QUEUE_INDEX)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("🔄 Adding plate well constraints...")
+    try:
+        migrate()
+    except Exception as e:
+        print(f"❌ Error adding plate well constraints: {e}")
+        raise
+    print("✅ Migration completed successfully!")
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the resource_versions table used for reference-data ETags.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.base import engine
+from app.models.base import ResourceVersion
+
+def create_resource_versions_table():
+    """Create the resource_versions table."""
+    try:
+        ResourceVersion.__table__.create(engine, checkfirst=True)
+        print("✅ 'resource_versions' table is in place")
+    except Exception as e:
+        print(f"❌ Error creating 'resource_versions' table: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("🔄 Creating resource_versions table...")
+    create_resource_versions_table()
+    print("✅ Migration completed successfully!")
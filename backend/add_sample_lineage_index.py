@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the parent_sample_id index on samples used by
+the reprocessing lineage queries and child counts.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect
+
+from app.db.base import engine
+from app.models.sample import Sample
+
+INDEX_NAME = "ix_samples_parent_sample_id"
+
+def create_index():
+    """Create the index if it does not exist yet."""
+    existing = {index["name"] for index in inspect(engine).get_indexes(Sample.__tablename__)}
+    if INDEX_NAME in existing:
+        print(f"✅ '{INDEX_NAME}' already exists")
+        return
+    index = next(i for i in Sample.__table__.indexes if i.name == INDEX_NAME)
+    index.create(engine)
+    print(f"✅ Created '{INDEX_NAME}'")
+
+if __name__ == "__main__":
+    print("🔄 Creating samples parent_sample_id index...")
+    try:
+        create_index()
+    except Exception as e:
+        print(f"❌ Error creating index: {e}")
+        raise
+    print("✅ Migration completed successfully!")
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the search indexes (samples, projects, clients,
+products and blockers).
+
+PostgreSQL: enables pg_trgm and adds GIN trigram indexes.
+SQLite: adds FTS5 shadow tables kept in sync by triggers.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.base import engine
+from app.db.search import ensure_search_indexes, SEARCH_SPECS
+
+if __name__ == "__main__":
+    print("🔄 Creating search indexes...")
+    try:
+        ensure_search_indexes(engine)
+    except Exception as e:
+        print(f"❌ Error creating search indexes: {e}")
+        raise
+    for table, columns in SEARCH_SPECS.items():
+        print(f"  - {table}: {', '.join(columns)}")
+    print("✅ Migration completed successfully!")
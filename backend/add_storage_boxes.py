@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Migration script for storage box occupancy:
+- adds the storage_boxes table
+- adds the unique (freezer, shelf, box, position) index on storage_locations
+  (stops and lists the duplicates if there are any - merge them first)
+- with --register-existing, registers every box already used by a storage
+  location with a --rows x --columns grid (default 9x9)
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, inspect, select
+
+from app.db.base import engine, SessionLocal
+from app.core.storage import create_box
+from app.models.storage import StorageBox, StorageLocation
+
+INDEX_NAME = "uq_storage_locations_slot"
+
+def migrate(register_existing: bool, rows: int, columns: int):
+    StorageBox.__table__.create(engine, checkfirst=True)
+    print("✅ 'storage_boxes' table is in place")
+
+    db = SessionLocal()
+    try:
+        existing = {index["name"] for index in inspect(engine).get_indexes(StorageLocation.__tablename__)}
+        if INDEX_NAME not in existing:
+            key = (StorageLocation.freezer, StorageLocation.shelf, StorageLocation.box, StorageLocation.position)
+            duplicates = db.execute(
+                select(*key, func.count()).group_by(*key).having(func.count() > 1)
+            ).all()
+            if duplicates:
+                print("❌ Duplicate storage locations - merge these before adding the unique index:")
+                for freezer, shelf, box, position, count in duplicates:
+                    print(f"  - {freezer} / {shelf} / {box} / {position}: {count} rows")
+                sys.exit(1)
+            index = next(i for i in StorageLocation.__table__.indexes if i.name == INDEX_NAME)
+            index.create(engine)
+            print(f"✅ Created '{INDEX_NAME}'")
+        else:
+            print(f"✅ '{INDEX_NAME}' already exists")
+
+        if register_existing:
+            registered = {
+                (b.freezer, b.shelf, b.box) for b in db.execute(select(StorageBox)).scalars()
+            }
+            boxes = db.execute(
+                select(StorageLocation.freezer, StorageLocation.shelf, StorageLocation.box).distinct()
+            ).all()
+            added = 0
+            for freezer, shelf, box in boxes:
+                if (freezer, shelf, box) not in registered:
+                    create_box(db, freezer, shelf, box, rows, columns)
+                    added += 1
+            db.commit()
+            print(f"✅ Registered {added} existing box(es) as {rows}x{columns}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--register-existing", action="store_true", help="Register boxes already in use")
+    parser.add_argument("--rows", type=int, default=9)
+    parser.add_argument("--columns", type=int, default=9)
+    args = parser.parse_args()
+
+    print("🔄 Setting up storage box occupancy...")
+    try:
+        migrate(args.register_existing, args.rows, args.columns)
+    except Exception as e:
+        print(f"❌ Error setting up storage boxes: {e}")
+        raise
+    print("✅ Migration completed successfully!")
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the stream_tickets table used to open event streams
+(app.core.stream_tickets).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.base import engine
+from app.models.stream_ticket import StreamTicket
+
+def create_stream_tickets_table():
+    """Create the stream_tickets table."""
+    try:
+        StreamTicket.__table__.create(engine, checkfirst=True)
+        print("✅ 'stream_tickets' table is in place")
+    except Exception as e:
+        print(f"❌ Error creating stream_tickets table: {e}")
+        raise
+
+if __name__ == "__main__":
+    print("🔄 Creating stream_tickets table...")
+    create_stream_tickets_table()
+    print("✅ Migration completed successfully!")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import auth, users, dashboard, clients, employees, deletion_logs, products, blockers
+from app.api.api_v1.endpoints import auth, users, dashboard, clients, employees, deletion_logs, products, blockers, search, events, jobs, sequencing_runs, analytics
 
 api_router = APIRouter()
 
@@ -10,4 +10,9 @@ api_router.include_router(deletion_logs.router, prefix="/deletion-logs", tags=["
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(employees.router, prefix="/employees", tags=["employees"])
 api_router.include_router(products.router, prefix="/products", tags=["products"])
-api_router.include_router(blockers.router, prefix="/blockers", tags=["blockers"])
\ No newline at end of file
+api_router.include_router(blockers.router, prefix="/blockers", tags=["blockers"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(sequencing_runs.router, prefix="/sequencing-runs", tags=["sequencing runs"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
\ No newline at end of file
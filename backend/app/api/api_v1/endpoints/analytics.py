@@ -0,0 +1,228 @@
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, select
+from datetime import datetime, timedelta, timezone
+
+from app.api import deps
+from app.core.stage_analytics import WATERMARK, as_utc, refresh_stage_analytics, stage_of
+from app.models import (
+    User, Client, Project, SampleStatus,
+    SampleStageInterval, StageDailyCount, AnalyticsWatermark
+)
+from app.schemas.analytics import AgingBucket, QueueAging, StageDay, OnTimeGroup
+
+router = APIRouter()
+
+DEFAULT_BUCKETS = "1,2,3,5,7,14,30"
+REFRESH_SETTLE_SECONDS = 2.0  # How long /refresh waits for in-flight status changes to settle
+# Samples in these stages are not waiting on the lab
+FINISHED_STAGES = (
+    SampleStatus.DELIVERED.value, SampleStatus.CANCELLED.value,
+    SampleStatus.DELETED.value, SampleStatus.FAILED.value,
+)
+
+def _parse_buckets(buckets: str) -> List[float]:
+    try:
+        edges = sorted({float(edge) for edge in buckets.split(",") if edge.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="buckets must be a comma-separated list of days")
+    if not edges or edges[0] <= 0:
+        raise HTTPException(status_code=400, detail="buckets must be positive numbers of days")
+    return edges
+
+def _bucket_ranges(edges: List[float]):
+    lower = 0.0
+    for edge in edges:
+        yield f"{lower:g}-{edge:g}d" if lower else f"<{edge:g}d", lower, edge
+        lower = edge
+    yield f"{lower:g}d+", lower, None
+
+def _as_of(db: Session) -> Optional[datetime]:
+    return db.execute(
+        select(AnalyticsWatermark.updated_at).where(AnalyticsWatermark.name == WATERMARK)
+    ).scalar()
+
+def _stage(value: str) -> str:
+    stage = stage_of(value)
+    if stage is None:
+        raise HTTPException(status_code=400, detail=f"Unknown stage: {value}")
+    return stage
+
+@router.get("/queue-aging", response_model=QueueAging)
+def get_queue_aging(
+    *,
+    db: Session = Depends(deps.get_db),
+    stage: str = Query(..., description="Sample status, e.g. extraction_queue"),
+    buckets: str = Query(DEFAULT_BUCKETS, description="Bucket edges in days, comma-separated"),
+    days: int = Query(30, ge=1, le=365, description="Window for samples that have left the stage"),
+    project_id: Optional[int] = Query(None),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Histogram of how long samples have been waiting in a stage, and how long the last ones took"""
+    stage = _stage(stage)
+    ranges = list(_bucket_ranges(_parse_buckets(buckets)))
+    now = datetime.now(timezone.utc)
+    interval = SampleStageInterval
+    scope = [interval.stage == stage]
+    if project_id is not None:
+        scope.append(interval.project_id == project_id)
+
+    # Open intervals: age buckets become entered_at ranges, counted in one pass
+    entered = interval.entered_at
+    waiting_counts = db.execute(
+        select(
+            func.count(interval.id),
+            func.min(entered),
+            *[
+                func.sum(case((and_(
+                    entered <= now - timedelta(days=low),
+                    entered > now - timedelta(days=high) if high is not None else True
+                ), 1), else_=0))
+                for _, low, high in ranges
+            ]
+        ).where(*scope, interval.exited_at.is_(None))
+    ).one()
+
+    duration = interval.duration_seconds
+    completed_counts = db.execute(
+        select(
+            func.count(interval.id),
+            func.avg(duration),
+            *[
+                func.sum(case((and_(
+                    duration >= low * 86400,
+                    duration < high * 86400 if high is not None else True
+                ), 1), else_=0))
+                for _, low, high in ranges
+            ]
+        ).where(*scope, interval.exited_at >= now - timedelta(days=days))
+    ).one()
+
+    def histogram(counts):
+        return [
+            AgingBucket(label=label, min_days=low, max_days=high, count=int(count or 0))
+            for (label, low, high), count in zip(ranges, counts)
+        ]
+
+    return QueueAging(
+        stage=stage,
+        as_of=_as_of(db),
+        in_stage=waiting_counts[0],
+        oldest_entered_at=as_utc(waiting_counts[1]) if waiting_counts[1] else None,
+        waiting=histogram(waiting_counts[2:]),
+        completed=completed_counts[0],
+        completed_mean_days=round(completed_counts[1] / 86400, 2) if completed_counts[1] is not None else None,
+        completed_durations=histogram(completed_counts[2:]),
+    )
+
+@router.get("/stage-snapshots", response_model=List[StageDay])
+def get_stage_snapshots(
+    *,
+    db: Session = Depends(deps.get_db),
+    stage: Optional[str] = Query(None, description="Sample status; all stages when omitted"),
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Daily samples entering, leaving and in each stage"""
+    today = datetime.now(timezone.utc).date()
+    start = today - timedelta(days=days - 1)
+    scope = [StageDailyCount.stage == _stage(stage)] if stage else []
+
+    # Occupancy at the start of the window, then a running total over it
+    in_stage = dict(db.execute(
+        select(StageDailyCount.stage, func.sum(StageDailyCount.entered - StageDailyCount.exited))
+        .where(*scope, StageDailyCount.day < start)
+        .group_by(StageDailyCount.stage)
+    ).all())
+    counts = {
+        (row.stage, row.day): row
+        for row in db.execute(
+            select(StageDailyCount.stage, StageDailyCount.day, StageDailyCount.entered, StageDailyCount.exited)
+            .where(*scope, StageDailyCount.day >= start)
+        )
+    }
+    stages = sorted(set(in_stage) | {stage for stage, _ in counts})
+
+    result = []
+    for name in stages:
+        occupancy = int(in_stage.get(name) or 0)
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            row = counts.get((name, day))
+            entered, exited = (row.entered, row.exited) if row else (0, 0)
+            occupancy += entered - exited
+            result.append(StageDay(day=day, stage=name, entered=entered, exited=exited, in_stage=occupancy))
+    return result
+
+@router.get("/on-time", response_model=List[OnTimeGroup])
+def get_on_time(
+    *,
+    db: Session = Depends(deps.get_db),
+    group_by: Literal["project", "client", "service_type"] = Query("project"),
+    days: int = Query(90, ge=1, le=730, description="Deliveries within this many days"),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Share of samples delivered by their project's due date, and samples now overdue"""
+    interval = SampleStageInterval
+    if group_by == "project":
+        key, label = Project.project_id, func.coalesce(Project.name, Project.project_id)
+    elif group_by == "client":
+        key, label = Client.id, Client.name
+    else:
+        key, label = Project.project_type, Project.project_type
+
+    def grouped(*columns):
+        query = select(key, label, *columns).select_from(interval).join(Project, Project.id == interval.project_id)
+        if group_by == "client":
+            query = query.join(Client, Client.id == Project.client_id)
+        return query.group_by(key, label)
+
+    now = datetime.now(timezone.utc)
+    delivered = db.execute(
+        grouped(
+            func.count(interval.id),
+            func.sum(case((interval.entered_at <= Project.due_date, 1), else_=0))
+        ).where(interval.stage == SampleStatus.DELIVERED.value, interval.entered_at >= now - timedelta(days=days))
+    ).all()
+    overdue = db.execute(
+        grouped(func.count(interval.id)).where(
+            interval.exited_at.is_(None),
+            interval.stage.not_in(FINISHED_STAGES),
+            Project.due_date < now
+        )
+    ).all()
+
+    groups = {}
+    for row in delivered:
+        groups[str(getattr(row[0], "value", row[0]))] = {
+            "label": str(getattr(row[1], "value", row[1])), "delivered": row[2], "delivered_on_time": int(row[3] or 0)
+        }
+    for row in overdue:
+        group = groups.setdefault(str(getattr(row[0], "value", row[0])), {
+            "label": str(getattr(row[1], "value", row[1])), "delivered": 0, "delivered_on_time": 0
+        })
+        group["overdue_open"] = row[2]
+
+    return [
+        OnTimeGroup(
+            key=name,
+            label=group["label"],
+            delivered=group["delivered"],
+            delivered_on_time=group["delivered_on_time"],
+            on_time_percent=round(group["delivered_on_time"] / group["delivered"] * 100, 1) if group["delivered"] else None,
+            overdue_open=group.get("overdue_open", 0),
+        )
+        for name, group in sorted(groups.items())
+    ]
+
+@router.post("/refresh")
+def refresh_analytics(
+    *,
+    db: Session = Depends(deps.get_primary_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Apply pending status changes now instead of waiting for the workers' next pass"""
+    if current_user.role not in ['super_admin', 'lab_manager', 'director']:
+        raise HTTPException(status_code=403, detail="Only lab managers can refresh analytics")
+    return {"applied": refresh_stage_analytics(db, settle_wait=REFRESH_SETTLE_SECONDS)}
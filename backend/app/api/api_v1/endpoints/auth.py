@@ -1,12 +1,13 @@
 from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.core import security
 from app.core.config import settings
+from app.core.health import readiness_probe
 from app.crud import user as crud_user
 from app.schemas.token import Token
 from app.schemas.user import User
@@ -170,40 +171,12 @@ async def change_password(
         )
 
 @router.get("/health")
-async def health_check(
-    db: Session = Depends(deps.get_db),
-) -> Any:
-    """Health check endpoint that also ensures admin user exists"""
-    try:
-        # Check if admin user exists, create if not
-        admin_user = crud_user.get_user_by_username(db, "admin")
-        if not admin_user:
-            # Create admin user
-            user_data = {
-                "email": "admin@lims.com",
-                "username": "admin",
-                "full_name": "Admin User",
-                "role": "super_admin",
-                "password": "Admin123!"
-            }
-            crud_user.create_user(db, user_data)
-            admin_created = True
-        else:
-            admin_created = False
-        
-        return {
-            "status": "healthy",
-            "admin_user_exists": True,
-            "admin_created": admin_created,
-            "admin_username": "admin",
-            "message": "LIMS system is running and admin access is guaranteed"
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e),
-            "admin_user_exists": False
-        }
+async def health_check(response: Response) -> Any:
+    """Health check (cached database readiness); the admin user is created by `python -m app.db.init_db`"""
+    result = await readiness_probe.check()
+    if result["status"] != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
 
 @router.post("/simple-login")
 async def simple_login(
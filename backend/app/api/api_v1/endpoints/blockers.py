@@ -1,11 +1,14 @@
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 import logging
 import json
 
 from app import crud, models, schemas
 from app.api import deps
+from app.db.search import apply_search, search_backend
 from app.models import Blocker, BlockerLog, User
 
 logger = logging.getLogger(__name__)
@@ -13,22 +16,23 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.BlockerList])
-def get_blockers(
-    db: Session = Depends(deps.get_db),
+async def get_blockers(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = Query(None, description="Search by blocker name"),
     storage: Optional[str] = Query(None, description="Filter by storage"),
     location: Optional[str] = Query(None, description="Filter by location"),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: User = Depends(deps.get_current_user_async),
 ) -> Any:
     """
     Retrieve blockers with optional filtering.
     """
-    query = db.query(Blocker)
+    query = select(Blocker).options(joinedload(Blocker.created_by))
     
     if search:
-        query = query.filter(Blocker.name.ilike(f"%{search}%"))
+        # Ranked match on name (best matches first)
+        query = apply_search(query, Blocker, search, await search_backend(db, Blocker))
     
     if storage:
         query = query.filter(Blocker.storage == storage)
@@ -36,7 +40,8 @@ def get_blockers(
     if location:
         query = query.filter(Blocker.location == location)
     
-    blockers = query.order_by(Blocker.created_at.desc()).offset(skip).limit(limit).all()
+    query = query.order_by(Blocker.created_at.desc()).offset(skip).limit(limit)
+    blockers = (await db.execute(query)).scalars().all()
     
     # Convert blockers to dict format for response
     result = []
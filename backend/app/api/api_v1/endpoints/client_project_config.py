@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select, update
 
 from app.api import deps
+from app.core.versioning import CLIENT_PROJECT_CONFIGS, bump_version, conditional_get
 from app.models import Client, ClientProjectConfig as ClientProjectConfigModel
 from app.schemas.client_project_config import (
     ClientProjectConfig,
@@ -17,6 +18,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[ClientProjectConfig])
 def get_all_client_configs(
+    _: None = Depends(conditional_get(CLIENT_PROJECT_CONFIGS)),
     db: Session = Depends(deps.get_db),
     current_user = Depends(deps.get_current_user)
 ) -> List[ClientProjectConfig]:
@@ -65,6 +67,7 @@ def create_client_config(
         last_batch_number=0
     )
     db.add(config)
+    bump_version(db, CLIENT_PROJECT_CONFIGS)
     db.commit()
     db.refresh(config)
     
@@ -90,6 +93,7 @@ def update_client_config(
     for field, value in update_data.items():
         setattr(config, field, value)
     
+    bump_version(db, CLIENT_PROJECT_CONFIGS)
     db.commit()
     db.refresh(config)
     
@@ -184,6 +188,7 @@ def use_project_id(
             # Update last_batch_number if this one is higher
             if used_batch >= config.last_batch_number:
                 config.last_batch_number = used_batch
+                bump_version(db, CLIENT_PROJECT_CONFIGS)
                 db.commit()
                 return {"success": True, "message": f"Updated batch number to {used_batch}"}
         except ValueError:
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.api import deps
+from app.core.versioning import CLIENTS, CLIENT_PROJECT_CONFIGS, bump_version, conditional_get
 from app.models import User, Client, ClientProjectConfig, Project
 from app.schemas.client import Client as ClientSchema, ClientCreate, ClientUpdate
 
@@ -12,6 +13,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[ClientSchema])
 def read_clients(
+    _: None = Depends(conditional_get(CLIENTS)),
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -47,6 +49,7 @@ def create_client(
         created_by_id=current_user.id
     )
     db.add(client)
+    bump_version(db, CLIENTS)
     db.commit()
     db.refresh(client)
     
@@ -60,6 +63,7 @@ def create_client(
             include_sample_types=True
         )
         db.add(project_config)
+        bump_version(db, CLIENT_PROJECT_CONFIGS)
         db.commit()
     
     return client
@@ -125,6 +129,7 @@ def update_client(
     client.updated_by_id = current_user.id
     client.updated_at = func.now()
     db.add(client)
+    bump_version(db, CLIENTS)
     db.commit()
     db.refresh(client)
     
@@ -144,6 +149,7 @@ def update_client(
                 include_sample_types=True
             )
             db.add(project_config)
+            bump_version(db, CLIENT_PROJECT_CONFIGS)
             db.commit()
     
     return client
@@ -179,6 +185,7 @@ def delete_client(
     
     # Delete the client
     db.delete(client)
+    bump_version(db, CLIENTS, CLIENT_PROJECT_CONFIGS)
     db.commit()
     
     return {"message": "Client deleted successfully"}
\ No newline at end of file
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.versioning import EMPLOYEES, bump_version, conditional_get
 from app.models import User, Employee
 from app.schemas.employee import Employee as EmployeeSchema, EmployeeCreate, EmployeeUpdate
 
@@ -10,6 +11,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[EmployeeSchema])
 def read_employees(
+    _: None = Depends(conditional_get(EMPLOYEES)),
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -44,6 +46,7 @@ def create_employee(
     
     employee = Employee(**employee_in.dict())
     db.add(employee)
+    bump_version(db, EMPLOYEES)
     db.commit()
     db.refresh(employee)
     return employee
@@ -94,6 +97,7 @@ def update_employee(
         setattr(employee, field, value)
     
     db.add(employee)
+    bump_version(db, EMPLOYEES)
     db.commit()
     db.refresh(employee)
     return employee
@@ -118,6 +122,7 @@ def delete_employee(
     
     employee.is_active = False
     db.add(employee)
+    bump_version(db, EMPLOYEES)
     db.commit()
     
     return {"message": "Employee deactivated successfully"}
\ No newline at end of file
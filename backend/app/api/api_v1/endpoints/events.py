@@ -0,0 +1,75 @@
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+import asyncio
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.config import settings
+from app.core.events import CLOSED, event_broker
+from app.core.stream_tickets import issue_ticket
+from app.models import User
+
+router = APIRouter()
+
+EVENT_TYPES = {"sample.status", "sample.priority", "plate.status"}
+
+@router.post("/ticket")
+def create_stream_ticket(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Single-use ticket for opening a stream: `GET /queues?ticket=...`
+
+    Valid for STREAM_TICKET_EXPIRE_SECONDS; ask for a new one on every
+    (re)connect.
+    """
+    return {
+        "ticket": issue_ticket(db, current_user.username),
+        "expires_in": settings.STREAM_TICKET_EXPIRE_SECONDS,
+    }
+
+@router.get("/queues")
+async def stream_queue_events(
+    types: Optional[str] = Query(None, description="Comma-separated subset of: sample.status, sample.priority, plate.status"),
+    current_user: User = Depends(deps.get_stream_user),
+) -> Any:
+    """
+    Server-Sent Events stream of sample/plate changes for the queue pages
+
+    Each message's `event` is the change type and its `data` a JSON object
+    with the record id and old/new values. A `resync` event means changes
+    were missed and the page should reload its table.
+    """
+    if types:
+        wanted = {t.strip() for t in types.split(",") if t.strip()}
+        unknown = wanted - EVENT_TYPES
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(sorted(unknown))}")
+    else:
+        wanted = EVENT_TYPES
+
+    async def stream():
+        async with event_broker.subscribe() as queue:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line; keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                if item is CLOSED:
+                    return
+                if item["type"] != "resync" and item["type"] not in wanted:
+                    continue
+                yield f"event: {item['type']}\ndata: {orjson.dumps(item).decode()}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
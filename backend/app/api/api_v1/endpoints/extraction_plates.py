@@ -1,24 +1,34 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, noload, selectinload
+from sqlalchemy import func, and_, case, select, update, insert, union_all
+from collections import defaultdict
 from datetime import datetime
 import random
 import string
 
 from app.api import deps
+from app.core.archive import archived_plate_samples, archived_plate_wells
+from app.core.plate_claims import (
+    claim_queue_samples, claim_samples, commit_plate, free_wells, lock_draft_plate, next_free_well, occupied_wells
+)
 from app.models import (
-    User, Sample, SampleStatus, Project, 
-    ExtractionPlate, PlateStatus, PlateWellAssignment
+    User, Sample, SampleStatus, Project, SampleLog,
+    ExtractionPlate, PlateStatus, PlateWellAssignment, ControlSample, ArchivedSample
 )
 from app.schemas.extraction_plate import (
     ExtractionPlate as ExtractionPlateSchema,
+    ExtractionPlateSummary,
+    ExtractionPlateDetail,
+    PlateSample,
     ExtractionPlateCreate,
     ExtractionPlateUpdate,
     PlateAssignment,
     PlateWellAssignment as WellAssignmentSchema,
     PlateAutoAssignRequest,
-    PlateAutoAssignResponse
+    PlateAutoAssignResponse,
+    PlateQCImportResponse
 )
 
 router = APIRouter()
@@ -29,40 +39,82 @@ def generate_plate_id() -> str:
     random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
     return f"EXT-{date_str}-{random_str}"
 
-def get_well_position(index: int) -> tuple[str, int]:
-    """Convert index (0-95) to well position (A1-H12) - fills vertically by column"""
-    # Skip control wells: E12, F12, G12, H12 (last column for controls)
-    control_wells = ["E12", "F12", "G12", "H12"]
-    
-    # Fill vertically: A1-H1, then A2-H2, etc.
-    col = index // 8 + 1  # Column number (1-12)
-    row = index % 8      # Row index (0-7)
-    well = f"{chr(65 + row)}{col}"
-    
-    # If this is a control well, skip to next available
-    if well in control_wells:
-        # If we hit control wells, we've filled 11 columns + 4 rows of column 12
-        # So we need to jump to the next appropriate position
-        return get_well_position(index + 1)
-    
-    return well, col
+def plate_summary_queries(plate_ids: List[int]):
+    """
+    Samples per plate and project, and control QC counts per plate - aggregates instead of sample rows
 
-@router.get("/", response_model=List[ExtractionPlateSchema])
-def get_extraction_plates(
-    db: Session = Depends(deps.get_db),
+    Archived samples still count for the plates they were on.
+    """
+    members = union_all(*(
+        select(model.extraction_plate_ref_id.label("plate_id"), model.project_id.label("project_id"))
+        .where(model.extraction_plate_ref_id.in_(plate_ids))
+        for model in (Sample, ArchivedSample)
+    )).subquery()
+    projects = (
+        select(members.c.plate_id, Project.project_id, func.count())
+        .outerjoin(Project, Project.id == members.c.project_id)
+        .group_by(members.c.plate_id, Project.project_id)
+    )
+    controls = (
+        select(
+            ControlSample.plate_id,
+            func.count(ControlSample.id),
+            func.sum(case((ControlSample.qc_pass == True, 1), else_=0)),
+            func.sum(case((ControlSample.qc_pass == False, 1), else_=0))
+        )
+        .where(ControlSample.plate_id.in_(plate_ids))
+        .group_by(ControlSample.plate_id)
+    )
+    return projects, controls
+
+def control_qc_status(plate: ExtractionPlate, total: int = 0, passed: int = 0, failed: int = 0) -> Optional[str]:
+    """Combined QC of the plate's controls: failed if any failed, passed once all passed, else pending"""
+    for control_id, control_pass in (
+        (plate.ext_pos_ctrl_id, plate.ext_pos_ctrl_pass),
+        (plate.ext_neg_ctrl_id, plate.ext_neg_ctrl_pass)
+    ):
+        if control_id:
+            total += 1
+            passed += control_pass is True
+            failed += control_pass is False
+    if not total:
+        return None
+    if failed:
+        return "failed"
+    return "passed" if passed == total else "pending"
+
+def summarize_plates(plates, project_rows, control_rows) -> List[ExtractionPlateSummary]:
+    breakdown = defaultdict(dict)
+    for plate_id, project_code, count in project_rows:
+        breakdown[plate_id][project_code or "unassigned"] = count
+    controls = {row[0]: (row[1], int(row[2] or 0), int(row[3] or 0)) for row in control_rows}
+    
+    summaries = []
+    for plate in plates:
+        summary = ExtractionPlateSummary.from_orm(plate)
+        summary.project_breakdown = breakdown.get(plate.id, {})
+        summary.sample_count = sum(summary.project_breakdown.values())
+        summary.control_qc_status = control_qc_status(plate, *controls.get(plate.id, ()))
+        summary.assigned_tech_name = plate.assigned_tech.full_name if plate.assigned_tech else None
+        summaries.append(summary)
+    return summaries
+
+@router.get("/", response_model=List[ExtractionPlateSummary])
+async def get_extraction_plates(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
     status: Optional[PlateStatus] = None,
     status_in: Optional[str] = Query(None, description="Comma-separated list of statuses"),
     sort_by: Optional[str] = Query("created_at", description="Sort field"),
     sort_order: Optional[str] = Query("desc", description="Sort order: asc or desc"),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: User = Depends(deps.get_current_user_async),
 ) -> Any:
-    """Get extraction plates"""
-    query = db.query(ExtractionPlate).options(
+    """Get extraction plates, with sample counts, project breakdown and control QC computed in SQL"""
+    query = select(ExtractionPlate).options(
         joinedload(ExtractionPlate.assigned_tech),
         joinedload(ExtractionPlate.created_by),
-        joinedload(ExtractionPlate.samples)
+        noload(ExtractionPlate.samples)  # Summarized below instead of loading up to 92 rows per plate
     )
     
     if status:
@@ -83,28 +135,45 @@ def get_extraction_plates(
         else:
             query = query.order_by(ExtractionPlate.plate_id.desc())
     
-    plates = query.offset(skip).limit(limit).all()
+    plates = (await db.execute(query.offset(skip).limit(limit))).unique().scalars().all()
+    if not plates:
+        return []
     
-    # Convert to response model
-    return [ExtractionPlateSchema.from_orm(plate) for plate in plates]
+    projects, controls = plate_summary_queries([plate.id for plate in plates])
+    return summarize_plates(plates, (await db.execute(projects)).all(), (await db.execute(controls)).all())
 
-@router.get("/{plate_id}", response_model=ExtractionPlateSchema)
+@router.get("/{plate_id}", response_model=ExtractionPlateDetail)
 def get_extraction_plate(
     plate_id: int,
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
-    """Get single extraction plate"""
+    """Get single extraction plate with its samples"""
     plate = db.query(ExtractionPlate).options(
         joinedload(ExtractionPlate.assigned_tech),
         joinedload(ExtractionPlate.created_by),
-        joinedload(ExtractionPlate.samples)
+        selectinload(ExtractionPlate.samples).joinedload(Sample.project)
     ).filter(ExtractionPlate.id == plate_id).first()
     
     if not plate:
         raise HTTPException(status_code=404, detail="Extraction plate not found")
     
-    return ExtractionPlateSchema.from_orm(plate)
+    projects, controls = plate_summary_queries([plate.id])
+    summary = summarize_plates([plate], db.execute(projects).all(), db.execute(controls).all())[0]
+    return ExtractionPlateDetail(
+        **summary.model_dump(),
+        samples=[
+            PlateSample(
+                id=sample.id,
+                barcode=sample.barcode,
+                client_sample_id=sample.client_sample_id,
+                status=sample.status,
+                extraction_well_position=sample.extraction_well_position,
+                project_code=sample.project.project_id if sample.project else None
+            )
+            for sample in [*plate.samples, *archived_plate_samples(db, plate.id)]
+        ]
+    )
 
 @router.post("/", response_model=ExtractionPlateSchema)
 def create_extraction_plate(
@@ -159,39 +228,20 @@ def auto_assign_samples_to_plate(
             detail="Only lab managers can assign samples to plates"
         )
     
-    plate = db.query(ExtractionPlate).filter(ExtractionPlate.id == plate_id).first()
-    if not plate:
-        raise HTTPException(status_code=404, detail="Extraction plate not found")
-    
-    if plate.status != PlateStatus.DRAFT:
-        raise HTTPException(
-            status_code=400,
-            detail="Can only assign samples to plates in draft status"
-        )
-    
-    # Get available samples from extraction queue
-    query = db.query(Sample).filter(
-        Sample.status == SampleStatus.EXTRACTION_QUEUE,
-        Sample.extraction_plate_ref_id.is_(None)  # Not already assigned
-    ).options(
-        joinedload(Sample.project)
+    # Locked until commit: a second build of the same plate waits, other plates proceed
+    plate = lock_draft_plate(db, plate_id, "Can only assign samples to plates in draft status")
+    occupied = occupied_wells(db, plate.id)
+    wells = free_wells(occupied)
+    
+    # Claim samples from the extraction queue, by due date then project to maximize grouping;
+    # samples another supervisor is claiming right now are skipped rather than waited for
+    available_samples = claim_queue_samples(
+        db, plate,
+        limit=max(min(request.max_samples or 92, 92, 96 - len(occupied) - 4), 0),  # Max 92 samples, room for 4 controls
+        project_ids=request.project_ids,
+        sample_types=request.sample_types
     )
     
-    # Apply filters
-    if request.project_ids:
-        query = query.filter(Sample.project_id.in_(request.project_ids))
-    
-    if request.sample_types:
-        query = query.filter(Sample.sample_type.in_(request.sample_types))
-    
-    # Order by priority: due date, then project to maximize grouping
-    query = query.order_by(
-        Sample.due_date.nullslast(),
-        Sample.project_id
-    )
-    
-    available_samples = query.limit(request.max_samples or 92).all()
-    
     if len(available_samples) < (request.min_samples or 1):
         raise HTTPException(
             status_code=400,
@@ -202,12 +252,10 @@ def auto_assign_samples_to_plate(
     assigned_samples = []
     well_assignments = []
     
-    for i, sample in enumerate(available_samples[:92]):  # Max 92 samples
-        well_position, _ = get_well_position(i)
+    for sample in available_samples:
+        well_position = next_free_well(wells)
         
-        # Update sample
-        sample.extraction_plate_ref_id = plate.id
-        sample.extraction_plate_id = plate.plate_id
+        # Update sample (extraction_plate_ref_id and extraction_plate_id were set by the claim)
         sample.extraction_well_position = well_position
         sample.extraction_tech_id = plate.assigned_tech_id
         sample.extraction_assigned_date = datetime.utcnow()
@@ -237,9 +285,6 @@ def auto_assign_samples_to_plate(
     plate.status = PlateStatus.FINALIZED
     
     # Add control well assignments - place after last sample
-    num_samples = len(assigned_samples)
-    control_start_index = num_samples  # Start controls right after last sample
-    
     control_types = [
         ("ext_pos", f"POS-{plate.plate_id}"),
         ("ext_neg", f"NEG-{plate.plate_id}"),
@@ -248,12 +293,8 @@ def auto_assign_samples_to_plate(
     ]
     
     control_well_positions = {}
-    for i, (ctrl_type, ctrl_id) in enumerate(control_types):
-        # Calculate well position for this control
-        control_index = control_start_index + i
-        control_col = control_index // 8 + 1  # Column number (1-12)
-        control_row = control_index % 8      # Row index (0-7)
-        well_position = f"{chr(65 + control_row)}{control_col}"
+    for ctrl_type, ctrl_id in control_types:
+        well_position = next_free_well(wells)
         
         well_assignment = PlateWellAssignment(
             plate_id=plate.id,
@@ -284,11 +325,11 @@ def auto_assign_samples_to_plate(
             plate.lp_neg_ctrl_id = ctrl_id
             plate.lp_neg_ctrl_well = well_position
     
-    db.commit()
+    commit_plate(db)
     
     # Get project summary
     project_counts = {}
-    for sample in available_samples[:92]:
+    for sample in available_samples:
         if sample.project:
             project_id = sample.project.project_id
             project_counts[project_id] = project_counts.get(project_id, 0) + 1
@@ -316,10 +357,10 @@ def get_plate_layout(
         PlateWellAssignment.plate_id == plate_id
     ).options(
         joinedload(PlateWellAssignment.sample).joinedload(Sample.project)
-    ).order_by(
-        PlateWellAssignment.well_row,
-        PlateWellAssignment.well_column
     ).all()
+    # Wells of archived samples are shown too
+    assignments += archived_plate_wells(db, plate_id)
+    assignments.sort(key=lambda assignment: (assignment.well_row or "", assignment.well_column or 0))
     
     # Convert to response model using from_orm
     return [WellAssignmentSchema.from_orm(assignment) for assignment in assignments]
@@ -412,6 +453,186 @@ def complete_extraction(
     db.refresh(plate)
     
     return ExtractionPlateSchema.from_orm(plate)
+
+@router.post("/{plate_id}/qc-import", response_model=PlateQCImportResponse)
+def import_plate_qc(
+    *,
+    db: Session = Depends(deps.get_db),
+    plate_id: int,
+    file: UploadFile = File(..., description="Qubit or NanoDrop export (CSV/XLSX), one row per well or an 8x12 grid"),
+    min_concentration: Optional[float] = Query(None, description="ng/µL; default 1.0"),
+    min_260_280: Optional[float] = Query(None, description="Default 1.6"),
+    max_260_280: Optional[float] = Query(None, description="Default 2.2"),
+    min_260_230: Optional[float] = Query(None, description="Default 1.0"),
+    max_negative_concentration: Optional[float] = Query(None, description="ng/µL allowed in negative controls; default 0.5"),
+    dry_run: bool = Query(False, description="Evaluate and return the results without saving them"),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Import extraction QC for a whole plate from a plate-reader export"""
+    # NumPy is only needed here, so it is not loaded at worker startup
+    import numpy as np
+    from app.core.plate_reader import QCThresholds, evaluate_qc, parse_plate_reader_file, value_at, well_index
+    
+    plate = db.query(ExtractionPlate).filter(ExtractionPlate.id == plate_id).first()
+    if not plate:
+        raise HTTPException(status_code=404, detail="Extraction plate not found")
+    
+    if plate.status not in (PlateStatus.IN_PROGRESS, PlateStatus.COMPLETED):
+        raise HTTPException(
+            status_code=400,
+            detail="QC can only be imported for plates in progress or completed"
+        )
+    
+    try:
+        reading = parse_plate_reader_file(file.file.read(), file.filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read plate-reader file: {str(e)}")
+    
+    overrides = {
+        "min_concentration": min_concentration,
+        "min_260_280": min_260_280,
+        "max_260_280": max_260_280,
+        "min_260_230": min_260_230,
+        "max_negative_concentration": max_negative_concentration,
+    }
+    verdicts = evaluate_qc(reading, QCThresholds(**{k: v for k, v in overrides.items() if v is not None}))
+    
+    # Map wells to samples and controls through the plate's well assignments
+    assignments = db.query(
+        PlateWellAssignment.well_position,
+        PlateWellAssignment.sample_id,
+        PlateWellAssignment.is_control,
+        PlateWellAssignment.control_type,
+        Sample.barcode
+    ).outerjoin(
+        Sample, Sample.id == PlateWellAssignment.sample_id
+    ).filter(
+        PlateWellAssignment.plate_id == plate.id
+    ).all()
+    controls = {
+        well_index(control.well_position): control
+        for control in db.query(ControlSample).filter(ControlSample.plate_id == plate.id).all()
+    }
+    
+    wells = {}
+    for assignment in assignments:
+        index = well_index(assignment.well_position)
+        if index is not None:
+            wells[index] = assignment
+    for index in controls:
+        if index is not None and index not in wells:
+            wells[index] = None  # Control sample without a well assignment row
+    
+    has_reading = ~np.isnan(reading.concentration)
+    assigned = np.zeros(has_reading.shape, dtype=bool)
+    if wells:
+        rows_index, cols_index = np.array(list(wells)).T
+        assigned[rows_index, cols_index] = True
+    unassigned_wells = [f"{chr(65 + r)}{c + 1}" for r, c in zip(*np.nonzero(has_reading & ~assigned))]
+    
+    has_280 = not np.all(np.isnan(reading.ratio_260_280))
+    has_230 = not np.all(np.isnan(reading.ratio_260_230))
+    
+    results, missing_wells = [], []
+    sample_updates, control_updates, logs = [], [], []
+    for index, assignment in sorted(wells.items(), key=lambda item: (item[0][1], item[0][0])):
+        well = f"{chr(65 + index[0])}{index[1] + 1}"
+        if not has_reading[index]:
+            missing_wells.append(well)
+            continue
+        
+        control = controls.get(index)
+        control_type = assignment.control_type if assignment and assignment.is_control else None
+        if control is not None and control_type is None:
+            control_type = control.control_type
+        is_negative = control_type in ("ext_neg", "lp_neg", "negative")
+        qc_pass = bool(verdicts["negative" if is_negative else "sample"][index])
+        concentration = value_at(reading.concentration, index)
+        ratio_280 = value_at(reading.ratio_260_280, index)
+        ratio_230 = value_at(reading.ratio_260_230, index)
+        
+        sample_id = assignment.sample_id if assignment and not assignment.is_control else None
+        results.append({
+            "well_position": well,
+            "sample_id": sample_id,
+            "barcode": assignment.barcode if sample_id else None,
+            "control_type": control_type,
+            "concentration": concentration,
+            "ratio_260_280": ratio_280,
+            "ratio_260_230": ratio_230,
+            "qc_pass": qc_pass,
+        })
+        
+        if sample_id:
+            values = {
+                "id": sample_id,
+                "extraction_concentration": concentration,
+                "extraction_qc_pass": qc_pass,
+                "updated_by_id": current_user.id,
+            }
+            if has_280:
+                values["extraction_260_280"] = ratio_280
+            if has_230:
+                values["extraction_260_230"] = ratio_230
+            sample_updates.append(values)
+            logs.append({
+                "sample_id": sample_id,
+                "comment": (
+                    f"Extraction QC imported from {file.filename} (well {well}): "
+                    f"{concentration} ng/µL - {'PASS' if qc_pass else 'FAIL'}"
+                ),
+                "log_type": "qc_result",
+                "new_value": str(concentration),
+                "created_by_id": current_user.id,
+            })
+        elif control is not None:
+            values = {"id": control.id, "concentration": concentration, "qc_pass": qc_pass, "updated_by_id": current_user.id}
+            if has_280:
+                values["ratio_260_280"] = ratio_280
+            if has_230:
+                values["ratio_260_230"] = ratio_230
+            control_updates.append(values)
+        
+        # The plate keeps its own copy of the extraction control results
+        if control_type in ("ext_pos", "ext_neg") or (
+            control is not None and control.control_category == "extraction"
+        ):
+            if is_negative:
+                plate.ext_neg_ctrl_concentration = concentration
+                plate.ext_neg_ctrl_pass = qc_pass
+            else:
+                plate.ext_pos_ctrl_concentration = concentration
+                plate.ext_pos_ctrl_pass = qc_pass
+    
+    if dry_run:
+        db.rollback()
+    else:
+        # All rows in a few executemany statements, one transaction
+        if sample_updates:
+            db.execute(update(Sample), sample_updates)
+        if control_updates:
+            db.execute(update(ControlSample), control_updates)
+        if logs:
+            db.execute(insert(SampleLog), logs)
+        db.commit()
+    
+    passed = sum(1 for result in results if result["qc_pass"])
+    return PlateQCImportResponse(
+        plate_id=plate.plate_id,
+        layout=reading.layout,
+        dry_run=dry_run,
+        wells_read=reading.wells_read,
+        samples_updated=0 if dry_run else len(sample_updates),
+        controls_updated=0 if dry_run else len(control_updates),
+        passed=passed,
+        failed=len(results) - passed,
+        missing_wells=missing_wells,
+        unassigned_wells=unassigned_wells,
+        results=results
+    )
+
 @router.post("/{plate_id}/assign-samples-manual", response_model=PlateAutoAssignResponse)
 def assign_samples_manual(
     *,
@@ -428,45 +649,51 @@ def assign_samples_manual(
             detail="Only lab managers can assign samples to plates"
         )
     
-    plate = db.query(ExtractionPlate).filter(ExtractionPlate.id == plate_id).first()
-    if not plate:
-        raise HTTPException(status_code=404, detail="Extraction plate not found")
+    # Locked until commit: a second edit of the same plate waits, other plates proceed
+    plate = lock_draft_plate(db, plate_id, "Can only assign samples to plates in draft status")
     
-    if plate.status != PlateStatus.DRAFT:
+    assignments = request.get("assignments", [])
+    include_controls = request.get("include_controls", True)
+    add_water_balance = request.get("add_water_balance", False)
+    
+    # Requested wells must be free; the rest are filled from the first free well
+    occupied = occupied_wells(db, plate.id)
+    requested_wells = [a["well_position"] for a in assignments if "well_position" in a]
+    taken = sorted(
+        {well for well in requested_wells if well in occupied}
+        | {well for well in requested_wells if requested_wells.count(well) > 1}
+    )
+    if taken:
         raise HTTPException(
             status_code=400,
-            detail="Can only assign samples to plates in draft status"
+            detail=f"Wells already occupied: {', '.join(taken)}"
         )
+    wells = free_wells(occupied | set(requested_wells))
     
-    assignments = request.get("assignments", [])
-    include_controls = request.get("include_controls", True)
-    add_water_balance = request.get("add_water_balance", False)
+    # Claim the samples in one statement; ones on another plate (or being placed on one) are refused
+    sample_ids = [assignment["sample_id"] for assignment in assignments]
+    samples = {sample.id: sample for sample in claim_samples(db, plate, sample_ids, queued_only=False)}
+    unavailable = [sample_id for sample_id in sample_ids if sample_id not in samples]
+    if unavailable:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Samples not found or already assigned to a plate: {', '.join(map(str, unavailable))}"
+        )
     
     # Assign samples to wells
     assigned_samples = []
     well_assignments = []
     
     for assignment in assignments:
-        sample_id = assignment["sample_id"]
-        sample = db.query(Sample).filter(Sample.id == sample_id).first()
-        
-        if not sample:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Sample {sample_id} not found"
-            )
+        sample = samples[assignment["sample_id"]]
         
         # Get well position from assignment
         if "well_position" in assignment:
             well_position = assignment["well_position"]
         else:
-            # Calculate based on index
-            index = len(assigned_samples)
-            well_position, _ = get_well_position(index)
+            well_position = next_free_well(wells)
         
-        # Update sample
-        sample.extraction_plate_ref_id = plate.id
-        sample.extraction_plate_id = plate.plate_id
+        # Update sample (extraction_plate_ref_id and extraction_plate_id were set by the claim)
         sample.extraction_well_position = well_position
         sample.extraction_tech_id = plate.assigned_tech_id
         sample.extraction_assigned_date = datetime.utcnow()
@@ -504,10 +731,6 @@ def assign_samples_manual(
     
     # Add control well assignments - place after last sample, not at end of plate
     if include_controls:
-        # Calculate where to place controls based on number of samples
-        num_samples = len(assigned_samples)
-        control_start_index = num_samples  # Start controls right after last sample
-        
         # Define control types
         control_types = [
             ("ext_pos", f"POS-{plate.plate_id}"),
@@ -517,12 +740,8 @@ def assign_samples_manual(
         ]
         
         control_well_positions = {}
-        for i, (ctrl_type, ctrl_id) in enumerate(control_types):
-            # Calculate well position for this control
-            control_index = control_start_index + i
-            control_col = control_index // 8 + 1  # Column number (1-12)
-            control_row = control_index % 8      # Row index (0-7)
-            well_position = f"{chr(65 + control_row)}{control_col}"
+        for ctrl_type, ctrl_id in control_types:
+            well_position = next_free_well(wells)
             
             well_assignment = PlateWellAssignment(
                 plate_id=plate.id,
@@ -556,13 +775,12 @@ def assign_samples_manual(
     # Update plate status
     plate.status = PlateStatus.FINALIZED
     
-    db.commit()
+    commit_plate(db)
     
     # Get project summary
     project_counts = {}
-    for assignment in assigned_samples:
-        sample = db.query(Sample).filter(Sample.id == assignment["sample_id"]).first()
-        if sample and sample.project:
+    for sample in samples.values():
+        if sample.project:
             project_id = sample.project.project_id
             project_counts[project_id] = project_counts.get(project_id, 0) + 1
     
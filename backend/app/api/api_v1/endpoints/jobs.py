@@ -0,0 +1,108 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, load_only
+import json
+
+from app.api import deps
+from app.core.config import settings
+from app.models import User
+from app.models.job import Job, JobArtifact
+from app.schemas.job import Job as JobSchema
+
+router = APIRouter()
+
+def _job_out(job: Job, artifacts: List[JobArtifact]) -> JobSchema:
+    return JobSchema(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        progress_done=job.progress_done,
+        progress_total=job.progress_total,
+        progress_message=job.progress_message,
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        created_by_id=job.created_by_id,
+        artifacts=[
+            {
+                "name": a.name,
+                "filename": a.filename,
+                "media_type": a.media_type,
+                "size": a.size,
+                "url": f"{settings.API_V1_STR}/jobs/{job.id}/artifacts/{a.name}",
+            }
+            for a in artifacts
+        ],
+    )
+
+def _get_own_job(db: Session, job_id: int, current_user: User) -> Job:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    # Other users' jobs are reported as missing
+    if not job or (job.created_by_id != current_user.id and current_user.role != "super_admin"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def _artifact_list(db: Session, job_ids: List[int]) -> dict:
+    # Listing artifacts must not load their contents
+    rows = db.execute(
+        select(JobArtifact)
+        .options(load_only(JobArtifact.job_id, JobArtifact.name, JobArtifact.filename, JobArtifact.media_type, JobArtifact.size))
+        .where(JobArtifact.job_id.in_(job_ids), JobArtifact.name != "input")
+        .order_by(JobArtifact.id)
+    ).scalars().all()
+    artifacts = {}
+    for artifact in rows:
+        artifacts.setdefault(artifact.job_id, []).append(artifact)
+    return artifacts
+
+@router.get("/", response_model=List[JobSchema])
+def read_jobs(
+    db: Session = Depends(deps.get_primary_db),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Current user's most recent jobs"""
+    jobs = db.query(Job).filter(
+        Job.created_by_id == current_user.id
+    ).order_by(Job.id.desc()).limit(limit).all()
+    artifacts = _artifact_list(db, [job.id for job in jobs])
+    return [_job_out(job, artifacts.get(job.id, [])) for job in jobs]
+
+@router.get("/{job_id}", response_model=JobSchema)
+def read_job(
+    job_id: int,
+    db: Session = Depends(deps.get_primary_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Status, progress and result of a background job"""
+    job = _get_own_job(db, job_id, current_user)
+    return _job_out(job, _artifact_list(db, [job.id]).get(job.id, []))
+
+@router.get("/{job_id}/artifacts/{name}")
+def download_job_artifact(
+    job_id: int,
+    name: str,
+    db: Session = Depends(deps.get_primary_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Download a file produced by a job"""
+    job = _get_own_job(db, job_id, current_user)
+    artifact = db.query(JobArtifact).filter(
+        JobArtifact.job_id == job.id,
+        JobArtifact.name == name,
+        JobArtifact.name != "input"
+    ).first()
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    
+    return Response(
+        content=artifact.content,
+        media_type=artifact.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{artifact.filename}"'}
+    )
@@ -5,6 +5,9 @@ from sqlalchemy import and_, func
 from datetime import datetime
 
 from app.api import deps
+from app.core.plate_claims import (
+    claim_samples, commit_plate, free_wells, lock_draft_plate, next_free_well, occupied_wells
+)
 from app.models import (
     User, Sample, SampleStatus, 
     ExtractionPlate, PlateStatus, PlateWellAssignment,
@@ -21,6 +24,14 @@ from app.utils.control_naming import generate_control_id, validate_control_id_un
 
 router = APIRouter()
 
+# plate_well_assignments.control_type of each (control_category, control_type)
+CONTROL_WELL_TYPES = {
+    ("extraction", "positive"): "ext_pos",
+    ("extraction", "negative"): "ext_neg",
+    ("library_prep", "positive"): "lp_pos",
+    ("library_prep", "negative"): "lp_neg",
+}
+
 @router.get("/{plate_id}/layout", response_model=PlateLayoutResponse)
 def get_plate_layout(
     plate_id: int,
@@ -109,15 +120,8 @@ def add_samples_to_plate(
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Add samples to a draft plate"""
-    plate = db.query(ExtractionPlate).filter(ExtractionPlate.id == plate_id).first()
-    if not plate:
-        raise HTTPException(status_code=404, detail="Extraction plate not found")
-    
-    if plate.status != PlateStatus.DRAFT:
-        raise HTTPException(
-            status_code=400, 
-            detail="Can only edit plates in draft status"
-        )
+    # Locked until commit: a second edit of the same plate waits, other plates proceed
+    plate = lock_draft_plate(db, plate_id)
     
     # Check if user has permission
     if current_user.role not in ['super_admin', 'lab_manager', 'director']:
@@ -126,20 +130,8 @@ def add_samples_to_plate(
             detail="Only supervisors can edit plates"
         )
     
-    # Validate samples exist and are available
-    samples = db.query(Sample).filter(
-        Sample.id.in_(sample_ids),
-        Sample.status == SampleStatus.EXTRACTION_QUEUE,
-        Sample.extraction_plate_ref_id.is_(None)
-    ).all()
-    
-    if len(samples) != len(sample_ids):
-        raise HTTPException(
-            status_code=400,
-            detail="Some samples are not available for assignment"
-        )
-    
     # If positions provided, validate they're available
+    occupied = occupied_wells(db, plate_id)
     if positions:
         if len(positions) != len(sample_ids):
             raise HTTPException(
@@ -147,33 +139,31 @@ def add_samples_to_plate(
                 detail="Number of positions must match number of samples"
             )
         
-        # Check positions are available
-        occupied = db.query(Sample).filter(
-            Sample.extraction_plate_ref_id == plate_id,
-            Sample.extraction_well_position.in_(positions)
-        ).count()
-        
-        control_occupied = db.query(ControlSample).filter(
-            ControlSample.plate_id == plate_id,
-            ControlSample.well_position.in_(positions)
-        ).count()
-        
-        if occupied > 0 or control_occupied > 0:
+        if occupied & set(positions) or len(set(positions)) != len(positions):
             raise HTTPException(
                 status_code=400,
                 detail="Some positions are already occupied"
             )
     
+    # Claim the samples from the extraction queue; ones another supervisor is placing are unavailable
+    samples = claim_samples(db, plate, sample_ids)
+    
+    if len(samples) != len(set(sample_ids)):
+        raise HTTPException(
+            status_code=400,
+            detail="Some samples are not available for assignment"
+        )
+    
     # Assign samples
-    for i, sample in enumerate(samples):
+    positions_by_sample = dict(zip(sample_ids, positions)) if positions else {}
+    wells = free_wells(occupied)
+    for sample in samples:
         if positions:
-            well_position = positions[i]
+            well_position = positions_by_sample[sample.id]
         else:
             # Auto-assign to next available position
-            well_position = find_next_available_position(plate_id, db)
+            well_position = next_free_well(wells)
         
-        sample.extraction_plate_ref_id = plate_id
-        sample.extraction_plate_id = plate.plate_id
         sample.extraction_well_position = well_position
         
         # Create well assignment record
@@ -186,7 +176,7 @@ def add_samples_to_plate(
         )
         db.add(well_assignment)
     
-    db.commit()
+    commit_plate(db)
     return {"message": f"Added {len(samples)} samples to plate"}
 
 @router.delete("/{plate_id}/samples/{sample_id}")
@@ -197,15 +187,7 @@ def remove_sample_from_plate(
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Remove a sample from a draft plate"""
-    plate = db.query(ExtractionPlate).filter(ExtractionPlate.id == plate_id).first()
-    if not plate:
-        raise HTTPException(status_code=404, detail="Extraction plate not found")
-    
-    if plate.status != PlateStatus.DRAFT:
-        raise HTTPException(
-            status_code=400, 
-            detail="Can only edit plates in draft status"
-        )
+    plate = lock_draft_plate(db, plate_id)
     
     if current_user.role not in ['super_admin', 'lab_manager', 'director']:
         raise HTTPException(
@@ -244,15 +226,7 @@ def add_control_set(
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Add a set of controls to a draft plate"""
-    plate = db.query(ExtractionPlate).filter(ExtractionPlate.id == plate_id).first()
-    if not plate:
-        raise HTTPException(status_code=404, detail="Extraction plate not found")
-    
-    if plate.status != PlateStatus.DRAFT:
-        raise HTTPException(
-            status_code=400, 
-            detail="Can only edit plates in draft status"
-        )
+    plate = lock_draft_plate(db, plate_id)
     
     if current_user.role not in ['super_admin', 'lab_manager', 'director']:
         raise HTTPException(
@@ -261,17 +235,7 @@ def add_control_set(
         )
     
     # Validate positions are available
-    occupied_by_samples = db.query(Sample).filter(
-        Sample.extraction_plate_ref_id == plate_id,
-        Sample.extraction_well_position.in_(request.positions)
-    ).count()
-    
-    occupied_by_controls = db.query(ControlSample).filter(
-        ControlSample.plate_id == plate_id,
-        ControlSample.well_position.in_(request.positions)
-    ).count()
-    
-    if occupied_by_samples > 0 or occupied_by_controls > 0:
+    if occupied_wells(db, plate_id) & set(request.positions) or len(set(request.positions)) != len(request.positions):
         raise HTTPException(
             status_code=400,
             detail="Some positions are already occupied"
@@ -313,8 +277,19 @@ def add_control_set(
         
         db.add(control)
         controls.append(control)
+        
+        # Controls take their well in plate_well_assignments too, so its unique constraint covers them
+        db.add(PlateWellAssignment(
+            plate_id=plate_id,
+            sample_id=None,
+            well_position=position,
+            well_row=position[0],
+            well_column=int(position[1:]),
+            is_control=True,
+            control_type=CONTROL_WELL_TYPES.get((request.control_category, control_type))
+        ))
     
-    db.commit()
+    commit_plate(db)
     
     # Refresh to get IDs
     for control in controls:
@@ -330,15 +305,7 @@ def remove_control(
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Remove a control from a draft plate"""
-    plate = db.query(ExtractionPlate).filter(ExtractionPlate.id == plate_id).first()
-    if not plate:
-        raise HTTPException(status_code=404, detail="Extraction plate not found")
-    
-    if plate.status != PlateStatus.DRAFT:
-        raise HTTPException(
-            status_code=400, 
-            detail="Can only edit plates in draft status"
-        )
+    plate = lock_draft_plate(db, plate_id)
     
     if current_user.role not in ['super_admin', 'lab_manager', 'director']:
         raise HTTPException(
@@ -355,6 +322,11 @@ def remove_control(
     if not control:
         raise HTTPException(status_code=404, detail="Control not found on this plate")
     
+    db.query(PlateWellAssignment).filter(
+        PlateWellAssignment.plate_id == plate_id,
+        PlateWellAssignment.well_position == control.well_position,
+        PlateWellAssignment.is_control == True
+    ).delete()
     db.delete(control)
     db.commit()
     return {"message": "Control removed from plate"}
@@ -411,27 +383,3 @@ def finalize_plate(
     
     db.commit()
     return {"message": "Plate finalized and assigned to technician"}
-
-def find_next_available_position(plate_id: int, db: Session) -> str:
-    """Find the next available well position (fills vertically by column)"""
-    # Get all occupied positions
-    sample_positions = db.query(Sample.extraction_well_position).filter(
-        Sample.extraction_plate_ref_id == plate_id,
-        Sample.extraction_well_position.is_not(None)
-    ).all()
-    
-    control_positions = db.query(ControlSample.well_position).filter(
-        ControlSample.plate_id == plate_id
-    ).all()
-    
-    occupied = {pos[0] for pos in sample_positions} | {pos[0] for pos in control_positions}
-    
-    # Find first available position (fill vertically by column)
-    for col in range(1, 13):  # 1-12
-        for row_idx in range(8):  # A-H
-            row = chr(65 + row_idx)
-            position = f"{row}{col}"
-            if position not in occupied:
-                return position
-    
-    raise HTTPException(status_code=400, detail="No available positions on plate")
\ No newline at end of file
@@ -1,10 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import datetime
 import logging
+import zlib
 
 from app.api import deps
+from app.core.export import ExportFormat, export_response
+from app.core.responses import model_response
+from app.core.versioning import conditional_get
+from app.db.search import apply_search, search_backend
 from app.models.product import Product, QuotationStatus, ProductStatus, Requestor, Storage, ProductLog
 from app.schemas.product import ProductCreate, ProductUpdate, Product as ProductSchema, ProductList, ProductLog as ProductLogSchema
 from app.models.user import User
@@ -14,29 +21,18 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ProductList])
-def get_products(
-    db: Session = Depends(deps.get_db),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    search: Optional[str] = Query(None),
-    requestor: Optional[str] = Query(None),  # Changed from Requestor enum to str
-    status: Optional[str] = Query(None),  # Changed from ProductStatus enum to str
-    vendor: Optional[str] = Query(None),
-    current_user: User = Depends(deps.get_current_user),
+def filter_products(
+    query,
+    search: Optional[str] = None,
+    requestor: Optional[str] = None,
+    status: Optional[str] = None,
+    vendor: Optional[str] = None,
+    backend: Optional[str] = None,
 ):
-    """
-    Retrieve products with optional filtering.
-    """
-    query = db.query(Product).options(joinedload(Product.created_by))
-    
+    """Filters shared by the product list and the product export"""
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            Product.name.ilike(search_term) |
-            Product.catalog_number.ilike(search_term) |
-            Product.vendor.ilike(search_term)
-        )
+        # Ranked match on name, catalog number and vendor (best matches first)
+        query = apply_search(query, Product, search, backend)
     
     if requestor:
         query = query.filter(Product.requestor == requestor)
@@ -47,7 +43,28 @@ def get_products(
     if vendor:
         query = query.filter(Product.vendor.ilike(f"%{vendor}%"))
     
-    products = query.order_by(Product.order_date.desc().nullslast()).offset(skip).limit(limit).all()
+    return query
+
+@router.get("/", response_model=List[ProductList])
+async def get_products(
+    db: AsyncSession = Depends(deps.get_async_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    search: Optional[str] = Query(None),
+    requestor: Optional[str] = Query(None),  # Changed from Requestor enum to str
+    status: Optional[str] = Query(None),  # Changed from ProductStatus enum to str
+    vendor: Optional[str] = Query(None),
+    current_user: User = Depends(deps.get_current_user_async),
+):
+    """
+    Retrieve products with optional filtering.
+    """
+    backend = await search_backend(db, Product) if search else None
+    query = select(Product).options(joinedload(Product.created_by))
+    query = filter_products(query, search, requestor, status, vendor, backend)
+    
+    query = query.order_by(Product.order_date.desc().nullslast()).offset(skip).limit(limit)
+    products = (await db.execute(query)).scalars().all()
     
     # Convert products to dict format for response
     result = []
@@ -77,7 +94,76 @@ def get_products(
         }
         result.append(product_dict)
     
-    return result
+    return model_response(result, List[ProductList])
+
+@router.get("/export")
+def export_products(
+    db: Session = Depends(deps.get_db),
+    format: ExportFormat = Query(ExportFormat.CSV),
+    search: Optional[str] = Query(None),
+    requestor: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    vendor: Optional[str] = Query(None),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Export products as CSV or XLSX (same filters as the product list).
+    """
+    query = db.query(
+        Product.name.label("name"),
+        Product.catalog_number.label("catalog_number"),
+        Product.vendor.label("vendor"),
+        Product.quantity.label("quantity"),
+        Product.order_date.label("order_date"),
+        Product.requestor.label("requestor"),
+        Product.quotation_status.label("quotation_status"),
+        Product.total_value.label("total_value"),
+        Product.status.label("status"),
+        Product.requisition_id.label("requisition_id"),
+        Product.chartfield.label("chartfield"),
+        Product.storage.label("storage"),
+        Product.notes.label("notes"),
+        User.full_name.label("created_by"),
+        Product.created_at.label("created_at"),
+    ).select_from(Product).outerjoin(User, User.id == Product.created_by_id)
+    query = filter_products(query, search, requestor, status, vendor)
+    
+    query = query.order_by(Product.order_date.desc().nullslast())
+    return export_response(query, format, "products")
+
+@router.get("/logs/export")
+def export_product_logs(
+    db: Session = Depends(deps.get_db),
+    format: ExportFormat = Query(ExportFormat.CSV),
+    product_id: Optional[int] = Query(None),
+    log_type: Optional[str] = Query(None),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Export the product activity log as CSV or XLSX.
+    """
+    query = db.query(
+        ProductLog.product_id.label("product_id"),
+        Product.name.label("product"),
+        ProductLog.log_type.label("log_type"),
+        ProductLog.comment.label("comment"),
+        ProductLog.old_value.label("old_value"),
+        ProductLog.new_value.label("new_value"),
+        User.full_name.label("created_by"),
+        ProductLog.created_at.label("created_at"),
+    ).select_from(ProductLog).outerjoin(
+        Product, Product.id == ProductLog.product_id
+    ).outerjoin(
+        User, User.id == ProductLog.created_by_id
+    )
+    
+    if product_id:
+        query = query.filter(ProductLog.product_id == product_id)
+    if log_type:
+        query = query.filter(ProductLog.log_type == log_type)
+    
+    query = query.order_by(ProductLog.created_at.desc())
+    return export_response(query, format, "product_logs")
 
 @router.post("/", response_model=ProductSchema)
 def create_product(
@@ -350,28 +436,34 @@ def delete_product(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete product: {str(e)}")
 
-@router.get("/enums/requestors")
+# The option lists only change with a deploy, so their ETag is derived from the values
+PRODUCT_ENUMS_VERSION = format(zlib.crc32(repr([
+    [member.value for member in enum] for enum in (Requestor, ProductStatus, QuotationStatus, Storage)
+]).encode()), "08x")
+enums_etag = conditional_get("product_enums", version=PRODUCT_ENUMS_VERSION, max_age=3600, authenticated=False)
+
+@router.get("/enums/requestors", dependencies=[Depends(enums_etag)])
 def get_requestors():
     """
     Get all available requestor options.
     """
     return [{"value": req.value, "label": req.value} for req in Requestor]
 
-@router.get("/enums/statuses")
+@router.get("/enums/statuses", dependencies=[Depends(enums_etag)])
 def get_statuses():
     """
     Get all available status options.
     """
     return [{"value": status.value, "label": status.value} for status in ProductStatus]
 
-@router.get("/enums/quotation-statuses")
+@router.get("/enums/quotation-statuses", dependencies=[Depends(enums_etag)])
 def get_quotation_statuses():
     """
     Get all available quotation status options.
     """
     return [{"value": status.value, "label": status.value} for status in QuotationStatus]
 
-@router.get("/enums/storage")
+@router.get("/enums/storage", dependencies=[Depends(enums_etag)])
 def get_storage_options():
     """
     Get all available storage options.
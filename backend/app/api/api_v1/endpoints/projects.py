@@ -1,24 +1,32 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload, noload
 from datetime import datetime, timedelta
-import holidays
+from functools import lru_cache
 import os
 import uuid
 import json
 from pathlib import Path
 
 from app.api import deps
-from app.models import User, Project, Client, ProjectLog, Employee, ProjectAttachment, ClientProjectConfig
+from app.core.export import ExportFormat, export_response
+from app.core.responses import model_response
+from app.core.versioning import CLIENT_PROJECT_CONFIGS, bump_version
+from app.models import User, Project, Client, ProjectLog, Employee, ProjectAttachment, ClientProjectConfig, Sample, SampleStatus
 from app.models.project import ProjectStatus
-from app.schemas.project import Project as ProjectSchema, ProjectCreate, ProjectUpdate, ProjectLog as ProjectLogSchema
+from app.schemas.project import Project as ProjectSchema, ProjectListItem, ProjectCreate, ProjectUpdate, ProjectLog as ProjectLogSchema
 from app.schemas.attachment import ProjectAttachment as AttachmentSchema
 
 router = APIRouter()
 
-# US holidays for due date calculation
-us_holidays = holidays.US()
+@lru_cache(maxsize=1)
+def get_us_holidays():
+    """US holidays for due date calculation (loaded on first use, it is a slow import)"""
+    import holidays
+    return holidays.US()
 
 # Upload directory
 UPLOAD_DIR = Path("uploads/projects")
@@ -26,6 +34,7 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 def calculate_due_date(start_date: datetime, tat: str) -> datetime:
     """Calculate due date based on TAT, excluding weekends and holidays"""
+    us_holidays = get_us_holidays()
     # Parse TAT to get number of days
     tat_map = {
         "DAYS_5_7": 7,
@@ -85,18 +94,21 @@ def get_next_project_id(
     next_id = f"CMBP{new_number:05d}"
     return {"next_id": next_id}
 
-@router.get("/", response_model=List[ProjectSchema])
-def read_projects(
-    db: Session = Depends(deps.get_db),
+@router.get("/", response_model=List[ProjectListItem])
+async def read_projects(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
     include_deleted: bool = False,
-    current_user: User = Depends(deps.get_current_user),
+    include_attachments: bool = True,
+    include_sample_counts: bool = True,
+    current_user: User = Depends(deps.get_current_user_async),
 ) -> Any:
-    """Retrieve projects"""
-    query = db.query(Project).options(
+    """Retrieve projects with their sample counts by status"""
+    query = select(Project).options(
         joinedload(Project.client),
-        joinedload(Project.sales_rep)
+        joinedload(Project.sales_rep),
+        selectinload(Project.attachments) if include_attachments else noload(Project.attachments)
     )
     
     # Filter out deleted projects by default
@@ -106,8 +118,91 @@ def read_projects(
     # Sort by created_at descending (newest first)
     query = query.order_by(Project.created_at.desc())
     
-    projects = query.offset(skip).limit(limit).all()
-    return projects
+    projects = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    
+    if include_sample_counts and projects:
+        # One GROUP BY for the whole page, answered from ix_samples_project_status
+        counts = {}
+        rows = await db.execute(
+            select(Sample.project_id, Sample.status, func.count())
+            .where(Sample.project_id.in_([project.id for project in projects]))
+            .group_by(Sample.project_id, Sample.status)
+        )
+        for project_id, status, count in rows:
+            counts.setdefault(project_id, {})[status] = count
+        for project in projects:
+            project.sample_counts = counts.get(project.id, {})
+            project.sample_total = sum(
+                count for status, count in project.sample_counts.items()
+                if status != SampleStatus.DELETED.value
+            )
+    
+    return model_response(projects, List[ProjectListItem])
+
+@router.get("/export")
+def export_projects(
+    db: Session = Depends(deps.get_db),
+    format: ExportFormat = Query(ExportFormat.CSV),
+    include_deleted: bool = False,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Export projects as CSV or XLSX (same filters as the project list)"""
+    query = db.query(
+        Project.project_id.label("project_id"),
+        Project.name.label("name"),
+        Project.project_type.label("project_type"),
+        Project.status.label("status"),
+        Client.name.label("client"),
+        Client.institution.label("institution"),
+        Project.tat.label("tat"),
+        Project.expected_sample_count.label("expected_sample_count"),
+        Project.processing_sample_count.label("processing_sample_count"),
+        Project.project_value.label("project_value"),
+        Employee.name.label("sales_rep"),
+        Project.start_date.label("start_date"),
+        Project.due_date.label("due_date"),
+        Project.completed_date.label("completed_date"),
+        Project.created_at.label("created_at"),
+    ).select_from(Project).outerjoin(
+        Client, Client.id == Project.client_id
+    ).outerjoin(
+        Employee, Employee.id == Project.sales_rep_id
+    )
+    
+    if not include_deleted:
+        query = query.filter(Project.status != ProjectStatus.DELETED)
+    
+    query = query.order_by(Project.created_at.desc())
+    return export_response(query, format, "projects")
+
+@router.get("/logs/export")
+def export_project_logs(
+    db: Session = Depends(deps.get_db),
+    format: ExportFormat = Query(ExportFormat.CSV),
+    project_id: Optional[int] = Query(None),
+    log_type: Optional[str] = Query(None),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Export the project activity log as CSV or XLSX"""
+    query = db.query(
+        Project.project_id.label("project_id"),
+        ProjectLog.log_type.label("log_type"),
+        ProjectLog.comment.label("comment"),
+        User.full_name.label("created_by"),
+        ProjectLog.created_at.label("created_at"),
+    ).select_from(ProjectLog).join(
+        Project, Project.id == ProjectLog.project_id
+    ).outerjoin(
+        User, User.id == ProjectLog.created_by_id
+    )
+    
+    if project_id:
+        query = query.filter(ProjectLog.project_id == project_id)
+    if log_type:
+        query = query.filter(ProjectLog.log_type == log_type)
+    
+    query = query.order_by(ProjectLog.created_at.desc())
+    return export_response(query, format, "project_logs")
 
 @router.post("/", response_model=ProjectSchema)
 def create_project(
@@ -198,6 +293,7 @@ def create_project(
                 # Update last_batch_number if this one is higher
                 if used_batch > config.last_batch_number:
                     config.last_batch_number = used_batch
+                    bump_version(db, CLIENT_PROJECT_CONFIGS)
                     db.commit()
             except ValueError:
                 pass
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.versioning import SAMPLE_TYPES, bump_version, conditional_get
 from app.models.sample_type import SampleType as SampleTypeModel
 from app.schemas.sample_type import SampleType as SampleTypeSchema, SampleTypeCreate, SampleTypeUpdate
 from app.models.user import User
@@ -11,6 +12,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[SampleTypeSchema])
 def get_sample_types(
+    _: None = Depends(conditional_get(SAMPLE_TYPES, authenticated=False)),
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
@@ -54,6 +56,7 @@ def create_sample_type(
     
     sample_type = SampleTypeModel(**sample_type_in.dict())
     db.add(sample_type)
+    bump_version(db, SAMPLE_TYPES)
     db.commit()
     db.refresh(sample_type)
     return sample_type
@@ -78,6 +81,7 @@ def update_sample_type(
     for field, value in update_data.items():
         setattr(sample_type, field, value)
     
+    bump_version(db, SAMPLE_TYPES)
     db.commit()
     db.refresh(sample_type)
     return sample_type
\ No newline at end of file
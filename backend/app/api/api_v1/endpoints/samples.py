@@ -1,24 +1,32 @@
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, and_, select, update, insert, cast, String
 import random
 from datetime import datetime
 import os
 import uuid
 import shutil
-import pandas as pd
-import openpyxl
-from openpyxl.styles import PatternFill, Font
-from openpyxl.comments import Comment
 from io import BytesIO
 
 from app.api import deps
+from app.core.archive import archived_sample_logs, barcode_taken, existing_client_sample, load_archived_sample
+from app.core.events import publish
+from app.core.export import ExportFormat, export_response
+from app.core.jobs import JobContext, enqueue, job_accepted, job_handler
+from app.core.responses import model_response
+from app.core.storage import (
+    StorageConflict, StorageFull, capacity, create_box, find_free_slots, load_locations,
+    mark_occupied, occupied_positions, position_name, release, reserve_slots, sync_locations
+)
+from app.db.lineage import lineage_query
 from app.models import (
-    User, Sample, SampleStatus, SampleType, Project, StorageLocation,
+    User, Sample, SampleStatus, SampleType, Project, Client, StorageLocation, StorageBox,
     ExtractionResult, LibraryPrepResult, SequencingRunSample, SequencingRun,
-    SampleLog
+    SampleLog, ArchivedSample
 )
 from app.models.user import User as UserModel
 from app.models.sample_type import SampleType as SampleTypeModel
@@ -33,8 +41,17 @@ from app.schemas.sample import (
     SampleAccession,
     SampleFailure,
     SampleWithLabData,
+    LineageBatch,
+    LineageNode,
+    LineageRequest,
+    LineageTree,
     StorageLocation as StorageLocationSchema,
     StorageLocationCreate,
+    StorageBox as StorageBoxSchema,
+    StorageBoxCreate,
+    StorageSlot,
+    StorageReserveRequest,
+    StorageReleaseRequest,
     SampleLog as SampleLogSchema,
     SampleLogCreate,
     DiscrepancyApprovalCreate,
@@ -46,15 +63,21 @@ router = APIRouter()
 
 def generate_barcode(db: Session) -> str:
     """Generate unique sequential 7-digit barcode"""
-    # Find the highest existing barcode number
+    # Find the highest existing barcode number, archived samples included
     # Exclude barcodes with reprocessing suffixes (e.g., 1234567-R1)
-    latest_sample = db.query(Sample).filter(
-        ~Sample.barcode.contains('-')  # Exclude reprocessed samples
-    ).order_by(Sample.barcode.desc()).first()
+    latest_barcode = max(
+        filter(None, (
+            db.query(model.barcode).filter(
+                ~model.barcode.contains('-')  # Exclude reprocessed samples
+            ).order_by(model.barcode.desc()).limit(1).scalar()
+            for model in (Sample, ArchivedSample)
+        )),
+        default=None
+    )
     
-    if latest_sample and latest_sample.barcode.isdigit():
+    if latest_barcode and latest_barcode.isdigit():
         # Get the next sequential number
-        next_number = int(latest_sample.barcode) + 1
+        next_number = int(latest_barcode) + 1
     else:
         # Start from 1000000 (7 digits)
         next_number = 1000000
@@ -62,8 +85,7 @@ def generate_barcode(db: Session) -> str:
     # Ensure it's 7 digits and not already taken
     while True:
         barcode = str(next_number).zfill(7)
-        existing = db.query(Sample).filter(Sample.barcode == barcode).first()
-        if not existing:
+        if not barcode_taken(db, barcode):
             return barcode
         next_number += 1
 
@@ -88,27 +110,23 @@ def create_sample_log(
     db.add(log)
     return log
 
-@router.get("/", response_model=List[SampleWithLabData])
-def read_samples(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    project_id: Optional[int] = Query(None),
-    status: Optional[SampleStatus] = Query(None),
-    sample_type: Optional[str] = Query(None),
-    include_deleted: bool = Query(False, description="Include deleted samples"),
-    current_user: User = Depends(deps.get_current_user),
-) -> Any:
-    """Retrieve samples with lab data"""
-    query = db.query(Sample).options(
-        joinedload(Sample.project).joinedload(Project.client),
-        joinedload(Sample.storage_location),
-        joinedload(Sample.sample_type_ref),
-        joinedload(Sample.extraction_results),
-        joinedload(Sample.library_prep_results),
-        joinedload(Sample.sequencing_run_samples).joinedload(SequencingRunSample.sequencing_run)
-    )
-    
+def create_sample_logs_bulk(db: Session, logs: List[dict]) -> None:
+    """Create many log entries with a single multi-row INSERT
+
+    Each dict takes the same fields as create_sample_log (sample_id, comment,
+    log_type, old_value, new_value, created_by_id).
+    """
+    if logs:
+        db.execute(insert(SampleLog), logs)
+
+def filter_samples(
+    query,
+    project_id: Optional[int] = None,
+    status: Optional[SampleStatus] = None,
+    sample_type: Optional[str] = None,
+    include_deleted: bool = False,
+):
+    """Filters shared by the sample list and the sample export"""
     # Filter out deleted samples by default
     if not include_deleted:
         query = query.filter(Sample.status != SampleStatus.DELETED)
@@ -118,20 +136,43 @@ def read_samples(
     if status:
         query = query.filter(Sample.status == status)
     if sample_type:
-        # Import SampleType model
-        from app.models.sample_type import SampleType as SampleTypeModel
         # Filter by sample_type name from the relationship
         query = query.join(Sample.sample_type_ref).filter(
             SampleTypeModel.name == sample_type
         )
-    
-    # Sort by created_at descending (newest first)
-    query = query.order_by(Sample.created_at.desc())
+    return query
+
+# Everything the SampleWithLabData rows read; the async session cannot lazy-load
+SAMPLE_LAB_DATA_OPTIONS = (
+    joinedload(Sample.project).joinedload(Project.client),
+    joinedload(Sample.storage_location),
+    joinedload(Sample.sample_type_ref),
+    joinedload(Sample.extraction_results),
+    joinedload(Sample.library_prep_results),
+    joinedload(Sample.sequencing_run_samples).joinedload(SequencingRunSample.sequencing_run)
+)
+
+@router.get("/", response_model=List[SampleWithLabData])
+async def read_samples(
+    db: AsyncSession = Depends(deps.get_async_db),
+    skip: int = 0,
+    limit: int = 100,
+    project_id: Optional[int] = Query(None),
+    status: Optional[SampleStatus] = Query(None),
+    sample_type: Optional[str] = Query(None),
+    include_deleted: bool = Query(False, description="Include deleted samples"),
+    current_user: User = Depends(deps.get_current_user_async),
+) -> Any:
+    """Retrieve samples with lab data"""
+    query = filter_samples(select(Sample), project_id, status, sample_type, include_deleted)
     
     # Count total before limiting
-    total_count = query.count()
+    total_count = await db.scalar(select(func.count()).select_from(query.subquery()))
+    
+    # Sort by created_at descending (newest first)
+    query = query.options(*SAMPLE_LAB_DATA_OPTIONS).order_by(Sample.created_at.desc())
     
-    samples = query.offset(skip).limit(limit).all()
+    samples = (await db.execute(query.offset(skip).limit(limit))).unique().scalars().all()
     
     print(f"\n=== GET SAMPLES ===")
     print(f"Total samples in query: {total_count}")
@@ -204,7 +245,142 @@ def read_samples(
         
         result.append(SampleWithLabData(**sample_dict))
     
-    return result
+    return model_response(result, List[SampleWithLabData])
+
+@router.get("/export")
+def export_samples(
+    db: Session = Depends(deps.get_db),
+    format: ExportFormat = Query(ExportFormat.CSV),
+    project_id: Optional[int] = Query(None),
+    status: Optional[SampleStatus] = Query(None),
+    sample_type: Optional[str] = Query(None),
+    include_deleted: bool = Query(False, description="Include deleted samples"),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Export samples with lab data as CSV or XLSX (same filters as the sample list)"""
+    # Latest extraction / library prep / sequencing result per sample, computed in one pass each
+    latest_extraction = select(
+        ExtractionResult.sample_id,
+        ExtractionResult.extraction_kit,
+        ExtractionResult.qubit_lot,
+        ExtractionResult.concentration_ng_ul,
+        func.row_number().over(
+            partition_by=ExtractionResult.sample_id, order_by=(ExtractionResult.created_at.desc(), ExtractionResult.id.desc())
+        ).label("rn")
+    ).subquery()
+    latest_prep = select(
+        LibraryPrepResult.sample_id,
+        LibraryPrepResult.prep_kit,
+        LibraryPrepResult.library_concentration_ng_ul,
+        func.row_number().over(
+            partition_by=LibraryPrepResult.sample_id, order_by=(LibraryPrepResult.created_at.desc(), LibraryPrepResult.id.desc())
+        ).label("rn")
+    ).subquery()
+    latest_run = select(
+        SequencingRunSample.sample_id,
+        SequencingRun.run_id,
+        SequencingRun.instrument_id,
+        SequencingRunSample.yield_mb,
+        func.row_number().over(
+            partition_by=SequencingRunSample.sample_id, order_by=(SequencingRun.created_at.desc(), SequencingRunSample.id.desc())
+        ).label("rn")
+    ).join(SequencingRun, SequencingRun.id == SequencingRunSample.sequencing_run_id).subquery()
+    
+    query = db.query(
+        Sample.barcode.label("barcode"),
+        Sample.client_sample_id.label("client_sample_id"),
+        Project.project_id.label("project_code"),
+        Project.name.label("project_name"),
+        Client.institution.label("client_institution"),
+        Project.project_type.label("service_type"),
+        func.coalesce(SampleTypeModel.name, cast(Sample.sample_type, String)).label("sample_type"),
+        Sample.sample_type_other.label("sample_type_other"),
+        Sample.status.label("status"),
+        Sample.target_depth.label("target_depth"),
+        Sample.well_location.label("well_location"),
+        Sample.due_date.label("due_date"),
+        Sample.received_date.label("received_date"),
+        Sample.accessioned_date.label("accessioned_date"),
+        Sample.created_at.label("created_at"),
+        Sample.storage_unit.label("storage_unit"),
+        Sample.storage_shelf.label("storage_shelf"),
+        Sample.storage_box.label("storage_box"),
+        Sample.storage_position.label("storage_position"),
+        Sample.has_discrepancy.label("has_discrepancy"),
+        Sample.discrepancy_resolved.label("discrepancy_resolved"),
+        Sample.extraction_well_position.label("extraction_well_position"),
+        Sample.extraction_completed_date.label("extraction_completed_date"),
+        Sample.extraction_method.label("extraction_method"),
+        Sample.extraction_concentration.label("extraction_concentration"),
+        Sample.extraction_260_280.label("extraction_260_280"),
+        Sample.extraction_260_230.label("extraction_260_230"),
+        Sample.extraction_qc_pass.label("extraction_qc_pass"),
+        latest_extraction.c.extraction_kit.label("extraction_kit"),
+        latest_extraction.c.qubit_lot.label("extraction_lot"),
+        latest_extraction.c.concentration_ng_ul.label("dna_concentration_ng_ul"),
+        latest_prep.c.prep_kit.label("library_prep_kit"),
+        latest_prep.c.library_concentration_ng_ul.label("library_concentration_ng_ul"),
+        latest_run.c.run_id.label("sequencing_run_id"),
+        latest_run.c.instrument_id.label("sequencing_instrument"),
+        latest_run.c.yield_mb.label("achieved_depth"),
+    ).select_from(Sample).outerjoin(
+        Project, Project.id == Sample.project_id
+    ).outerjoin(
+        Client, Client.id == Project.client_id
+    ).outerjoin(
+        latest_extraction, and_(latest_extraction.c.sample_id == Sample.id, latest_extraction.c.rn == 1)
+    ).outerjoin(
+        latest_prep, and_(latest_prep.c.sample_id == Sample.id, latest_prep.c.rn == 1)
+    ).outerjoin(
+        latest_run, and_(latest_run.c.sample_id == Sample.id, latest_run.c.rn == 1)
+    )
+    
+    if sample_type:
+        # filter_samples joins the sample type itself
+        query = filter_samples(query, project_id, status, sample_type, include_deleted)
+    else:
+        query = query.outerjoin(SampleTypeModel, SampleTypeModel.id == Sample.sample_type_id)
+        query = filter_samples(query, project_id, status, None, include_deleted)
+    
+    query = query.order_by(Sample.created_at.desc())
+    return export_response(query, format, "samples")
+
+@router.get("/logs/export")
+def export_sample_logs(
+    db: Session = Depends(deps.get_db),
+    format: ExportFormat = Query(ExportFormat.CSV),
+    project_id: Optional[int] = Query(None),
+    sample_id: Optional[int] = Query(None),
+    log_type: Optional[str] = Query(None),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Export the sample activity log as CSV or XLSX"""
+    query = db.query(
+        Sample.barcode.label("barcode"),
+        Project.project_id.label("project_code"),
+        SampleLog.log_type.label("log_type"),
+        SampleLog.comment.label("comment"),
+        SampleLog.old_value.label("old_value"),
+        SampleLog.new_value.label("new_value"),
+        UserModel.full_name.label("created_by"),
+        SampleLog.created_at.label("created_at"),
+    ).select_from(SampleLog).join(
+        Sample, Sample.id == SampleLog.sample_id
+    ).outerjoin(
+        Project, Project.id == Sample.project_id
+    ).outerjoin(
+        UserModel, UserModel.id == SampleLog.created_by_id
+    )
+    
+    if project_id:
+        query = query.filter(Sample.project_id == project_id)
+    if sample_id:
+        query = query.filter(SampleLog.sample_id == sample_id)
+    if log_type:
+        query = query.filter(SampleLog.log_type == log_type)
+    
+    query = query.order_by(SampleLog.created_at.desc())
+    return export_response(query, format, "sample_logs")
 
 @router.get("/{sample_id}", response_model=SampleWithLabData)
 def read_sample(
@@ -222,6 +398,9 @@ def read_sample(
         joinedload(Sample.sequencing_run_samples).joinedload(SequencingRunSample.sequencing_run)
     ).filter(Sample.id == sample_id).first()
     
+    if not sample:
+        # Finished samples past the retention window live in the archive (app.core.archive)
+        sample = load_archived_sample(db, sample_id)
     if not sample:
         raise HTTPException(status_code=404, detail="Sample not found")
     
@@ -292,6 +471,45 @@ def read_sample(
     
     return SampleWithLabData(**sample_dict)
 
+MAX_LINEAGE_BATCH = 1000
+
+def build_lineage(db: Session, sample_ids: List[int]) -> LineageBatch:
+    """Lineage trees of the given samples, fetched with one recursive query"""
+    trees = {}
+    roots = {}
+    wanted = set(sample_ids)
+    for row in db.execute(lineage_query(wanted)).mappings():
+        tree = trees.setdefault(row["root_id"], LineageTree(root_id=row["root_id"], nodes=[]))
+        tree.nodes.append(LineageNode.model_validate(dict(row)))
+        if row["id"] in wanted:
+            roots[row["id"]] = row["root_id"]
+    return LineageBatch(roots=roots, trees=list(trees.values()))
+
+@router.get("/{sample_id}/lineage", response_model=LineageTree)
+def read_sample_lineage(
+    sample_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """The sample's whole reprocessing tree (root, ancestors and descendants) with latest lab results"""
+    lineage = build_lineage(db, [sample_id])
+    if sample_id not in lineage.roots:
+        raise HTTPException(status_code=404, detail="Sample not found")
+    return lineage.trees[0]
+
+@router.post("/lineage", response_model=LineageBatch)
+def read_lineages(
+    request: LineageRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Lineage trees of many samples at once (plate and run views); unknown IDs are left out"""
+    if len(request.sample_ids) > MAX_LINEAGE_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LINEAGE_BATCH} samples per request")
+    if not request.sample_ids:
+        return LineageBatch(roots={}, trees=[])
+    return build_lineage(db, request.sample_ids)
+
 @router.post("/", response_model=SampleSchema)
 def create_sample(
     *,
@@ -420,6 +638,7 @@ def create_samples_bulk(
         samples.append(sample)
     
     db.add_all(samples)
+    sync_locations(db, (sample.storage_location_id for sample in samples))
     db.commit()
     
     for sample in samples:
@@ -442,19 +661,41 @@ def import_samples_bulk(
     *,
     db: Session = Depends(deps.get_db),
     import_data: SampleBulkImport,
+    run_as_job: bool = Query(False, alias="async", description="Queue the import as a background job and return its id"),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Import multiple samples from CSV/Excel files"""
-    from app.models.sample_type import SampleType as SampleTypeModel
     from app.api.permissions import check_permission
     
-    print(f"\n=== BULK IMPORT ENDPOINT ===")
-    print(f"Total samples received: {len(import_data.samples)}")
-    print(f"User: {current_user.email}")
-    
     # Check permission
     check_permission(current_user, "registerSamples")
     
+    if run_as_job:
+        job = enqueue(db, "samples.bulk_import", import_data.model_dump(mode="json"), user=current_user)
+        db.commit()
+        return job_accepted(job)
+    
+    result = import_samples(db, import_data.samples, current_user)
+    db.commit()
+    return result
+
+@job_handler("samples.bulk_import")
+def run_sample_import_job(ctx: JobContext) -> dict:
+    import_data = SampleBulkImport(**ctx.payload)
+    return import_samples(ctx.db, import_data.samples, ctx.user, progress=ctx.progress)
+
+def import_samples(db: Session, samples: List[SampleImportData], current_user: User, progress=None) -> dict:
+    """Validate and create imported samples (the caller commits)
+
+    Raises a 400 if none of the rows are valid. `progress(done, total)` is
+    called as rows are processed.
+    """
+    from app.models.sample_type import SampleType as SampleTypeModel
+    
+    print(f"\n=== BULK IMPORT ===")
+    print(f"Total samples received: {len(samples)}")
+    print(f"User: {current_user.email}")
+    
     imported_samples = []
     errors = []
     
@@ -472,9 +713,16 @@ def import_samples_bulk(
     else:
         print(f"WARNING: Project CP06214 NOT found in database!")
     
+    # Storage locations of the whole batch in a few queries instead of one per row
+    storage_locations = load_locations(db, {
+        (s.storage_freezer, s.storage_shelf, s.storage_box, s.storage_position)
+        for s in samples if s.storage_freezer and s.storage_shelf and s.storage_box
+    })
+    used_storage = set()
+    
     # Check for duplicates within the import batch
     seen_combinations = {}
-    for i, sample_data in enumerate(import_data.samples):
+    for i, sample_data in enumerate(samples):
         if sample_data.client_sample_id and sample_data.project_id:
             # Get the service type from the project
             project = projects.get(sample_data.project_id)
@@ -494,16 +742,13 @@ def import_samples_bulk(
     
     # Check for duplicates already in the database
     if not errors:  # Only check DB if no duplicates in the batch
-        for i, sample_data in enumerate(import_data.samples):
+        for i, sample_data in enumerate(samples):
             if sample_data.client_sample_id and sample_data.project_id in projects:
                 project = projects[sample_data.project_id]
                 
                 # Check if this combination already exists in the database
-                existing = db.query(Sample).filter(
-                    Sample.project_id == project.id,
-                    Sample.client_sample_id == sample_data.client_sample_id,
-                    Sample.status != SampleStatus.DELETED  # Don't count deleted samples
-                ).first()
+                # Don't count deleted samples; archived ones count
+                existing = existing_client_sample(db, project.id, sample_data.client_sample_id)
                 
                 if existing:
                     service_type = project.project_type.value if project.project_type else "N/A"
@@ -513,7 +758,9 @@ def import_samples_bulk(
                         f"with service type '{service_type}' (Barcode: {existing.barcode})"
                     )
     
-    for i, sample_data in enumerate(import_data.samples):
+    for i, sample_data in enumerate(samples):
+        if progress:
+            progress(i, len(samples))
         try:
             # Validate project
             if sample_data.project_id not in projects:
@@ -546,14 +793,13 @@ def import_samples_bulk(
             # Create or find storage location
             storage_location_id = None
             if sample_data.storage_freezer and sample_data.storage_shelf and sample_data.storage_box:
-                storage_location = db.query(StorageLocation).filter(
-                    and_(
-                        StorageLocation.freezer == sample_data.storage_freezer,
-                        StorageLocation.shelf == sample_data.storage_shelf,
-                        StorageLocation.box == sample_data.storage_box,
-                        StorageLocation.position == sample_data.storage_position
-                    )
-                ).first()
+                storage_key = (
+                    sample_data.storage_freezer,
+                    sample_data.storage_shelf,
+                    sample_data.storage_box,
+                    sample_data.storage_position
+                )
+                storage_location = storage_locations.get(storage_key)
                 
                 if not storage_location:
                     # Create new storage location
@@ -565,6 +811,7 @@ def import_samples_bulk(
                     )
                     db.add(storage_location)
                     db.flush()  # Get the ID
+                    storage_locations[storage_key] = storage_location
                 
                 storage_location_id = storage_location.id
             
@@ -598,10 +845,16 @@ def import_samples_bulk(
             )
             
             imported_samples.append(sample)
+            if storage_location_id:
+                used_storage.add(storage_key)
             
         except Exception as e:
             errors.append(f"Sample {i+1}: {str(e)}")
     
+    # Take the used positions in the registered boxes' occupancy
+    if used_storage:
+        mark_occupied(db, used_storage)
+    
     if errors and len(imported_samples) == 0:
         # Only fail completely if NO samples were valid
         db.rollback()
@@ -610,14 +863,10 @@ def import_samples_bulk(
             detail={"message": "Import failed - no valid samples", "errors": errors}
         )
     
-    # Commit the valid samples
-    if imported_samples:
-        db.commit()
-    
     # Return results including any errors
     result = {
         "imported": len(imported_samples),
-        "message": f"Successfully imported {len(imported_samples)} of {len(import_data.samples)} samples",
+        "message": f"Successfully imported {len(imported_samples)} of {len(samples)} samples",
         "sample_ids": [s.id for s in imported_samples]
     }
     
@@ -626,7 +875,7 @@ def import_samples_bulk(
         result["failed_count"] = len(errors)
     
     print(f"\n=== IMPORT RESULT ===")
-    print(f"Total received: {len(import_data.samples)}")
+    print(f"Total received: {len(samples)}")
     print(f"Successfully imported: {len(imported_samples)}")
     print(f"Failed: {len(errors)}")
     if errors:
@@ -654,11 +903,7 @@ def check_duplicates(
             continue
             
         # Check if this combination already exists
-        existing = db.query(Sample).filter(
-            Sample.project_id == project.id,
-            Sample.client_sample_id == sample['client_sample_id'],
-            Sample.status != SampleStatus.DELETED
-        ).first()
+        existing = existing_client_sample(db, project.id, sample['client_sample_id'])
         
         if existing:
             service_type = project.project_type.value if project.project_type else "N/A"
@@ -672,15 +917,17 @@ def check_duplicates(
     
     return {'duplicates': duplicates}
 
+XLSX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
 @router.post("/validate-import")
 async def validate_import_file(
     *,
     db: Session = Depends(deps.get_db),
     file: UploadFile = File(...),
+    run_as_job: bool = Query(False, alias="async", description="Queue the validation as a background job and return its id"),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Validate an Excel/CSV file and return Excel with errors highlighted"""
-    from app.models.sample_type import SampleType as SampleTypeModel
     from app.api.permissions import check_permission
     
     # Check permission
@@ -689,6 +936,46 @@ async def validate_import_file(
     # Read the uploaded file
     contents = await file.read()
     
+    if run_as_job:
+        def queue_job():
+            job = enqueue(
+                db, "samples.validate_import", {"filename": file.filename}, user=current_user,
+                inputs=[("input", file.filename, file.content_type or XLSX_MEDIA_TYPE, contents)]
+            )
+            db.commit()
+            return job
+        return job_accepted(await run_in_threadpool(queue_job))
+    
+    report = await run_in_threadpool(build_validation_report, db, contents, file.filename)
+    
+    return StreamingResponse(
+        BytesIO(report["content"]),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={
+            'Content-Disposition': f'attachment; filename="{report["filename"]}"',
+            'X-Validation-Errors': str(report["error_rows"]),
+            'X-Total-Rows': str(report["total_rows"])
+        }
+    )
+
+@job_handler("samples.validate_import")
+def run_import_validation_job(ctx: JobContext) -> dict:
+    upload = ctx.input()
+    report = build_validation_report(ctx.db, upload.content, upload.filename)
+    ctx.save_artifact("result", report["filename"], XLSX_MEDIA_TYPE, report["content"])
+    return {"total_rows": report["total_rows"], "error_rows": report["error_rows"]}
+
+def build_validation_report(db: Session, contents: bytes, filename: str) -> dict:
+    """Check an import file and build a copy of it with the errors highlighted
+
+    Returns the workbook bytes, its filename and the row/error counts.
+    """
+    # pandas/openpyxl are only needed here, so they are not loaded at worker startup
+    import pandas as pd
+    from openpyxl.styles import PatternFill
+    from openpyxl.comments import Comment
+    from app.models.sample_type import SampleType as SampleTypeModel
+    
     # Parse Excel file
     try:
         df = pd.read_excel(BytesIO(contents))
@@ -793,22 +1080,16 @@ async def validate_import_file(
         })
         summary_df.to_excel(writer, index=False, sheet_name='Validation Summary')
     
-    # Prepare the file for download
-    output.seek(0)
-    
     # Generate filename
-    original_name = os.path.splitext(file.filename)[0]
+    original_name = os.path.splitext(filename)[0]
     validated_filename = f"{original_name}_validated_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     
-    return StreamingResponse(
-        output,
-        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        headers={
-            'Content-Disposition': f'attachment; filename="{validated_filename}"',
-            'X-Validation-Errors': str(total_errors),
-            'X-Total-Rows': str(len(df))
-        }
-    )
+    return {
+        "content": output.getvalue(),
+        "filename": validated_filename,
+        "error_rows": total_errors,
+        "total_rows": len(df)
+    }
 
 @router.put("/{sample_id}", response_model=SampleSchema)
 def update_sample(
@@ -823,6 +1104,7 @@ def update_sample(
         raise HTTPException(status_code=404, detail="Sample not found")
     
     update_data = sample_in.dict(exclude_unset=True)
+    old_location_id = sample.storage_location_id
     
     # Track changes for logging
     changes = []
@@ -860,6 +1142,9 @@ def update_sample(
                     user_id=current_user.id
                 )
     
+    if sample.storage_location_id != old_location_id:
+        sync_locations(db, [old_location_id, sample.storage_location_id])
+    
     sample.updated_by_id = current_user.id
     sample.updated_at = func.now()
     
@@ -912,23 +1197,40 @@ def accession_samples_bulk(
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Accession multiple samples"""
-    samples = db.query(Sample).filter(Sample.id.in_(sample_ids)).all()
+    # One UPDATE for the whole batch, returning what the events need
+    updated = db.execute(
+        update(Sample)
+        .where(Sample.id.in_(sample_ids))
+        .values(
+            status=SampleStatus.ACCESSIONED.value,
+            accessioned_by_id=current_user.id,
+            accessioned_date=func.now(),
+            received_date=func.now()
+        )
+        .returning(Sample.id, Sample.barcode),
+        execution_options={"synchronize_session": False}
+    ).all()
     
-    if len(samples) != len(sample_ids):
+    if len(updated) != len(sample_ids):
+        db.rollback()
         raise HTTPException(status_code=404, detail="Some samples not found")
     
-    for sample in samples:
-        sample.status = SampleStatus.ACCESSIONED
-        sample.accessioned_by_id = current_user.id
-        sample.accessioned_date = func.now()
-        sample.received_date = func.now()
-    
+    publish(db, [
+        {"type": "sample.status", "id": row.id, "barcode": row.barcode, "old": None, "new": SampleStatus.ACCESSIONED.value}
+        for row in updated
+    ])
+    # The response rows with their storage locations, in two queries rather than one per sample
+    samples = db.scalars(
+        select(Sample)
+        .where(Sample.id.in_(sample_ids))
+        .options(selectinload(Sample.storage_location))
+        .execution_options(populate_existing=True)
+    ).all()
+    # Serialized before the commit expires the rows, which would reload each one
+    response = model_response(samples, List[SampleSchema])
     db.commit()
     
-    for sample in samples:
-        db.refresh(sample)
-    
-    return samples
+    return response
 
 # Storage location endpoints
 @router.get("/storage/locations", response_model=List[StorageLocationSchema])
@@ -974,11 +1276,121 @@ def create_storage_location(
     
     location = StorageLocation(**location_in.dict())
     db.add(location)
+    db.flush()
+    sync_locations(db, [location.id])
     db.commit()
     db.refresh(location)
     
     return location
 
+def box_summary(box: StorageBox) -> StorageBoxSchema:
+    return StorageBoxSchema(
+        id=box.id, freezer=box.freezer, shelf=box.shelf, box=box.box,
+        rows=box.rows, columns=box.columns, capacity=capacity(box),
+        free_count=box.free_count, occupied_positions=occupied_positions(box)
+    )
+
+@router.get("/storage/boxes", response_model=List[StorageBoxSchema])
+def read_storage_boxes(
+    db: Session = Depends(deps.get_db),
+    freezer: Optional[str] = Query(None),
+    shelf: Optional[str] = Query(None),
+    with_free_slots: bool = Query(False, description="Only boxes with at least one free position"),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Registered boxes with their occupancy"""
+    query = select(StorageBox)
+    if freezer:
+        query = query.where(StorageBox.freezer == freezer)
+    if shelf:
+        query = query.where(StorageBox.shelf == shelf)
+    if with_free_slots:
+        query = query.where(StorageBox.free_count > 0)
+    boxes = db.execute(query.order_by(StorageBox.freezer, StorageBox.shelf, StorageBox.box)).scalars().all()
+    return [box_summary(box) for box in boxes]
+
+@router.post("/storage/boxes", response_model=StorageBoxSchema)
+def create_storage_box(
+    *,
+    db: Session = Depends(deps.get_db),
+    box_in: StorageBoxCreate,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Register a box's grid; positions already holding samples start out occupied"""
+    existing = db.query(StorageBox).filter(
+        StorageBox.freezer == box_in.freezer,
+        StorageBox.shelf == box_in.shelf,
+        StorageBox.box == box_in.box
+    ).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Storage box already exists")
+    
+    box = create_box(db, box_in.freezer, box_in.shelf, box_in.box, box_in.rows, box_in.columns)
+    box.created_by_id = current_user.id
+    db.commit()
+    return box_summary(box)
+
+@router.get("/storage/free-slots", response_model=List[StorageSlot])
+def read_free_storage_slots(
+    db: Session = Depends(deps.get_db),
+    count: int = Query(1, ge=1, le=10000),
+    freezer: Optional[str] = Query(None),
+    shelf: Optional[str] = Query(None),
+    contiguous: bool = Query(True, description="Prefer one unbroken run of positions in a single box"),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Next free positions across boxes (a preview; use /storage/reserve to take them)"""
+    try:
+        plan = find_free_slots(db, count, freezer, shelf, contiguous)
+    except StorageFull as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return [
+        StorageSlot(freezer=box.freezer, shelf=box.shelf, box=box.box, position=position_name(box, index))
+        for box, indices in plan for index in indices
+    ]
+
+@router.post("/storage/reserve", response_model=List[StorageLocationSchema])
+def reserve_storage_slots(
+    *,
+    db: Session = Depends(deps.get_db),
+    request: StorageReserveRequest,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Atomically take the next free positions and return their storage locations"""
+    try:
+        locations = reserve_slots(
+            db, request.count, request.freezer, request.shelf,
+            request.contiguous, request.notes, current_user.id
+        )
+    except StorageFull as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    except StorageConflict as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    db.commit()
+    return locations
+
+@router.post("/storage/release")
+def release_storage_slots(
+    *,
+    db: Session = Depends(deps.get_db),
+    request: StorageReleaseRequest,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Give back reserved positions that no sample was stored in"""
+    locations = db.query(StorageLocation).filter(
+        StorageLocation.id.in_(request.location_ids),
+        ~StorageLocation.samples.any()
+    ).all()
+    try:
+        release(db, locations)
+    except StorageConflict as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    db.commit()
+    return {"released": len(locations)}
+
 # Sample Log endpoints
 @router.get("/{sample_id}/logs", response_model=List[SampleLogSchema])
 def read_sample_logs(
@@ -988,15 +1400,17 @@ def read_sample_logs(
 ) -> Any:
     """Get all logs for a sample"""
     sample = db.query(Sample).filter(Sample.id == sample_id).first()
-    if not sample:
+    if sample:
+        logs = db.query(SampleLog).options(
+            joinedload(SampleLog.created_by)
+        ).filter(
+            SampleLog.sample_id == sample_id
+        ).order_by(SampleLog.created_at.desc()).all()
+    elif db.get(ArchivedSample, sample_id):
+        logs = archived_sample_logs(db, sample_id)
+    else:
         raise HTTPException(status_code=404, detail="Sample not found")
     
-    logs = db.query(SampleLog).options(
-        joinedload(SampleLog.created_by)
-    ).filter(
-        SampleLog.sample_id == sample_id
-    ).order_by(SampleLog.created_at.desc()).all()
-    
     # Convert to schema with user info
     result = []
     for log in logs:
@@ -1097,11 +1511,14 @@ def fail_sample(
             "sequencing": "S"
         }
         
-        # Count existing reprocess samples
-        reprocess_count = db.query(Sample).filter(
-            Sample.parent_sample_id == sample.id,
-            Sample.barcode.like(f"{sample.barcode}-{stage_map.get(failure_in.failed_stage, 'R')}%")
-        ).count()
+        # Count existing reprocess samples, archived ones included
+        reprocess_count = sum(
+            db.query(model).filter(
+                model.parent_sample_id == sample.id,
+                model.barcode.like(f"{sample.barcode}-{stage_map.get(failure_in.failed_stage, 'R')}%")
+            ).count()
+            for model in (Sample, ArchivedSample)
+        )
         
         new_barcode = f"{sample.barcode}-{stage_map.get(failure_in.failed_stage, 'R')}{reprocess_count + 2}"
         
@@ -1142,12 +1559,12 @@ def fail_sample(
     return sample
 
 @router.get("/queues/{queue_name}", response_model=List[SampleWithLabData])
-def get_queue_samples(
+async def get_queue_samples(
     queue_name: str,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: User = Depends(deps.get_current_user_async),
 ) -> Any:
     """Get samples in a specific queue"""
     # Map queue names to status filters
@@ -1166,14 +1583,7 @@ def get_queue_samples(
     if queue_name not in queue_map:
         raise HTTPException(status_code=400, detail=f"Invalid queue name: {queue_name}")
     
-    query = db.query(Sample).options(
-        joinedload(Sample.project).joinedload(Project.client),
-        joinedload(Sample.storage_location),
-        joinedload(Sample.sample_type_ref),
-        joinedload(Sample.extraction_results),
-        joinedload(Sample.library_prep_results),
-        joinedload(Sample.sequencing_run_samples).joinedload(SequencingRunSample.sequencing_run)
-    )
+    query = select(Sample).options(*SAMPLE_LAB_DATA_OPTIONS)
     
     if queue_name == "reprocess":
         # Get failed samples that need reprocessing
@@ -1190,7 +1600,7 @@ def get_queue_samples(
     # Order by priority and created date
     query = query.order_by(Sample.queue_priority.desc(), Sample.created_at)
     
-    samples = query.offset(skip).limit(limit).all()
+    samples = (await db.execute(query.offset(skip).limit(limit))).unique().scalars().all()
     
     # Convert to SampleWithLabData (same logic as read_samples)
     result = []
@@ -1252,7 +1662,7 @@ def get_queue_samples(
         
         result.append(SampleWithLabData(**sample_dict))
     
-    return result
+    return model_response(result, List[SampleWithLabData])
 
 @router.delete("/{sample_id}")
 def delete_sample(
@@ -1298,12 +1708,30 @@ def update_samples_bulk(
     *,
     db: Session = Depends(deps.get_db),
     request: dict = Body(...),
+    run_as_job: bool = Query(False, alias="async", description="Queue the update as a background job and return its id"),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Update multiple samples at once"""
     from app.api.permissions import check_permission
     check_permission(current_user, "updateSampleStatus")
     
+    if run_as_job:
+        if not request.get("sample_ids"):
+            raise HTTPException(status_code=400, detail="No sample IDs provided")
+        job = enqueue(db, "samples.bulk_update", request, user=current_user)
+        db.commit()
+        return job_accepted(job)
+    
+    result = bulk_update_samples(db, request, current_user)
+    db.commit()
+    return result
+
+@job_handler("samples.bulk_update")
+def run_sample_bulk_update_job(ctx: JobContext) -> dict:
+    return bulk_update_samples(ctx.db, ctx.payload, ctx.user)
+
+def bulk_update_samples(db: Session, request: dict, current_user: User) -> dict:
+    """Apply the same field values to many samples, with logs and events (the caller commits)"""
     # Extract sample_ids and update data from request
     sample_ids = request.get("sample_ids", [])
     if not sample_ids:
@@ -1314,56 +1742,91 @@ def update_samples_bulk(
     if update_dict is None:
         update_dict = {k: v for k, v in request.items() if k not in ["sample_ids"]}
     
-    samples = db.query(Sample).filter(Sample.id.in_(sample_ids)).all()
-    
-    if len(samples) != len(sample_ids):
+    unknown_fields = [field for field in update_dict if field not in Sample.__table__.columns]
+    if unknown_fields:
         raise HTTPException(
-            status_code=404, 
-            detail=f"Some samples not found. Found {len(samples)} of {len(sample_ids)}"
+            status_code=400,
+            detail=f"Unknown sample fields: {', '.join(unknown_fields)}"
         )
     
     # Ensure status is a string value if it's an enum
     if 'status' in update_dict and hasattr(update_dict['status'], 'value'):
         update_dict['status'] = update_dict['status'].value
     
-    # Update all samples
-    for sample in samples:
-        # Track changes for logging
+    # Read the current values of the updated fields in one query, locking the rows
+    fields = list(update_dict)
+    current_rows = db.execute(
+        select(Sample.id, *[Sample.__table__.c[field] for field in fields])
+        .where(Sample.id.in_(sample_ids))
+        .with_for_update()
+    ).all()
+    
+    if len(current_rows) != len(sample_ids):
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Some samples not found. Found {len(current_rows)} of {len(sample_ids)}"
+        )
+    
+    # Group samples by the set of fields that actually change, and build the log rows
+    groups = {}
+    logs = []
+    events = []
+    for row in current_rows:
+        changed = []
         for field, new_value in update_dict.items():
-            old_value = getattr(sample, field)
+            old_value = getattr(row, field)
             if old_value != new_value:
-                setattr(sample, field, new_value)
+                changed.append(field)
                 
                 # Create appropriate log entry
                 if field == 'status':
-                    create_sample_log(
-                        db=db,
-                        sample_id=sample.id,
-                        comment=f"Status changed from {old_value} to {new_value} (bulk update)",
-                        log_type="status_change",
-                        old_value=str(old_value),
-                        new_value=str(new_value),
-                        user_id=current_user.id
-                    )
+                    logs.append({
+                        "sample_id": row.id,
+                        "comment": f"Status changed from {old_value} to {new_value} (bulk update)",
+                        "log_type": "status_change",
+                        "old_value": str(old_value),
+                        "new_value": str(new_value),
+                        "created_by_id": current_user.id
+                    })
+                    events.append({
+                        "type": "sample.status", "id": row.id,
+                        "old": getattr(old_value, "value", old_value), "new": new_value
+                    })
                 else:
-                    create_sample_log(
-                        db=db,
-                        sample_id=sample.id,
-                        comment=f"{field.replace('_', ' ').title()} updated (bulk)",
-                        log_type="update",
-                        old_value=str(old_value) if old_value is not None else None,
-                        new_value=str(new_value) if new_value is not None else None,
-                        user_id=current_user.id
-                    )
-        
-        sample.updated_by_id = current_user.id
-        sample.updated_at = func.now()
+                    logs.append({
+                        "sample_id": row.id,
+                        "comment": f"{field.replace('_', ' ').title()} updated (bulk)",
+                        "log_type": "update",
+                        "old_value": str(old_value) if old_value is not None else None,
+                        "new_value": str(new_value) if new_value is not None else None,
+                        "created_by_id": current_user.id
+                    })
+                    if field == 'queue_priority':
+                        events.append({
+                            "type": "sample.priority", "id": row.id,
+                            "old": old_value, "new": new_value
+                        })
+        groups.setdefault(tuple(changed), []).append(row.id)
+    
+    # One UPDATE per field group (usually a single group for the whole batch)
+    for changed, ids in groups.items():
+        db.execute(
+            update(Sample)
+            .where(Sample.id.in_(ids))
+            .values(
+                **{field: update_dict[field] for field in changed},
+                updated_by_id=current_user.id,
+                updated_at=func.now()
+            ),
+            execution_options={"synchronize_session": False}
+        )
     
-    db.commit()
+    create_sample_logs_bulk(db, logs)
+    publish(db, events)
     
     return {
-        "message": f"{len(samples)} samples updated successfully",
-        "updated_count": len(samples)
+        "message": f"{len(current_rows)} samples updated successfully",
+        "updated_count": len(current_rows)
     }
 
 @router.post("/bulk-delete")
@@ -1378,9 +1841,13 @@ def delete_samples_bulk(
     from app.api.permissions import check_permission
     check_permission(current_user, "deleteSamples")
     
-    samples = db.query(Sample).filter(
-        Sample.id.in_(sample_ids),
-        Sample.status != SampleStatus.DELETED
+    samples = db.execute(
+        select(Sample.id, Sample.status)
+        .where(
+            Sample.id.in_(sample_ids),
+            Sample.status != SampleStatus.DELETED
+        )
+        .with_for_update()
     ).all()
     
     if len(samples) != len(sample_ids):
@@ -1391,21 +1858,30 @@ def delete_samples_bulk(
                 detail=f"{deleted_count} samples were already deleted or not found"
             )
     
-    # Update all samples to deleted status
-    for sample in samples:
-        old_status = sample.status
-        sample.status = SampleStatus.DELETED
-        
-        # Create deletion log entry for each sample
-        create_sample_log(
-            db=db,
-            sample_id=sample.id,
-            comment=f"Sample deleted (bulk): {deletion_reason}",
-            log_type="deletion",
-            old_value=str(old_status),
-            new_value=str(SampleStatus.DELETED),
-            user_id=current_user.id
-        )
+    # Update all samples to deleted status in one statement
+    db.execute(
+        update(Sample)
+        .where(Sample.id.in_([sample.id for sample in samples]))
+        .values(status=SampleStatus.DELETED.value),
+        execution_options={"synchronize_session": False}
+    )
+    
+    # Create deletion log entry for each sample in one multi-row insert
+    create_sample_logs_bulk(db, [
+        {
+            "sample_id": sample.id,
+            "comment": f"Sample deleted (bulk): {deletion_reason}",
+            "log_type": "deletion",
+            "old_value": str(sample.status),
+            "new_value": str(SampleStatus.DELETED),
+            "created_by_id": current_user.id
+        }
+        for sample in samples
+    ])
+    publish(db, [
+        {"type": "sample.status", "id": sample.id, "old": getattr(sample.status, "value", sample.status), "new": SampleStatus.DELETED.value}
+        for sample in samples
+    ])
     
     db.commit()
     
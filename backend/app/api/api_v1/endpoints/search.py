@@ -0,0 +1,126 @@
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import OperationalError
+from sqlalchemy import text
+import time
+import logging
+
+from app.api import deps
+from app.core.config import settings
+from app.db.search import search_clause
+from app.models import User, Sample, SampleStatus, Project, ProjectStatus, Client, Product, Blocker
+from app.schemas.search import SearchHit, SearchResults
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Entity types in the order they are searched; when the latency budget runs
+# out the types at the end of the list are skipped
+SEARCH_TYPES = {
+    "sample": {
+        "model": Sample,
+        "columns": (Sample.barcode, Sample.client_sample_id, Sample.status),
+        "filter": lambda query: query.filter(Sample.status != SampleStatus.DELETED),
+    },
+    "project": {
+        "model": Project,
+        "columns": (Project.project_id, Project.name, Project.status),
+        "filter": lambda query: query.filter(Project.status != ProjectStatus.DELETED),
+    },
+    "client": {
+        "model": Client,
+        "columns": (Client.name, Client.institution, None),
+        "filter": None,
+    },
+    "product": {
+        "model": Product,
+        "columns": (Product.name, Product.catalog_number, Product.status),
+        "filter": None,
+    },
+    "blocker": {
+        "model": Blocker,
+        "columns": (Blocker.name, Blocker.location, None),
+        "filter": None,
+    },
+}
+
+@router.get("/", response_model=SearchResults)
+def global_search(
+    q: str = Query(..., min_length=1, description="Barcode, sample ID, project ID, client or inventory name"),
+    types: Optional[str] = Query(None, description="Comma-separated subset of: sample, project, client, product, blocker"),
+    limit: int = Query(5, ge=1, le=25, description="Top hits returned per type"),
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Search samples, projects, clients and inventory in one request"""
+    term = q.strip()
+    if not term:
+        raise HTTPException(status_code=400, detail="Search term is required")
+
+    if types:
+        requested = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = [t for t in requested if t not in SEARCH_TYPES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+    else:
+        requested = list(SEARCH_TYPES)
+
+    is_postgres = db.get_bind().dialect.name == "postgresql"
+    budget = settings.SEARCH_LATENCY_BUDGET_MS / 1000
+    started = time.monotonic()
+    hits = {}
+    skipped = []
+
+    for entity_type in requested:
+        remaining = budget - (time.monotonic() - started)
+        if remaining <= 0:
+            skipped.append(entity_type)
+            continue
+
+        spec = SEARCH_TYPES[entity_type]
+        model = spec["model"]
+        label_col, detail_col, status_col = spec["columns"]
+
+        columns = [model.id, label_col.label("label"), detail_col.label("detail")]
+        if status_col is not None:
+            columns.append(status_col.label("status"))
+
+        query = db.query(*columns)
+        if spec["filter"]:
+            query = spec["filter"](query)
+        query, score = search_clause(query, model, term)
+        query = query.add_columns(score.label("score")).order_by(score.desc()).limit(limit)
+
+        try:
+            if is_postgres:
+                # Hard cap for this statement at whatever budget is left
+                db.execute(text(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}"))
+            rows = query.all()
+        except OperationalError as e:
+            logger.warning(f"Search for '{term}' in {entity_type} exceeded the latency budget: {e}")
+            db.rollback()
+            skipped.append(entity_type)
+            continue
+
+        result = []
+        for row in rows:
+            status = getattr(row, "status", None)
+            result.append(SearchHit(
+                type=entity_type,
+                id=row.id,
+                label=row.label or "",
+                detail=row.detail,
+                status=getattr(status, "value", status),
+                score=round(float(row.score), 4)
+            ))
+        hits[entity_type] = result
+
+    return SearchResults(
+        query=term,
+        hits=hits,
+        partial=bool(skipped),
+        skipped=skipped,
+        elapsed_ms=round((time.monotonic() - started) * 1000, 1)
+    )
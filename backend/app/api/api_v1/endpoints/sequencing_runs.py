@@ -0,0 +1,154 @@
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, insert
+
+from app.api import deps
+from app.models import User, Sample, SequencingRun, SequencingRunSample
+from app.schemas.sequencing import DemuxImportResponse
+
+router = APIRouter()
+
+BATCH_SIZE = 1000  # Barcodes per lookup and rows per write statement
+SAVE_ATTEMPTS = 3
+
+def _batches(items: List, size: int = BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _save_run_samples(db: Session, run_id: int, values_by_sample: Dict[int, dict]) -> Tuple[int, int]:
+    """Update the run's rows of these samples and insert the missing ones; returns (inserted, updated)"""
+    existing = dict(db.execute(
+        select(SequencingRunSample.sample_id, SequencingRunSample.id)
+        .where(SequencingRunSample.sequencing_run_id == run_id)
+    ).all())
+    updates, inserts = [], []
+    for sample_id, values in values_by_sample.items():
+        if sample_id in existing:
+            updates.append({"id": existing[sample_id], **values})
+        else:
+            inserts.append({"sequencing_run_id": run_id, "sample_id": sample_id, **values})
+    # Batched executemany statements
+    for batch in _batches(updates):
+        db.execute(update(SequencingRunSample), batch)
+    for batch in _batches(inserts):
+        db.execute(insert(SequencingRunSample), batch)
+    return len(inserts), len(updates)
+
+@router.post("/{run_id}/demux-results", response_model=DemuxImportResponse)
+def import_demux_results(
+    *,
+    db: Session = Depends(deps.get_db),
+    run_id: int,
+    files: List[UploadFile] = File(..., description="BCL Convert Demultiplex_Stats.csv / Quality_Metrics.csv, or bcl2fastq Stats.json"),
+    min_reads: Optional[int] = Query(None, description="Reads a sample needs to pass QC; default 1,000,000"),
+    min_percent_q30: Optional[float] = Query(None, description="% of bases >= Q30 a sample needs to pass QC; default 75"),
+    dry_run: bool = Query(False, description="Evaluate and return the results without saving them"),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """Import per-sample read counts, yield and Q30 for a run from its demultiplexing reports"""
+    # NumPy is only needed here, so it is not loaded at worker startup
+    import numpy as np
+    from app.core.demux import DemuxRows, QCThresholds, read_report, summarize
+
+    run = db.query(SequencingRun).filter(SequencingRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Sequencing run not found")
+
+    # Reports are parsed straight from the spooled uploads, row by row
+    rows = DemuxRows()
+    for upload in files:
+        try:
+            read_report(upload.file, upload.filename or "", rows)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{upload.filename}: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to read {upload.filename}: {str(e)}")
+    if not rows.samples:
+        raise HTTPException(status_code=400, detail="No sample rows found in the uploaded reports")
+
+    overrides = {"min_reads": min_reads, "min_percent_q30": min_percent_q30}
+    thresholds = QCThresholds(**{k: v for k, v in overrides.items() if v is not None})
+    summary = summarize(rows, thresholds)
+
+    # Report sample IDs are our barcodes; sample names are tried for the rest
+    keys = [str(key) for key in summary.samples]
+    candidates = sorted(set(keys) | {str(name) for name in summary.names if name})
+    sample_ids = {}
+    for batch in _batches(candidates):
+        sample_ids.update(db.execute(
+            select(Sample.barcode, Sample.id).where(Sample.barcode.in_(batch))
+        ).all())
+
+    matched = np.array([
+        sample_ids.get(key) or sample_ids.get(str(name)) or 0
+        for key, name in zip(keys, summary.names)
+    ], dtype=np.int64)
+    barcodes = {sample_id: barcode for barcode, sample_id in sample_ids.items()}
+    found = matched > 0
+    unmatched = [key for key, ok in zip(keys, found) if not ok]
+
+    results, values_by_sample = [], {}
+    percent_q30 = np.round(summary.percent_q30, 2)
+    for i in np.nonzero(found)[0]:
+        sample_id = int(matched[i])
+        if sample_id in values_by_sample:
+            continue  # Matched by barcode and by another row's sample name; the first row wins
+        reads = int(summary.reads[i])
+        q30 = None if np.isnan(percent_q30[i]) else float(percent_q30[i])
+        passed = bool(summary.passed_qc[i])
+        reasons = []
+        if reads < thresholds.min_reads:
+            reasons.append(f"{reads:,} reads < {thresholds.min_reads:,}")
+        if q30 is not None and q30 < thresholds.min_percent_q30:
+            reasons.append(f"Q30 {q30}% < {thresholds.min_percent_q30}%")
+        values = {
+            "reads_generated": reads,
+            "yield_mb": round(float(summary.yield_mb[i]), 3),
+            "percent_q30": q30,
+            "passed_qc": passed,
+            "needs_resequencing": not passed,
+            "resequencing_reason": "; ".join(reasons) or None,
+        }
+        values_by_sample[sample_id] = values
+        results.append({"sample_id": sample_id, "barcode": barcodes[sample_id], **{
+            k: values[k] for k in ("reads_generated", "yield_mb", "percent_q30", "passed_qc")
+        }})
+
+    inserted = updated = 0
+    if not dry_run:
+        for _ in range(SAVE_ATTEMPTS):
+            try:
+                inserted, updated = _save_run_samples(db, run_id, values_by_sample)
+                run.total_reads = summary.total_reads
+                run.total_yield_gb = round(summary.total_yield_gb, 3)
+                if summary.percent_pf is not None:
+                    run.percent_pf = round(summary.percent_pf, 2)
+                db.commit()
+                break
+            except IntegrityError:
+                # A concurrent import of this run inserted some of the samples first: update them instead
+                db.rollback()
+        else:
+            raise HTTPException(status_code=409, detail="The run is being imported by another request; try again")
+
+    passed = sum(1 for result in results if result["passed_qc"])
+    return DemuxImportResponse(
+        run_id=run.run_id,
+        dry_run=dry_run,
+        files=[upload.filename or "" for upload in files],
+        samples_reported=len(keys),
+        samples_matched=len(results),
+        rows_inserted=inserted,
+        rows_updated=updated,
+        passed=passed,
+        failed=len(results) - passed,
+        total_reads=summary.total_reads,
+        total_yield_gb=round(summary.total_yield_gb, 3),
+        percent_q30=None if summary.percent_q30_run is None else round(summary.percent_q30_run, 2),
+        percent_pf=None if summary.percent_pf is None else round(summary.percent_pf, 2),
+        undetermined_reads=summary.undetermined_reads,
+        unmatched=unmatched,
+        results=results
+    )
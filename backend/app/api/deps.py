@@ -1,44 +1,118 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.base import SessionLocal
+from app.core.stream_tickets import redeem_ticket
+from app.db import routing
+from app.db.base import AsyncReplicaSessionLocal, AsyncSessionLocal, ReplicaSessionLocal, SessionLocal
 from app.models import User
 from app.crud.user import get_user_by_username
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
-def get_db() -> Generator:
+def get_db(request: Request) -> Generator:
+    # Safe requests may read from the replica (see app.db.routing)
+    if routing.use_replica(request):
+        db = ReplicaSessionLocal()
+    else:
+        db = SessionLocal()
+        routing.track_writes(db, request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_primary_db() -> Generator:
+    """Session on the primary even for GET requests (state that must never be stale)"""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+async def get_async_db(request: Request) -> AsyncGenerator:
+    session_factory = AsyncReplicaSessionLocal if routing.use_replica(request) else AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
+
 async def get_current_user(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
-    credentials_exception = HTTPException(
+    return _get_user_for_token(db, token)
+
+def get_stream_user(
+    request: Request,
+    ticket: Optional[str] = Query(None, description="Stream ticket (POST /events/ticket), for EventSource clients that cannot set headers"),
+) -> User:
+    """
+    Authenticate a long-lived streaming request
+    
+    Accepts the token from the Authorization header or a single-use ticket
+    in the `ticket` query parameter (app.core.stream_tickets) - never the
+    token itself in the URL, where access logs would keep it. Uses its own
+    short-lived session so the stream does not hold a database connection
+    for its whole lifetime.
+    """
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer ") and not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    db = SessionLocal()
+    try:
+        if authorization.lower().startswith("bearer "):
+            user = _get_user_for_token(db, authorization[7:])
+        else:
+            username = redeem_ticket(db, ticket)
+            if username is None:
+                raise _credentials_exception()
+            user = _check_user(get_user_by_username(db, username=username))
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+def _get_user_for_token(db: Session, token: str) -> User:
+    username = _username_from_token(token)
+    return _check_user(get_user_by_username(db, username=username))
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    """get_current_user for endpoints that run on the async session"""
+    username = _username_from_token(token)
+    user = (await db.execute(select(User).where(User.username == username))).scalar_one_or_none()
+    return _check_user(user)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _username_from_token(token: str) -> str:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-    
-    user = get_user_by_username(db, username=username)
+        raise _credentials_exception()
+    return username
+
+def _check_user(user: Optional[User]) -> User:
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     if user.is_locked:
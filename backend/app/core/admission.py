@@ -0,0 +1,226 @@
+"""
+Admission control for expensive routes
+
+Each worker process gives the costly routes (imports, bulk changes, exports,
+large list pages) fixed budgets so that they cannot take every database
+connection and stall cheap requests such as /auth/me. A request matching a
+rule in RULES needs `weight` units of its budget for as long as it runs
+(streamed responses included). When the budget is spent it waits in a
+bounded FIFO queue; if the queue is full, or the wait exceeds
+ADMISSION_QUEUE_TIMEOUT_SECONDS, it gets a 503 with a Retry-After estimated
+from recent hold times. Routes without a rule are never limited.
+
+Budgets are per process: with N gunicorn workers, up to N x capacity
+requests of a kind run at once. The counters are served at
+/metrics/admission.
+"""
+import asyncio
+import math
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
+
+HOLD_TIME_SMOOTHING = 0.2  # Weight of the newest hold time in the moving average
+MAX_RETRY_AFTER_SECONDS = 60
+
+Weight = Union[int, Callable[[Dict[str, List[str]]], int]]
+
+
+class Budget:
+    """A weighted semaphore with a bounded, time-limited FIFO wait queue"""
+
+    def __init__(self, name: str, capacity: int, queue_size: int, timeout: float):
+        self.name = name
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.in_use = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+        # Counters, exposed for monitoring
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0  # Queue full
+        self.timed_out = 0  # Waited too long
+        self.hold_seconds = 0.0  # Moving average
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, weight: int) -> bool:
+        """Take `weight` units, waiting if needed; False if the request should be turned away"""
+        weight = min(weight, self.capacity)
+        if not self._waiters and self.in_use + weight <= self.capacity:
+            self.in_use += weight
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            return False
+
+        waiter = (weight, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter[1], self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter[1].done() and not waiter[1].cancelled():
+                self.release(weight)  # Granted just as we gave up
+            self._wake()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def release(self, weight: int, held: Optional[float] = None) -> None:
+        self.in_use -= min(weight, self.capacity)
+        if held is not None:
+            self.hold_seconds += HOLD_TIME_SMOOTHING * (held - self.hold_seconds)
+        self._wake()
+
+    def _wake(self) -> None:
+        # Strict FIFO: a heavy request at the head is not overtaken by lighter ones
+        while self._waiters:
+            weight, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.in_use + weight > self.capacity:
+                break
+            self._waiters.popleft()
+            self.in_use += weight
+            future.set_result(True)
+
+    def retry_after(self) -> int:
+        """Seconds until a retry has a fair chance, from the queue and recent hold times"""
+        estimate = self.hold_seconds * (self.waiting + 1) / self.capacity
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(estimate)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "mean_hold_ms": round(self.hold_seconds * 1000, 1),
+        }
+
+
+@dataclass
+class Rule:
+    methods: Tuple[str, ...]
+    pattern: "re.Pattern"
+    budget: str
+    weight: Weight = 1
+
+
+def _query_int(query: Dict[str, List[str]], name: str, default: int) -> int:
+    try:
+        return max(int(query.get(name, [default])[0]), 0)
+    except ValueError:
+        return default
+
+
+def page_weight(query: Dict[str, List[str]]) -> int:
+    """List pages cost more the further (OFFSET) and larger (LIMIT) they go"""
+    return 1 + (_query_int(query, "skip", 0) + _query_int(query, "limit", 100)) // 2000
+
+
+def unless_async(query: Dict[str, List[str]]) -> int:
+    """Queuing a background job (?async=true) is cheap; running the work inline is not"""
+    return 0 if query.get("async", ["false"])[0].lower() in ("1", "true", "yes") else 1
+
+
+def _rule(methods: str, path: str, budget: str, weight: Weight = 1) -> Rule:
+    return Rule(tuple(methods.split(",")), re.compile(f"^{re.escape(settings.API_V1_STR)}{path}$"), budget, weight)
+
+
+RULES: Sequence[Rule] = (
+    _rule("POST", r"/samples/(bulk-import|validate-import|bulk-update)", "imports", unless_async),
+    _rule("POST", r"/samples/(bulk|bulk-delete|accession/bulk)", "imports"),
+    _rule("POST", r"/extraction-plates/\d+/qc-import", "imports"),
+    _rule("POST", r"/sequencing-runs/\d+/demux-results", "imports"),
+    _rule("GET", r"/[\w-]+(/logs)?/export", "exports"),
+    _rule("GET", r"/samples/?", "lists", page_weight),
+    _rule("GET", r"/samples/queues/[\w-]+", "lists"),
+    _rule("GET,POST", r"/samples/(\d+/)?lineage", "lists"),
+    _rule("GET", r"/(projects|products|blockers|extraction-plates)/?", "lists", page_weight),
+    _rule("GET", r"/search/?", "lists"),
+    _rule("GET", r"/analytics/[\w-]+", "lists"),
+)
+
+
+class AdmissionController:
+    def __init__(self, rules: Sequence[Rule] = RULES):
+        queue_size, timeout = settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+        self.budgets: Dict[str, Budget] = {
+            "imports": Budget("imports", settings.ADMISSION_IMPORT_CAPACITY, queue_size, timeout),
+            "exports": Budget("exports", settings.ADMISSION_EXPORT_CAPACITY, queue_size, timeout),
+            "lists": Budget("lists", settings.ADMISSION_LIST_CAPACITY, queue_size, timeout),
+        }
+        self.rules = rules
+
+    def classify(self, method: str, path: str, query_string: bytes) -> Optional[Tuple[Budget, int]]:
+        """The budget and weight a request needs, or None if it is not limited"""
+        for rule in self.rules:
+            if method in rule.methods and rule.pattern.match(path):
+                weight = rule.weight
+                if callable(weight):
+                    weight = weight(parse_qs(query_string.decode("latin-1")))
+                return (self.budgets[rule.budget], weight) if weight > 0 else None
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: budget.snapshot() for name, budget in self.budgets.items()}
+
+
+admission_controller = AdmissionController()
+
+
+class AdmissionMiddleware:
+    """Runs limited routes within their budget, or answers 503 + Retry-After"""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController = admission_controller) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        admission = self.controller.classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        if admission is None:
+            await self.app(scope, receive, send)
+            return
+
+        budget, weight = admission
+        if not await budget.acquire(weight):
+            response = ORJSONResponse(
+                status_code=503,
+                content={"detail": "The server is busy with similar requests; please retry shortly"},
+                headers={"Retry-After": str(budget.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            budget.release(weight, time.monotonic() - started)
@@ -0,0 +1,186 @@
+"""
+Archival of finished samples - the hot/cold split of `samples`
+
+Samples that were delivered, cancelled or deleted and have not changed for
+ARCHIVE_RETENTION_DAYS are moved into the *_archive tables
+(app.models.archive) together with the rows that only describe them: logs,
+extraction / library prep / sequencing results, plate wells and stage
+intervals. The working tables - and every list, queue and search query on
+them - then hold active work plus the recent past.
+
+archive_samples() moves ARCHIVE_BATCH_SIZE samples per transaction. A batch
+is picked with FOR UPDATE SKIP LOCKED (so a sample being edited is left for
+the next pass), copied with INSERT ... SELECT and deleted, dependents
+first; their storage positions are given back to the box occupancy
+(app.core.storage) unless something else holds them. Samples live work
+still points at stay put: parents of live reprocessed samples, samples on
+extraction or prep plans or on plates not yet completed or failed, and
+samples with discrepancy approvals (signed records). The job workers run
+it every ARCHIVE_INTERVAL_SECONDS (see app.worker).
+
+Plain tables are used rather than PostgreSQL partitions so the same code
+runs on SQLite. Detail views read archived samples through
+load_archived_sample() / archived_sample_logs(), and plate views add
+archived_plate_samples() / archived_plate_wells(); the archive rows have
+the attributes of the live ones. Archived samples keep their barcodes and client
+sample ids, so barcode_taken() and existing_client_sample() check both
+tables.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.orm import Session, aliased, joinedload
+
+from app.core.config import settings
+from app.core.storage import sync_locations
+from app.db.base import SessionLocal
+from app.models.analytics import SampleStageInterval
+from app.models.archive import (
+    ArchivedExtractionResult, ArchivedLibraryPrepResult, ArchivedPlateWellAssignment, ArchivedSample,
+    ArchivedSampleLog, ArchivedSampleStageInterval, ArchivedSequencingRunSample
+)
+from app.models.extraction_plate import ExtractionPlate, PlateStatus, PlateWellAssignment
+from app.models.project import Project
+from app.models.sample import (
+    DiscrepancyApproval, ExtractionResult, LibraryPrepResult, Sample, SampleLog, SampleStatus
+)
+from app.models.sequencing import SequencingRunSample
+from app.models.workflow import ExtractionPlanSample, PrepPlanSample
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_STATUSES = (SampleStatus.DELIVERED.value, SampleStatus.CANCELLED.value, SampleStatus.DELETED.value)
+FINISHED_PLATE_STATUSES = (PlateStatus.COMPLETED, PlateStatus.FAILED)
+MAX_BATCHES_PER_PASS = 20  # The rest of a large backlog waits for the next pass
+
+# (live, archive) of the rows moved with their sample, in dependency order
+DEPENDENTS = (
+    (SampleLog, ArchivedSampleLog),
+    (ExtractionResult, ArchivedExtractionResult),
+    (LibraryPrepResult, ArchivedLibraryPrepResult),
+    (SequencingRunSample, ArchivedSequencingRunSample),
+    (PlateWellAssignment, ArchivedPlateWellAssignment),
+    (SampleStageInterval, ArchivedSampleStageInterval),
+)
+
+
+def archivable(cutoff: datetime):
+    """Ids of the samples that may be archived: finished, untouched since cutoff and not referenced by live work"""
+    child = aliased(Sample)
+    return select(Sample.id).where(
+        Sample.status.in_(ARCHIVED_STATUSES),
+        func.coalesce(Sample.updated_at, Sample.created_at) < cutoff,
+        ~exists().where(child.parent_sample_id == Sample.id),
+        ~exists().where(ExtractionPlanSample.sample_id == Sample.id),
+        ~exists().where(PrepPlanSample.sample_id == Sample.id),
+        ~exists().where(
+            ExtractionPlate.id == Sample.extraction_plate_ref_id,
+            ExtractionPlate.status.notin_(FINISHED_PLATE_STATUSES)
+        ),
+        ~exists().where(DiscrepancyApproval.sample_id == Sample.id),
+    )
+
+
+def _move(db: Session, live, archived, key, sample_ids: Sequence[int]) -> None:
+    table = live.__table__
+    db.execute(
+        insert(archived.__table__).from_select(
+            [column.name for column in table.columns],
+            select(table).where(key.in_(sample_ids))
+        )
+    )
+    db.execute(delete(table).where(key.in_(sample_ids)).execution_options(synchronize_session=False))
+
+
+def archive(db: Session, sample_ids: Sequence[int]) -> None:
+    """Move the samples and their dependent rows to the archive; the caller commits"""
+    location_ids = db.execute(
+        select(Sample.storage_location_id).where(Sample.id.in_(sample_ids)).distinct()
+    ).scalars().all()
+    for live, archived in DEPENDENTS:
+        _move(db, live, archived, live.__table__.c.sample_id, sample_ids)
+    _move(db, Sample, ArchivedSample, Sample.__table__.c.id, sample_ids)
+    # Their positions are free now unless another sample or a reservation holds them
+    sync_locations(db, location_ids)
+
+
+def archive_samples(now: Optional[datetime] = None) -> int:
+    """Archive the samples past the retention window, a batch per transaction (periodic task of the job workers)"""
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+    archived = 0
+    for _ in range(MAX_BATCHES_PER_PASS):
+        with SessionLocal() as db:
+            sample_ids = db.execute(
+                archivable(cutoff)
+                .order_by(Sample.id)
+                .limit(settings.ARCHIVE_BATCH_SIZE)
+                .with_for_update(skip_locked=True, of=Sample)
+            ).scalars().all()
+            if sample_ids:
+                archive(db, sample_ids)
+                db.commit()
+        archived += len(sample_ids)
+        if len(sample_ids) < settings.ARCHIVE_BATCH_SIZE:
+            break
+    if archived:
+        logger.info(f"Archived {archived} sample(s)")
+    return archived
+
+
+def load_archived_sample(db: Session, sample_id: int) -> Optional[ArchivedSample]:
+    """An archived sample with what the sample detail view reads, or None"""
+    return db.query(ArchivedSample).options(
+        joinedload(ArchivedSample.project).joinedload(Project.client),
+        joinedload(ArchivedSample.storage_location),
+        joinedload(ArchivedSample.sample_type_ref),
+        joinedload(ArchivedSample.extraction_results),
+        joinedload(ArchivedSample.library_prep_results),
+        joinedload(ArchivedSample.sequencing_run_samples).joinedload(ArchivedSequencingRunSample.sequencing_run)
+    ).filter(ArchivedSample.id == sample_id).first()
+
+
+def archived_sample_logs(db: Session, sample_id: int) -> List[ArchivedSampleLog]:
+    """Logs of an archived sample, newest first"""
+    return db.query(ArchivedSampleLog).options(
+        joinedload(ArchivedSampleLog.created_by)
+    ).filter(
+        ArchivedSampleLog.sample_id == sample_id
+    ).order_by(ArchivedSampleLog.created_at.desc()).all()
+
+
+def archived_plate_samples(db: Session, plate_id: int) -> List[ArchivedSample]:
+    """Archived samples that were on the plate, with their projects"""
+    return db.query(ArchivedSample).options(
+        joinedload(ArchivedSample.project)
+    ).filter(ArchivedSample.extraction_plate_ref_id == plate_id).all()
+
+
+def archived_plate_wells(db: Session, plate_id: int) -> List[ArchivedPlateWellAssignment]:
+    """Archived well assignments of the plate, with what the plate layout reads of their samples"""
+    return db.query(ArchivedPlateWellAssignment).options(
+        joinedload(ArchivedPlateWellAssignment.sample).joinedload(ArchivedSample.project).joinedload(Project.client),
+        joinedload(ArchivedPlateWellAssignment.sample).joinedload(ArchivedSample.sample_type_ref)
+    ).filter(ArchivedPlateWellAssignment.plate_id == plate_id).all()
+
+
+def barcode_taken(db: Session, barcode: str) -> bool:
+    """Whether a live or archived sample has the barcode"""
+    return any(
+        db.query(model.id).filter(model.barcode == barcode).first() is not None
+        for model in (Sample, ArchivedSample)
+    )
+
+
+def existing_client_sample(db: Session, project_id: int, client_sample_id: str):
+    """A live or archived sample of the project with that client sample id, deleted ones aside"""
+    for model in (Sample, ArchivedSample):
+        existing = db.query(model).filter(
+            model.project_id == project_id,
+            model.client_sample_id == client_sample_id,
+            model.status != SampleStatus.DELETED
+        ).first()
+        if existing:
+            return existing
+    return None
@@ -0,0 +1,190 @@
+"""
+Batched writer for the API access trail (CFR Part 11)
+
+Requests only enqueue a small dict; a single background task drains the
+queue and writes the records to the access_logs table with one multi-row
+INSERT per batch. A batch is flushed when it reaches ACCESS_LOG_BATCH_SIZE
+records or when its oldest record is ACCESS_LOG_FLUSH_INTERVAL_SECONDS old,
+whichever comes first.
+
+What is still buffered is written by stop(), from the lifespan shutdown.
+Under gunicorn that runs once the worker's connections are drained, which
+app.core.server bounds (event streams are ended, other requests get
+SHUTDOWN_GRACE_SECONDS) so it happens before graceful_timeout kills the
+worker.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from jose import JWTError, jwt
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.base import engine
+from app.models.base import AccessLog
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Queue sentinel that tells the writer to flush and exit
+
+
+def get_request_username(authorization: Optional[str], verify_exp: bool = False) -> Optional[str]:
+    """Read the username from a bearer token without touching the database"""
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(
+            authorization[7:],
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+            options={"verify_exp": verify_exp}
+        )
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
+class AccessLogWriter:
+    """Bounded in-memory buffer of access records with batched persistence"""
+
+    def __init__(
+        self,
+        batch_size: int = settings.ACCESS_LOG_BATCH_SIZE,
+        flush_interval: float = settings.ACCESS_LOG_FLUSH_INTERVAL_SECONDS,
+        queue_size: int = settings.ACCESS_LOG_QUEUE_SIZE,
+        enqueue_timeout: float = settings.ACCESS_LOG_ENQUEUE_TIMEOUT_SECONDS,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters, exposed for monitoring
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background flush task (call from the lifespan hook)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run(), name="access-log-writer")
+        logger.info("Access log writer started")
+
+    async def stop(self) -> None:
+        """Flush everything still buffered and stop the background task"""
+        if not self.running:
+            return
+        # The sentinel queues behind the records already buffered, so they are all written
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        logger.info(
+            f"Access log writer stopped (written={self.written}, "
+            f"dropped={self.dropped}, failed={self.failed})"
+        )
+
+    async def submit(self, record: Dict[str, Any]) -> bool:
+        """
+        Buffer one access record
+
+        When the queue is full the caller waits up to enqueue_timeout for the
+        writer to catch up, then the record is dropped and counted, so a slow
+        database never stalls requests for long.
+        """
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self._queue.put(record), timeout=self.enqueue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Access log queue full, {self.dropped} records dropped so far")
+            return False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await asyncio.to_thread(self._insert, batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} access log records: {e}")
+
+    @staticmethod
+    def _insert(batch: List[Dict[str, Any]]) -> None:
+        # executemany on a Core insert is sent as multi-row INSERT ... VALUES statements
+        with engine.begin() as conn:
+            conn.execute(insert(AccessLog.__table__), batch)
+
+
+def build_access_record(
+    *,
+    method: str,
+    path: str,
+    status_code: int,
+    duration: float,
+    authorization: Optional[str] = None,
+    client_ip: Optional[str] = None,
+) -> Dict[str, Any]:
+    return {
+        "username": get_request_username(authorization),
+        "method": method,
+        "path": path,
+        "status_code": status_code,
+        "duration_ms": round(duration * 1000, 3),
+        "client_ip": client_ip,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+access_log_writer = AccessLogWriter()
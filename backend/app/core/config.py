@@ -7,6 +7,10 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     
     DATABASE_URL: str
+    # Optional read replica; safe (GET/HEAD) requests are served from it, except for
+    # users who wrote something within the last REPLICA_STICKY_SECONDS
+    DATABASE_REPLICA_URL: Optional[str] = None
+    REPLICA_STICKY_SECONDS: float = 10.0
     
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
@@ -22,7 +26,79 @@ class Settings(BaseSettings):
     MAX_LOGIN_ATTEMPTS: int = 5
     ACCOUNT_LOCKOUT_MINUTES: int = 30
     SESSION_TIMEOUT_MINUTES: int = 30
-    
+
+    # API access log - records are buffered and written in multi-row inserts
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_BATCH_SIZE: int = 200  # Flush when this many records are buffered
+    ACCESS_LOG_FLUSH_INTERVAL_SECONDS: float = 2.0  # ...or when the oldest record is this old
+    ACCESS_LOG_QUEUE_SIZE: int = 10000  # Bounded buffer; requests wait briefly when full
+    ACCESS_LOG_ENQUEUE_TIMEOUT_SECONDS: float = 0.05  # Max wait before a record is dropped
+
+    # Global search - remaining entity types are skipped once the budget is spent
+    SEARCH_LATENCY_BUDGET_MS: int = 300
+
+    # Reference-data ETags - how long a worker trusts its cached resource versions
+    REFERENCE_VERSION_TTL_SECONDS: float = 5.0
+
+    # /readyz - the database check result is reused for this long
+    READINESS_CACHE_SECONDS: float = 5.0
+    READINESS_TIMEOUT_SECONDS: float = 2.0
+
+    # Live queue events (SSE) - "auto" uses LISTEN/NOTIFY on PostgreSQL, in-process delivery otherwise
+    EVENTS_BROKER: str = "auto"  # auto, postgres or memory
+    EVENTS_SUBSCRIBER_QUEUE_SIZE: int = 1000  # Backlog per client before it is told to resync
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    STREAM_TICKET_EXPIRE_SECONDS: int = 30  # Single-use tickets opening a stream (app.core.stream_tickets)
+
+    # Gunicorn worker shutdown (app.core.server): requests still running after this are cancelled,
+    # so the lifespan shutdown (access log flush) runs before gunicorn's graceful_timeout kills the worker
+    SHUTDOWN_GRACE_SECONDS: float = 20.0
+
+    # Background jobs (app.core.jobs) - run by `python -m app.worker`, or by this many
+    # threads inside each API process (for single-host deployments without a worker service)
+    JOB_EMBEDDED_WORKERS: int = 0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_HEARTBEAT_SECONDS: float = 30.0
+    JOB_LEASE_SECONDS: float = 300.0  # A running job without a heartbeat for this long is requeued
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 30.0  # Doubled on every further attempt
+
+    # Stage-aging aggregates (app.core.stage_analytics), refreshed by the job workers
+    STAGE_ANALYTICS_INTERVAL_SECONDS: float = 60.0
+
+    # Admission control (app.core.admission) - per-worker budgets for the expensive routes
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_IMPORT_CAPACITY: int = 2  # Imports and bulk changes running at once
+    ADMISSION_EXPORT_CAPACITY: int = 2
+    ADMISSION_LIST_CAPACITY: int = 6  # Weight units; deep or large pages weigh more
+    ADMISSION_QUEUE_SIZE: int = 20  # Requests waiting per budget before new ones get a 503
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 10.0
+
+    # Idempotency-Key support for bulk creation and imports (app.core.idempotency)
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # How long a stored response is replayed
+    IDEMPOTENCY_LEASE_SECONDS: float = 60.0  # A running request whose lease is not renewed for this long loses its key
+    IDEMPOTENCY_WAIT_SECONDS: float = 60.0  # Duplicates wait this long for the first request, then get a 409
+    IDEMPOTENCY_POLL_INTERVAL_SECONDS: float = 0.5
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 3600.0
+
+    # Archival of finished samples into the *_archive tables (app.core.archive), run by the job workers
+    ARCHIVE_RETENTION_DAYS: int = 365  # Delivered/cancelled/deleted samples untouched this long are archived
+    ARCHIVE_BATCH_SIZE: int = 500  # Samples moved per transaction
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+
+    # Sample/project log storage (app.core.log_storage) - monthly partitions on PostgreSQL, compacted by the job workers
+    LOG_RETENTION_DAYS: int = 730  # Whole months older than this are exported to LOG_EXPORT_DIR and removed
+    LOG_EXPORT_DIR: str = "uploads/log_exports"
+    LOG_PARTITION_PREMAKE_MONTHS: int = 3  # Monthly partitions created ahead of time
+    LOG_MAINTENANCE_INTERVAL_SECONDS: float = 86400.0
+
+    # Create missing tables/indexes in the lifespan hook; deploys run `python -m app.db.init_db` instead
+    DB_INIT_ON_STARTUP: bool = False
+
+    # Responses smaller than this are sent uncompressed
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 6
+
     class Config:
         env_file = ".env"
         extra = "ignore"  # This will ignore any extra fields in the environment
@@ -0,0 +1,214 @@
+"""
+Demultiplexing reports from Illumina runs
+
+Accepted inputs (one or several files per run):
+
+- BCL Convert Demultiplex_Stats.csv (reads per sample and lane) and
+  Quality_Metrics.csv (yield and Q30 yield per sample, lane and read)
+- bcl2fastq Stats/Stats.json
+- any CSV with a sample column (SampleID / Sample_ID / Sample) and some of
+  "# Reads", "Yield", "Yield (Mbases)", "YieldQ30", "% Q30"
+
+CSV files are read row by row from the upload and only the numeric columns
+are kept, as flat lists. summarize() then aggregates them per sample with
+NumPy (one np.unique + np.bincount per metric) and computes the run totals
+and the per-sample QC flags in the same pass. This module imports NumPy at
+the top, so import it where it is used rather than at application startup.
+"""
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass, field
+from typing import IO, Dict, List, Optional
+
+import numpy as np
+
+UNDETERMINED = "undetermined"
+
+COLUMN_ALIASES = {
+    "sample": ("sampleid", "sample_id", "sample id", "sample"),
+    "name": ("samplename", "sample_name", "sample name"),
+    "reads": ("# reads", "reads", "numberreads", "pf clusters", "# pf reads"),
+    "yield": ("yield", "yield (bases)"),
+    "yield_mb": ("yield (mbases)", "yield_mb"),
+    "yield_q30": ("yieldq30", "yield q30"),
+    "percent_q30": ("% q30", "%q30", "% >= q30 bases", "percent_q30"),
+}
+
+
+@dataclass
+class QCThresholds:
+    min_reads: int = 1_000_000
+    min_percent_q30: float = 75.0
+
+
+@dataclass
+class DemuxRows:
+    """Per-row metrics of one or more reports; NaN where a report has no value"""
+    samples: List[str] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    reads: List[float] = field(default_factory=list)
+    yields: List[float] = field(default_factory=list)
+    yields_q30: List[float] = field(default_factory=list)
+    percents_q30: List[float] = field(default_factory=list)
+    undetermined_reads: float = 0.0
+    undetermined_yield: float = 0.0
+    clusters_raw: float = 0.0
+    clusters_pf: float = 0.0
+
+    def add(self, sample: str, name: str, reads: float, yield_bases: float, yield_q30: float, percent_q30: float) -> None:
+        if sample.strip().lower() == UNDETERMINED:
+            self.undetermined_reads += 0.0 if np.isnan(reads) else reads
+            self.undetermined_yield += 0.0 if np.isnan(yield_bases) else yield_bases
+            return
+        self.samples.append(sample.strip())
+        self.names.append(name.strip())
+        self.reads.append(reads)
+        self.yields.append(yield_bases)
+        self.yields_q30.append(yield_q30)
+        self.percents_q30.append(percent_q30)
+
+
+def _number(value) -> float:
+    if value is None:
+        return np.nan
+    text = str(value).strip().replace(",", "")
+    if not text or text.upper() in ("NA", "N/A", "-"):
+        return np.nan
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def _normalize(header: str) -> str:
+    return re.sub(r"\s+", " ", header or "").strip().lower()
+
+
+def read_csv(stream: IO[bytes], rows: DemuxRows) -> None:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.reader(text)
+    header = next(reader, None)
+    # BCL Convert reports can start with a [Header]-style preamble; find the real header row
+    while header is not None and not any(_normalize(h) in COLUMN_ALIASES["sample"] for h in header):
+        header = next(reader, None)
+    if header is None:
+        raise ValueError("No sample column (SampleID, Sample_ID or Sample) found")
+    headers = [_normalize(h) for h in header]
+    columns: Dict[str, Optional[int]] = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        columns[name] = next((headers.index(a) for a in aliases if a in headers), None)
+
+    def get(row, name):
+        index = columns[name]
+        return row[index] if index is not None and index < len(row) else None
+
+    for row in reader:
+        sample = get(row, "sample")
+        if not sample:
+            continue
+        yield_bases = _number(get(row, "yield"))
+        if np.isnan(yield_bases):
+            yield_bases = _number(get(row, "yield_mb")) * 1e6
+        rows.add(
+            sample,
+            get(row, "name") or "",
+            _number(get(row, "reads")),
+            yield_bases,
+            _number(get(row, "yield_q30")),
+            _number(get(row, "percent_q30")),
+        )
+
+
+def read_stats_json(stream: IO[bytes], rows: DemuxRows) -> None:
+    stats = json.load(stream)
+    if "ConversionResults" not in stats:
+        raise ValueError("Not a bcl2fastq Stats.json (no ConversionResults)")
+    for lane in stats["ConversionResults"]:
+        rows.clusters_raw += lane.get("TotalClustersRaw") or 0
+        rows.clusters_pf += lane.get("TotalClustersPF") or 0
+        for result in lane.get("DemuxResults", []):
+            metrics = result.get("ReadMetrics", [])
+            rows.add(
+                result.get("SampleId") or "",
+                result.get("SampleName") or "",
+                _number(result.get("NumberReads")),
+                _number(result.get("Yield")),
+                float(sum(m.get("YieldQ30", 0) for m in metrics)) if metrics else np.nan,
+                np.nan,
+            )
+        undetermined = lane.get("Undetermined") or {}
+        rows.undetermined_reads += undetermined.get("NumberReads") or 0
+        rows.undetermined_yield += undetermined.get("Yield") or 0
+
+
+def read_report(stream: IO[bytes], filename: str, rows: DemuxRows) -> None:
+    """Add the rows of one report file to `rows`; raises ValueError for unusable files"""
+    if filename.lower().endswith(".json"):
+        read_stats_json(stream, rows)
+    else:
+        read_csv(stream, rows)
+
+
+@dataclass
+class DemuxSummary:
+    samples: np.ndarray  # Distinct sample keys
+    names: np.ndarray
+    reads: np.ndarray
+    yield_mb: np.ndarray
+    percent_q30: np.ndarray  # NaN where no Q30 figure was reported
+    passed_qc: np.ndarray
+    total_reads: int
+    total_yield_gb: float
+    percent_q30_run: Optional[float]
+    percent_pf: Optional[float]
+    undetermined_reads: int
+
+
+def summarize(rows: DemuxRows, thresholds: QCThresholds) -> DemuxSummary:
+    """Aggregate rows per sample and flag QC, all as array operations"""
+    samples, first, inverse = np.unique(np.array(rows.samples, dtype=object).astype(str), return_index=True, return_inverse=True)
+    count = len(samples)
+    reads = np.array(rows.reads, dtype=float)
+    yields = np.array(rows.yields, dtype=float)
+    yields_q30 = np.array(rows.yields_q30, dtype=float)
+    percents = np.array(rows.percents_q30, dtype=float)
+
+    def total(values: np.ndarray) -> np.ndarray:
+        return np.bincount(inverse, weights=values, minlength=count)
+
+    sample_reads = total(np.nan_to_num(reads))
+    sample_yield = total(np.nan_to_num(yields))
+
+    # Q30 as a share of the yield it was measured on; reports that only give
+    # a percentage contribute percentage x yield
+    q30_bases = np.where(np.isnan(yields_q30), percents / 100 * yields, yields_q30)
+    q30_known = ~np.isnan(q30_bases)
+    q30_sum = total(np.where(q30_known, q30_bases, 0.0))
+    q30_yield = total(np.where(q30_known, yields, 0.0))
+    # Percentage-only reports without yields: reads-weighted mean
+    pct_weight = np.where(np.isnan(percents), 0.0, np.where(np.isnan(reads), 1.0, reads))
+    pct_sum = total(np.where(np.isnan(percents), 0.0, percents) * pct_weight)
+    pct_weights = total(pct_weight)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent_q30 = np.where(
+            q30_yield > 0, q30_sum / q30_yield * 100,
+            np.where(pct_weights > 0, pct_sum / pct_weights, np.nan)
+        )
+        passed = (sample_reads >= thresholds.min_reads) & (np.isnan(percent_q30) | (percent_q30 >= thresholds.min_percent_q30))
+
+    total_q30_yield = q30_yield.sum()
+    return DemuxSummary(
+        samples=samples,
+        names=np.array(rows.names, dtype=object)[first] if count else np.array([], dtype=object),
+        reads=sample_reads,
+        yield_mb=sample_yield / 1e6,
+        percent_q30=percent_q30,
+        passed_qc=passed,
+        total_reads=int(sample_reads.sum() + rows.undetermined_reads),
+        total_yield_gb=float((sample_yield.sum() + rows.undetermined_yield) / 1e9),
+        percent_q30_run=float(q30_sum.sum() / total_q30_yield * 100) if total_q30_yield > 0 else None,
+        percent_pf=float(rows.clusters_pf / rows.clusters_raw * 100) if rows.clusters_raw else None,
+        undetermined_reads=int(rows.undetermined_reads),
+    )
@@ -0,0 +1,311 @@
+"""
+Change events for the live queue pages
+
+Writes that move a sample through the lab (status, queue priority) or change
+an extraction plate's status produce small events such as
+
+    {"type": "sample.status", "id": 42, "barcode": "1000042", "old": "received", "new": "accessioning"}
+
+which /events/queues streams to the browser over Server-Sent Events, so the
+queue pages can patch their tables instead of polling.
+
+ORM changes are picked up automatically when the session flushes;
+set-based UPDATEs call publish() themselves. Events only leave the process
+once the transaction commits:
+
+- PostgresBroker sends them with NOTIFY inside the writing transaction, and
+  every worker (this one included) receives them through LISTEN.
+- InMemoryBroker hands them to this process's subscribers after commit. It
+  is used with SQLite and in tests; other workers do not see the events.
+
+A subscriber that falls behind gets a single {"type": "resync"} in place of
+its backlog and should reload its table.
+
+Events whose type starts with "db." are for other workers rather than the
+browser (see app.db.routing); they reach the broker's listeners only.
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal, engine
+from app.models.extraction_plate import ExtractionPlate
+from app.models.sample import Sample
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "lims_events"
+NOTIFY_PAYLOAD_LIMIT = 7000  # Postgres rejects NOTIFY payloads of 8000 bytes or more
+RESYNC = {"type": "resync"}
+CLOSED = object()  # Queue sentinel that ends a subscription on shutdown
+INTERNAL_PREFIX = "db."
+
+_PENDING = "pending_events"
+
+
+def _value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+class InMemoryBroker:
+    """Fans events out to the subscribers in this process"""
+
+    def __init__(self, queue_size: int = settings.EVENTS_SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing = False
+
+    @property
+    def listening(self) -> bool:
+        """Whether events committed from now on will reach this worker"""
+        return self._loop is not None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._closing = False
+
+    async def stop(self) -> None:
+        self.close_subscriptions()
+        self._loop = None
+
+    def close_subscriptions(self) -> None:
+        """End every stream, and the ones opened from now on, so the server can drain its connections"""
+        self._closing = True
+        for queue in list(self._subscribers):
+            self._replace_backlog(queue, CLOSED)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._closing:
+            queue.put_nowait(CLOSED)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Call back (on the event loop) with every event delivered to this worker"""
+        self._listeners.append(callback)
+
+    def stage(self, session: Session, events: List[Dict[str, Any]]) -> None:
+        """Hold events until the session commits"""
+        session.info.setdefault(_PENDING, []).extend(events)
+
+    def committed(self, events: List[Dict[str, Any]]) -> None:
+        self.dispatch_threadsafe(events)
+
+    def dispatch_threadsafe(self, events: List[Dict[str, Any]]) -> None:
+        # Sync endpoints commit in the threadpool; subscribers live on the event loop
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._dispatch, events)
+
+    def _dispatch(self, events: List[Dict[str, Any]]) -> None:
+        for item in events:
+            for listener in self._listeners:
+                try:
+                    listener(item)
+                except Exception as e:
+                    logger.warning(f"Event listener failed: {e}")
+        events = [item for item in events if not item.get("type", "").startswith(INTERNAL_PREFIX)]
+        if not events:
+            return
+        for queue in list(self._subscribers):
+            for item in events:
+                try:
+                    queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    self._replace_backlog(queue, RESYNC)
+                    break
+
+    @staticmethod
+    def _replace_backlog(queue: asyncio.Queue, item: Any) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+
+class PostgresBroker(InMemoryBroker):
+    """Delivers events across workers with LISTEN/NOTIFY"""
+
+    def __init__(self, queue_size: int = settings.EVENTS_SUBSCRIBER_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self._listener = None
+        self._reconnect: Optional[asyncio.Task] = None
+
+    @property
+    def listening(self) -> bool:
+        return self._listener is not None
+
+    async def start(self) -> None:
+        await super().start()
+        await self._listen()
+
+    async def stop(self) -> None:
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        self._close_listener()
+        await super().stop()
+
+    def stage(self, session: Session, events: List[Dict[str, Any]]) -> None:
+        # NOTIFY is transactional: delivered on commit, dropped on rollback
+        connection = session.connection()
+        for payload in self._payloads(events):
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CHANNEL, "payload": payload}
+            )
+
+    def committed(self, events: List[Dict[str, Any]]) -> None:
+        pass  # This worker receives its own notifications through LISTEN
+
+    @staticmethod
+    def _payloads(events: List[Dict[str, Any]]) -> List[str]:
+        payloads, batch = [], []
+        for item in events:
+            candidate = json.dumps(batch + [item], default=str)
+            if batch and len(candidate) > NOTIFY_PAYLOAD_LIMIT:
+                payloads.append(json.dumps(batch, default=str))
+                batch = [item]
+            else:
+                batch.append(item)
+        if batch:
+            payloads.append(json.dumps(batch, default=str))
+        return payloads
+
+    async def _listen(self) -> None:
+        import psycopg2.extensions
+
+        def connect():
+            # A dedicated connection, taken out of the pool for good
+            raw = engine.raw_connection()
+            raw.detach()
+            connection = raw.driver_connection
+            connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            return connection
+
+        self._listener = await asyncio.to_thread(connect)
+        self._loop.add_reader(self._listener.fileno(), self._on_notify)
+        logger.info(f"Listening for events on '{CHANNEL}'")
+
+    def _on_notify(self) -> None:
+        try:
+            self._listener.poll()
+        except Exception as e:
+            logger.warning(f"Event listener connection lost: {e}")
+            self._close_listener()
+            self._reconnect = asyncio.ensure_future(self._reconnect_loop())
+            return
+        while self._listener.notifies:
+            notification = self._listener.notifies.pop(0)
+            try:
+                self._dispatch(json.loads(notification.payload))
+            except ValueError:
+                logger.warning(f"Ignoring malformed event payload: {notification.payload[:200]}")
+
+    async def _reconnect_loop(self) -> None:
+        delay = 1.0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+            except Exception as e:
+                logger.warning(f"Event listener reconnect failed: {e}")
+                delay = min(delay * 2, 30.0)
+                continue
+            # Anything published while disconnected is lost; have clients reload
+            self._dispatch([RESYNC])
+            self._reconnect = None
+            return
+
+    def _close_listener(self) -> None:
+        if self._listener is None:
+            return
+        try:
+            if self._loop is not None:
+                self._loop.remove_reader(self._listener.fileno())
+            self._listener.close()
+        except Exception:
+            pass
+        self._listener = None
+
+
+def create_broker() -> InMemoryBroker:
+    backend = settings.EVENTS_BROKER
+    if backend == "auto":
+        backend = "postgres" if engine.dialect.name == "postgresql" else "memory"
+    if backend == "postgres":
+        return PostgresBroker()
+    return InMemoryBroker()
+
+
+event_broker = create_broker()
+
+
+def publish(db: Session, events: List[Dict[str, Any]]) -> None:
+    """Queue change events on a session; they are delivered when it commits"""
+    if events:
+        event_broker.stage(db, events)
+
+
+def _changed(obj, attribute: str):
+    history = inspect(obj).attrs[attribute].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    if _value(old) == _value(new):
+        return None
+    return _value(old), _value(new)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_orm_changes(session: Session, flush_context) -> None:
+    events = []
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Sample):
+            status = _changed(obj, "status")
+            if status:
+                events.append({
+                    "type": "sample.status", "id": obj.id, "barcode": obj.barcode,
+                    "old": status[0], "new": status[1]
+                })
+            priority = _changed(obj, "queue_priority")
+            if priority and obj not in session.new:
+                events.append({
+                    "type": "sample.priority", "id": obj.id, "barcode": obj.barcode,
+                    "old": priority[0], "new": priority[1]
+                })
+        elif isinstance(obj, ExtractionPlate):
+            status = _changed(obj, "status")
+            if status:
+                events.append({
+                    "type": "plate.status", "id": obj.id, "plate_id": obj.plate_id,
+                    "old": status[0], "new": status[1]
+                })
+    publish(session, events)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _deliver_committed(session: Session) -> None:
+    events = session.info.pop(_PENDING, None)
+    if events:
+        event_broker.committed(events)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,137 @@
+"""
+Streaming CSV/XLSX export
+
+Export endpoints build a column query (db.query(label1, label2, ...)) with
+the same filters as their list endpoint and hand it to export_response().
+Rows are fetched from a server-side cursor in batches of EXPORT_BATCH_SIZE
+and written out as they arrive, so memory stays flat however large the
+table is and no ORM objects are created.
+
+CSV is streamed to the client chunk by chunk. XLSX uses openpyxl's
+write-only mode, which spools rows to a temporary file; the finished
+workbook is then streamed from that file. A sheet holds at most
+XLSX_MAX_ROWS rows (Excel's limit); longer exports continue on further
+sheets, each with the header row.
+
+Cell text comes from users, and spreadsheet programs run text starting
+with = + - @ as a formula: CSV cells like that are prefixed with ', and
+XLSX cells are written as text rather than as formulas.
+"""
+import csv
+import enum
+import io
+import tempfile
+from datetime import date, datetime, timezone
+from typing import Any, Iterable, Iterator, List, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query
+
+EXPORT_BATCH_SIZE = 1000
+CSV_CHUNK_SIZE = 64 * 1024
+FILE_CHUNK_SIZE = 256 * 1024
+XLSX_MAX_ROWS = 1048576  # Header row included
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _xlsx_value(sheet, value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # Excel has no time zones; write the UTC wall-clock time
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str) and value.startswith("="):
+        # openpyxl stores these as formulas; keep them text
+        from openpyxl.cell import WriteOnlyCell
+
+        cell = WriteOnlyCell(sheet, value)
+        cell.data_type = "s"
+        return cell
+    return value
+
+
+def _rows(query: Query) -> Iterator[Sequence[Any]]:
+    # yield_per turns on stream_results, so the driver uses a server-side cursor
+    yield from query.yield_per(EXPORT_BATCH_SIZE)
+
+
+def iter_csv(headers: List[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= CSV_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx(headers: List[str], rows: Iterable[Sequence[Any]], sheet_title: str) -> Iterator[bytes]:
+    from openpyxl import Workbook  # only needed for exports
+
+    workbook = Workbook(write_only=True)
+    sheets = 0
+    sheet_rows = XLSX_MAX_ROWS
+    for row in rows:
+        if sheet_rows == XLSX_MAX_ROWS:
+            sheets += 1
+            suffix = f" ({sheets})" if sheets > 1 else ""
+            sheet = workbook.create_sheet(title=sheet_title[:31 - len(suffix)] + suffix)
+            sheet.append(headers)
+            sheet_rows = 1
+        sheet.append([_xlsx_value(sheet, value) for value in row])
+        sheet_rows += 1
+    if not sheets:
+        workbook.create_sheet(title=sheet_title[:31]).append(headers)
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while chunk := output.read(FILE_CHUNK_SIZE):
+            yield chunk
+
+
+def export_response(query: Query, export_format: ExportFormat, name: str) -> StreamingResponse:
+    """
+    Stream the rows of a column query as a CSV or XLSX download
+
+    The labels of the query's columns become the header row.
+    """
+    headers = [column["name"] for column in query.column_descriptions]
+    rows = _rows(query)
+    if export_format == ExportFormat.XLSX:
+        content = iter_xlsx(headers, rows, sheet_title=name)
+    else:
+        content = iter_csv(headers, rows)
+
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format.value}"
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,66 @@
+"""
+Liveness and readiness probes
+
+/livez only proves the event loop is answering. /readyz checks the database
+with a pooled SELECT 1, bounded by READINESS_TIMEOUT_SECONDS and cached for
+READINESS_CACHE_SECONDS, so a busy load balancer costs at most one round trip
+per worker per cache period. Concurrent probes share the check in flight.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.base import engine
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessProbe:
+    """Cached database readiness check"""
+
+    def __init__(
+        self,
+        cache_seconds: float = settings.READINESS_CACHE_SECONDS,
+        timeout: float = settings.READINESS_TIMEOUT_SECONDS,
+    ):
+        self.cache_seconds = cache_seconds
+        self.timeout = timeout
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+
+    async def check(self) -> Dict[str, Any]:
+        if self._result is not None and time.monotonic() - self._checked_at < self.cache_seconds:
+            return self._result
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._run())
+        # shield: a client disconnecting must not cancel the check others wait on
+        return await asyncio.shield(self._inflight)
+
+    async def _run(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self._ping), timeout=self.timeout)
+            result = {"status": "ready", "database": "ok"}
+        except asyncio.TimeoutError:
+            result = {"status": "unavailable", "database": f"no response within {self.timeout}s"}
+        except Exception as e:
+            logger.warning(f"Readiness check failed: {e}")
+            result = {"status": "unavailable", "database": "error"}
+        result["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        self._result = result
+        self._checked_at = time.monotonic()
+        self._inflight = None
+        return result
+
+    @staticmethod
+    def _ping() -> None:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+
+readiness_probe = ReadinessProbe()
@@ -0,0 +1,340 @@
+"""
+Idempotency keys for bulk creation and import requests
+
+Clients that may resend a slow request (the browser, or nginx after a
+timeout) send an `Idempotency-Key` header with it. The first request with a
+key records it in the idempotency_keys table and runs; a successful (2xx)
+response is stored there for IDEMPOTENCY_TTL_SECONDS. A retry with the same
+key gets the stored response back, marked `Idempotent-Replayed: true`,
+without the endpoint running again. A retry that arrives while the first
+request is still running polls the row for up to IDEMPOTENCY_WAIT_SECONDS
+and then replays the response, or gets a 409 if the first request is still
+not done.
+
+Keys are scoped to the user in the bearer token, and a key sent again with
+a different method, path, query or body is a 422. Failed requests (non-2xx
+responses, exceptions) release their key so that a retry runs normally. A
+running request renews its lease every IDEMPOTENCY_LEASE_SECONDS / 3; when
+its worker dies the lease lapses and the next retry takes the key over.
+Expired keys are purged by the job workers (app.worker).
+
+Only the routes in IDEMPOTENT_ROUTES take part, and only when the header is
+sent; everything else passes straight through.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.audit import get_request_username
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
+from app.db.base import SessionLocal
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+CLAIM_ATTEMPTS = 5
+RETRY_AFTER_SECONDS = 5  # Suggested to duplicates that gave up waiting
+
+IDEMPOTENT_ROUTES = tuple(
+    re.compile(f"^{re.escape(settings.API_V1_STR)}{path}/?$")
+    for path in (r"/samples/bulk", r"/samples/bulk-import", r"/projects/with-attachments")
+)
+
+# Claim outcomes
+CLAIMED = "claimed"  # This request runs
+COMPLETED = "completed"  # Replay the stored response
+RUNNING = "running"  # Another request with the key is still running
+MISMATCH = "mismatch"  # The key was used for a different request
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    content_type: Optional[str]
+    body: bytes
+
+
+@dataclass
+class Claim:
+    outcome: str
+    key_id: Optional[int] = None
+    owner: Optional[str] = None
+    response: Optional[StoredResponse] = None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def fingerprint(method: str, path: str, query_string: bytes, content_type: Optional[str], body: bytes) -> str:
+    """Hash of what makes two requests the same; multipart boundaries are left out, they change per send"""
+    boundary = re.search(r"boundary=\"?([^\";]+)", content_type or "")
+    if boundary:
+        body = body.replace(boundary.group(1).encode("latin-1"), b"")
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query_string):
+        digest.update(part)
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def claim(username: str, key: str, request_fingerprint: str) -> Claim:
+    """Record the key for a new request, or report what the existing record holds"""
+    with SessionLocal() as db:
+        for _ in range(CLAIM_ATTEMPTS):
+            now, owner = _now(), uuid.uuid4().hex
+            lease = now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+            expires = now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+            record = IdempotencyKey(
+                username=username, key=key, fingerprint=request_fingerprint,
+                status=IdempotencyStatus.IN_PROGRESS, owner=owner, locked_until=lease, expires_at=expires,
+            )
+            try:
+                db.add(record)
+                db.commit()
+                return Claim(CLAIMED, record.id, owner)
+            except IntegrityError:
+                db.rollback()
+
+            existing = db.execute(
+                select(
+                    IdempotencyKey.id, IdempotencyKey.fingerprint, IdempotencyKey.status,
+                    IdempotencyKey.response_status, IdempotencyKey.response_content_type,
+                    IdempotencyKey.response_body,
+                    (IdempotencyKey.expires_at <= now).label("expired"),
+                    (IdempotencyKey.locked_until <= now).label("lapsed"),
+                ).where(IdempotencyKey.username == username, IdempotencyKey.key == key)
+            ).one_or_none()
+            if existing is None:
+                continue  # Released or purged in between; try the insert again
+            if not existing.expired:
+                if existing.fingerprint != request_fingerprint:
+                    return Claim(MISMATCH)
+                if existing.status == IdempotencyStatus.COMPLETED:
+                    return Claim(COMPLETED, existing.id, response=StoredResponse(
+                        existing.response_status, existing.response_content_type, existing.response_body or b""
+                    ))
+                if not existing.lapsed:
+                    return Claim(RUNNING, existing.id)
+
+            # Expired, or its request stopped renewing the lease: take the key over
+            taken = db.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.id == existing.id,
+                    or_(
+                        IdempotencyKey.expires_at <= now,
+                        and_(
+                            IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS,
+                            IdempotencyKey.locked_until <= now,
+                        ),
+                    ),
+                )
+                .values(
+                    fingerprint=request_fingerprint, status=IdempotencyStatus.IN_PROGRESS, owner=owner,
+                    locked_until=lease, expires_at=expires, response_status=None,
+                    response_content_type=None, response_body=None, completed_at=None,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            if taken:
+                return Claim(CLAIMED, existing.id, owner)
+    return Claim(RUNNING)
+
+
+def renew(key_id: int, owner: str) -> bool:
+    """Extend the lease of a running request; False if the key is no longer ours"""
+    with SessionLocal() as db:
+        renewed = db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == key_id, IdempotencyKey.owner == owner)
+            .values(locked_until=_now() + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return bool(renewed)
+
+
+def complete(key_id: int, owner: str, response: StoredResponse) -> None:
+    """Store the response for replays; the TTL starts now"""
+    now = _now()
+    with SessionLocal() as db:
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == key_id, IdempotencyKey.owner == owner)
+            .values(
+                status=IdempotencyStatus.COMPLETED, owner=None, locked_until=None,
+                response_status=response.status_code, response_content_type=response.content_type,
+                response_body=response.body, completed_at=now,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def release(key_id: int, owner: str) -> None:
+    """Forget the key of a failed request so that a retry runs it again"""
+    with SessionLocal() as db:
+        db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.id == key_id, IdempotencyKey.owner == owner)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def purge_expired_keys() -> int:
+    """Delete expired keys (periodic task of the job workers)"""
+    with SessionLocal() as db:
+        purged = db.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.expires_at <= _now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+    if purged:
+        logger.info(f"Purged {purged} expired idempotency key(s)")
+    return purged
+
+
+def _error(status_code: int, detail: str, headers: Optional[dict] = None) -> Response:
+    return ORJSONResponse(status_code=status_code, content={"detail": detail}, headers=headers)
+
+
+class IdempotencyMiddleware:
+    """Runs requests carrying an Idempotency-Key at most once and replays their response"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http" or scope["method"] != "POST"
+            or not any(route.match(scope["path"]) for route in IDEMPOTENT_ROUTES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        username = get_request_username(headers.get("authorization"), verify_exp=True) if key else None
+        if not key or not username:
+            # Without a key there is nothing to do; without a valid token the endpoint answers 401
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await _error(400, f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters")(scope, receive, send)
+            return
+
+        messages = await self._read_body(receive)
+        body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.request")
+        request_fingerprint = fingerprint(
+            scope["method"], scope["path"], scope.get("query_string", b""), headers.get("content-type"), body
+        )
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            result = await asyncio.to_thread(claim, username, key, request_fingerprint)
+            if result.outcome != RUNNING or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+
+        if result.outcome == COMPLETED:
+            stored = result.response
+            response = Response(
+                content=stored.body, status_code=stored.status_code,
+                media_type=stored.content_type, headers={REPLAYED_HEADER: "true"},
+            )
+        elif result.outcome == MISMATCH:
+            response = _error(422, f"This {IDEMPOTENCY_HEADER} was already used for a different request")
+        elif result.outcome == RUNNING:
+            response = _error(
+                409, f"A request with this {IDEMPOTENCY_HEADER} is still being processed",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        else:
+            await self._run(scope, self._replay(messages, receive), send, result)
+            return
+        await response(scope, receive, send)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> List[Message]:
+        messages = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request" or not message.get("more_body"):
+                return messages
+
+    @staticmethod
+    def _replay(messages: List[Message], receive: Receive) -> Receive:
+        pending = deque(messages)
+
+        async def replay() -> Message:
+            return pending.popleft() if pending else await receive()
+        return replay
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send, result: Claim) -> None:
+        start: Message = {}
+        chunks: List[bytes] = []
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        lease = asyncio.create_task(self._renew(result.key_id, result.owner))
+        completed = False
+        try:
+            await self.app(scope, receive, capture)
+            status_code = start.get("status", 500)
+            if 200 <= status_code < 300:
+                content_type = Headers(raw=start.get("headers", [])).get("content-type")
+                await asyncio.to_thread(
+                    complete, result.key_id, result.owner, StoredResponse(status_code, content_type, b"".join(chunks))
+                )
+                completed = True
+        except Exception as e:
+            if start:
+                # The response was sent; only storing it failed. A retry will run the request again.
+                logger.warning(f"Could not store idempotent response: {e}")
+            else:
+                raise
+        finally:
+            lease.cancel()
+            if not completed:
+                try:
+                    await asyncio.to_thread(release, result.key_id, result.owner)
+                except Exception as e:
+                    logger.warning(f"Could not release idempotency key {result.key_id}: {e}")
+
+    @staticmethod
+    async def _renew(key_id: int, owner: str) -> None:
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_LEASE_SECONDS / 3)
+            try:
+                if not await asyncio.to_thread(renew, key_id, owner):
+                    return
+            except Exception as e:
+                logger.warning(f"Could not renew idempotency key {key_id}: {e}")
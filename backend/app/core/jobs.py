@@ -0,0 +1,311 @@
+"""
+Durable background jobs
+
+Long operations (sample imports, import-file validation, bulk updates) can
+be queued as rows in the `jobs` table instead of running inside the request:
+
+    job = enqueue(db, "samples.bulk_import", {"samples": [...]}, user=current_user)
+    db.commit()
+    return job_accepted(job)
+
+Worker processes (`python -m app.worker`, or threads inside the API when
+JOB_EMBEDDED_WORKERS is set) claim queued jobs with
+SELECT ... FOR UPDATE SKIP LOCKED followed by a conditional UPDATE; on
+SQLite, which has no row locks, the conditional UPDATE alone decides which
+worker wins. A handler's writes, its result artifacts and the job's
+"succeeded" status are committed in one transaction, so a job that is
+retried never applies its changes twice.
+
+Handlers are registered with @job_handler and receive a JobContext with a
+session, the job's payload and user, progress reporting and artifact
+storage. Raising JobError (or HTTPException, for logic shared with an
+endpoint) fails the job without a retry; any other exception is retried
+with backoff up to the job's max_attempts. Running jobs send a heartbeat;
+jobs whose worker stops sending one for JOB_LEASE_SECONDS are requeued.
+"""
+import importlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import routing
+from app.db.base import SessionLocal
+from app.models.job import Job, JobArtifact, JobStatus
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Modules whose @job_handler functions the workers load
+HANDLER_MODULES = (
+    "app.api.api_v1.endpoints.samples",
+)
+
+PROGRESS_INTERVAL_SECONDS = 1.0  # Progress is written at most this often
+
+_handlers: Dict[str, Callable[["JobContext"], Any]] = {}
+
+
+class JobError(Exception):
+    """A job failure that retrying will not fix; `detail` becomes the job's error"""
+
+    def __init__(self, detail: Any):
+        super().__init__(str(detail))
+        self.detail = detail
+
+
+def job_handler(kind: str):
+    """Register a function as the handler for jobs of this kind"""
+    def register(func: Callable[["JobContext"], Any]):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def load_handlers() -> Dict[str, Callable[["JobContext"], Any]]:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    return _handlers
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    user: Optional[User] = None,
+    inputs: Optional[List[Tuple[str, str, str, bytes]]] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Add a queued job to the session (the caller commits)
+
+    `inputs` are (name, filename, media_type, content) files the handler
+    reads back with JobContext.input().
+    """
+    job = Job(
+        kind=kind,
+        status=JobStatus.QUEUED.value,
+        payload=json.dumps(payload, default=str),
+        run_after=_now(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        created_by_id=user.id if user else None,
+    )
+    for name, filename, media_type, content in inputs or []:
+        job.artifacts.append(JobArtifact(
+            name=name, filename=filename, media_type=media_type, size=len(content), content=content
+        ))
+    db.add(job)
+    db.flush()
+    return job
+
+
+def job_accepted(job: Job) -> JSONResponse:
+    """202 response pointing the client at the job's status endpoint"""
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"{settings.API_V1_STR}/jobs/{job.id}",
+        },
+    )
+
+
+class JobContext:
+    """What a handler gets to work with"""
+
+    def __init__(self, db: Session, job: Job, worker_id: str):
+        self.db = db
+        self.job = job
+        self.worker_id = worker_id
+        self.payload: Dict[str, Any] = json.loads(job.payload) if job.payload else {}
+        self._last_progress = 0.0
+
+    @property
+    def user(self) -> Optional[User]:
+        return self.job.created_by
+
+    def input(self, name: str = "input") -> JobArtifact:
+        artifact = self.db.execute(
+            select(JobArtifact).where(JobArtifact.job_id == self.job.id, JobArtifact.name == name)
+        ).scalar_one_or_none()
+        if artifact is None:
+            raise JobError(f"Job has no '{name}' file")
+        return artifact
+
+    def save_artifact(self, name: str, filename: str, media_type: str, content: bytes) -> None:
+        """Attach a result file; it is committed together with the job's success"""
+        self.db.add(JobArtifact(
+            job_id=self.job.id, name=name, filename=filename,
+            media_type=media_type, size=len(content), content=content
+        ))
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None, force: bool = False) -> None:
+        """Report progress; written in its own short transaction so clients see it while the job runs"""
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_progress = now
+        values: Dict[str, Any] = {"progress_done": done, "heartbeat_at": _now()}
+        if total is not None:
+            values["progress_total"] = total
+        if message is not None:
+            values["progress_message"] = message
+        _update_own_job(self.job.id, self.worker_id, values)
+
+
+def _update_own_job(job_id: int, worker_id: str, values: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING.value)
+            .values(**values)
+        )
+        db.commit()
+    except Exception as e:
+        # e.g. SQLite busy while the job's own transaction holds the write lock
+        db.rollback()
+        logger.debug(f"Could not update job {job_id}: {e}")
+    finally:
+        db.close()
+
+
+def claim_job(worker_id: str) -> Optional[int]:
+    """Take the oldest runnable queued job; returns its id, or None if there is nothing to do"""
+    db = SessionLocal()
+    try:
+        now = _now()
+        job_id = db.execute(
+            select(Job.id)
+            .where(Job.status == JobStatus.QUEUED.value, Job.run_after <= now)
+            .order_by(Job.run_after, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar()
+        if job_id is None:
+            db.rollback()
+            return None
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.QUEUED.value)
+            .values(
+                status=JobStatus.RUNNING.value,
+                locked_by=worker_id,
+                attempts=Job.attempts + 1,
+                started_at=now,
+                heartbeat_at=now,
+                error=None,
+            )
+        ).rowcount
+        db.commit()
+        return job_id if claimed else None
+    finally:
+        db.close()
+
+
+def requeue_stale_jobs() -> int:
+    """Put jobs whose worker stopped sending heartbeats back in the queue (or fail them)"""
+    db = SessionLocal()
+    try:
+        cutoff = _now() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        stale = (Job.status == JobStatus.RUNNING.value, Job.heartbeat_at < cutoff)
+        requeued = db.execute(
+            update(Job)
+            .where(*stale, Job.attempts < Job.max_attempts)
+            .values(status=JobStatus.QUEUED.value, locked_by=None, run_after=_now())
+        ).rowcount
+        db.execute(
+            update(Job)
+            .where(*stale, Job.attempts >= Job.max_attempts)
+            .values(
+                status=JobStatus.FAILED.value, locked_by=None, finished_at=_now(),
+                error="Worker stopped responding"
+            )
+        )
+        db.commit()
+        if requeued:
+            logger.warning(f"Requeued {requeued} job(s) from unresponsive workers")
+        return requeued
+    finally:
+        db.close()
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self, job_id: int, worker_id: str):
+        super().__init__(name=f"job-{job_id}-heartbeat", daemon=True)
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(settings.JOB_HEARTBEAT_SECONDS):
+            _update_own_job(self.job_id, self.worker_id, {"heartbeat_at": _now()})
+
+
+def _finish(db: Session, job_id: int, worker_id: str, values: Dict[str, Any]) -> bool:
+    # Only the worker that still holds the job may finish it
+    return db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING.value)
+        .values(locked_by=None, **values)
+    ).rowcount == 1
+
+
+def run_job(job_id: int, worker_id: str) -> None:
+    """Run a claimed job to completion, failure or its next retry"""
+    db = SessionLocal()
+    heartbeat = _Heartbeat(job_id, worker_id)
+    heartbeat.start()
+    try:
+        job = db.get(Job, job_id)
+        handler = _handlers.get(job.kind)
+        if job.created_by is not None:
+            routing.pin_writes_to(db, job.created_by.username)
+        try:
+            if handler is None:
+                raise JobError(f"No handler for job kind '{job.kind}'")
+            result = handler(JobContext(db, job, worker_id))
+            if _finish(db, job_id, worker_id, {
+                "status": JobStatus.SUCCEEDED.value,
+                "result": json.dumps(result, default=str),
+                "finished_at": _now(),
+                "progress_done": func.coalesce(Job.progress_total, Job.progress_done),
+            }):
+                db.commit()
+            else:
+                db.rollback()
+                logger.warning(f"Job {job_id} was taken over by another worker; discarding its result")
+            return
+        except (JobError, HTTPException) as e:
+            db.rollback()
+            detail = e.detail
+            values = {
+                "status": JobStatus.FAILED.value, "finished_at": _now(),
+                "error": detail if isinstance(detail, str) else json.dumps(detail, default=str)
+            }
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Job {job_id} ({job.kind}) failed")
+            if job.attempts < job.max_attempts:
+                delay = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+                values = {"status": JobStatus.QUEUED.value, "error": str(e), "run_after": _now() + timedelta(seconds=delay)}
+            else:
+                values = {"status": JobStatus.FAILED.value, "finished_at": _now(), "error": str(e)}
+        if _finish(db, job_id, worker_id, values):
+            db.commit()
+    finally:
+        heartbeat.stopped.set()
+        db.close()
@@ -0,0 +1,165 @@
+"""
+Storage of the sample and project activity logs
+
+sample_logs and project_logs get a row for every field change, comment and
+bulk operation. Reads of one sample's or project's log use the
+(sample_id, created_at DESC) / (project_id, created_at DESC) indexes.
+
+On PostgreSQL both tables are range-partitioned by month on created_at
+(add_log_partitions.py converts existing tables). ensure_partitions() keeps
+the partitions of the next LOG_PARTITION_PREMAKE_MONTHS months created ahead;
+rows outside every monthly partition go to the table's DEFAULT partition.
+
+compact_logs() exports each whole month older than LOG_RETENTION_DAYS to
+LOG_EXPORT_DIR/<table>/<table>-YYYY-MM.jsonl.gz, then removes it from the
+database - by dropping the month's partition where there is one, and by
+deleting the month's rows otherwise (SQLite, rows in the default partition).
+A month is exported and removed in one transaction and the file is renamed
+into place before the commit, so an interrupted run leaves the rows in the
+database, at worst also in a file; an existing export is never overwritten.
+The job workers run both every LOG_MAINTENANCE_INTERVAL_SECONDS (see
+app.worker).
+"""
+import gzip
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import orjson
+from sqlalchemy import Table, and_, delete, func, select, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.db.base import engine
+from app.models.project import ProjectLog
+from app.models.sample import SampleLog
+
+logger = logging.getLogger(__name__)
+
+LOG_TABLES = (SampleLog.__table__, ProjectLog.__table__)
+EXPORT_BATCH_SIZE = 5000
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def partition_name(table_name: str, month: datetime) -> str:
+    return f"{table_name}_p{month:%Y_%m}"
+
+
+def is_partitioned(conn: Connection, table_name: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name)"), {"name": table_name}
+    ).first() is not None
+
+
+def create_month_partitions(conn: Connection, table_name: str, first: datetime, last: datetime) -> None:
+    """The missing monthly partitions of a partitioned log table, for the months first..last"""
+    month = month_start(first)
+    while month <= last:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table_name, month)} PARTITION OF {table_name} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        month = add_months(month, 1)
+
+
+def ensure_partitions(now: Optional[datetime] = None) -> None:
+    """Create this month's and the next LOG_PARTITION_PREMAKE_MONTHS months' partitions (PostgreSQL)"""
+    if engine.dialect.name != "postgresql":
+        return
+    current = month_start(now or datetime.now(timezone.utc))
+    for table in LOG_TABLES:
+        try:
+            with engine.begin() as conn:
+                if is_partitioned(conn, table.name):
+                    create_month_partitions(
+                        conn, table.name, current, add_months(current, settings.LOG_PARTITION_PREMAKE_MONTHS)
+                    )
+        except Exception as e:
+            # e.g. the default partition already holds rows of a month
+            logger.warning(f"Could not create partitions of {table.name}: {e}")
+
+
+def _export_path(table_name: str, month: datetime) -> str:
+    """Where a month's export goes; a suffix is added rather than overwriting an earlier export"""
+    directory = os.path.join(settings.LOG_EXPORT_DIR, table_name)
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{table_name}-{month:%Y-%m}")
+    path, n = f"{base}.jsonl.gz", 1
+    while os.path.exists(path):
+        path, n = f"{base}.{n}.jsonl.gz", n + 1
+    return path
+
+
+def _export(conn: Connection, table: Table, where, path: str) -> int:
+    """Write the rows as gzipped JSON lines, in id order; no file when there are none"""
+    temp_path = f"{path}.tmp"
+    rows = 0
+    result = conn.execute(
+        select(table).where(where).order_by(table.c.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    with open(temp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as out:
+            for row in result.mappings():
+                out.write(orjson.dumps(dict(row)) + b"\n")
+                rows += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    if rows:
+        os.replace(temp_path, path)
+    else:
+        os.remove(temp_path)
+    return rows
+
+
+def _compact_month(table: Table, month: datetime) -> int:
+    created_at = table.c.created_at
+    in_month = and_(created_at >= month, created_at < add_months(month, 1))
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql" and not conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:key))"), {"key": f"compact_logs:{table.name}"}
+        ).scalar():
+            return 0  # Another worker is compacting this table
+        rows = _export(conn, table, in_month, _export_path(table.name, month))
+        partition = partition_name(table.name, month)
+        if is_partitioned(conn, table.name) and conn.execute(
+            text("SELECT to_regclass(:name)"), {"name": partition}
+        ).scalar():
+            conn.execute(text(f"ALTER TABLE {table.name} DETACH PARTITION {partition}"))
+            conn.execute(text(f"DROP TABLE {partition}"))
+        conn.execute(delete(table).where(in_month))
+    if rows:
+        logger.info(f"Compacted {rows} {table.name} row(s) of {month:%Y-%m}")
+    return rows
+
+
+def compact_logs(now: Optional[datetime] = None) -> int:
+    """Export and remove the log months past LOG_RETENTION_DAYS; returns the rows compacted"""
+    cutoff = month_start((now or datetime.now(timezone.utc)) - timedelta(days=settings.LOG_RETENTION_DAYS))
+    compacted = 0
+    for table in LOG_TABLES:
+        with engine.connect() as conn:
+            oldest = conn.execute(select(func.min(table.c.created_at)).where(table.c.created_at < cutoff)).scalar()
+        if oldest is None:
+            continue
+        month = month_start(oldest)
+        while month < cutoff:
+            compacted += _compact_month(table, month)
+            month = add_months(month, 1)
+    return compacted
+
+
+def maintain_log_storage() -> None:
+    """Create upcoming log partitions and compact expired months (periodic task of the job workers)"""
+    ensure_partitions()
+    compact_logs()
@@ -0,0 +1,166 @@
+"""
+Claiming extraction-queue samples for plates
+
+Plate builders reserve samples by pointing them at the plate
+(extraction_plate_ref_id) before laying out wells. Candidates are read with
+SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL, so two supervisors
+building plates at the same time each get a different set of samples
+without waiting on one another; rows another builder is holding are simply
+passed over. The claim itself is a conditional UPDATE (only samples still
+unassigned), which is all SQLite needs - it has no row locks and runs one
+writer at a time, and whichever claim reaches a sample first keeps it.
+
+Wells are protected by the unique (plate_id, well_position) constraint on
+plate_well_assignments, and edits of one plate are serialized by locking its
+row with lock_draft_plate().
+"""
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import select, union, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import ControlSample, ExtractionPlate, PlateStatus, PlateWellAssignment, Sample, SampleStatus
+
+CLAIM_ROUNDS = 3  # Re-reads of the queue when other builders took some of the candidates
+
+
+def lock_draft_plate(
+    db: Session, plate_id: int, not_draft_detail: str = "Can only edit plates in draft status"
+) -> ExtractionPlate:
+    """Load a plate for editing, locked until the caller commits; 404/400 unless it is a draft"""
+    plate = db.execute(
+        select(ExtractionPlate)
+        .where(ExtractionPlate.id == plate_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+    if not plate:
+        raise HTTPException(status_code=404, detail="Extraction plate not found")
+    if plate.status != PlateStatus.DRAFT:
+        raise HTTPException(status_code=400, detail=not_draft_detail)
+    return plate
+
+
+def occupied_wells(db: Session, plate_id: int) -> set:
+    """Well positions of the plate already holding a sample or control"""
+    return set(db.execute(
+        union(
+            select(PlateWellAssignment.well_position).where(PlateWellAssignment.plate_id == plate_id),
+            select(ControlSample.well_position).where(ControlSample.plate_id == plate_id),
+        )
+    ).scalars())
+
+
+def free_wells(occupied: set) -> Iterator[str]:
+    """Unoccupied wells of a 96-well plate, filled vertically by column (A1-H1, then A2-H2, ...)"""
+    for column in range(1, 13):
+        for row in "ABCDEFGH":
+            if f"{row}{column}" not in occupied:
+                yield f"{row}{column}"
+
+
+def next_free_well(wells: Iterator[str]) -> str:
+    well = next(wells, None)
+    if well is None:
+        raise HTTPException(status_code=400, detail="No available positions on plate")
+    return well
+
+
+def commit_plate(db: Session) -> None:
+    """Commit plate edits; a well taken by a concurrent edit is a 409 instead of a 500"""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="A well on this plate was taken by another change; reload the plate and try again"
+        )
+
+
+def _claim(db: Session, plate: ExtractionPlate, sample_ids: Sequence[int]) -> set:
+    """Point the still-unassigned samples among sample_ids at the plate; returns the ids this call took"""
+    if not sample_ids:
+        return set()
+    return set(db.execute(
+        update(Sample)
+        .where(Sample.id.in_(sample_ids), Sample.extraction_plate_ref_id.is_(None))
+        .values(extraction_plate_ref_id=plate.id, extraction_plate_id=plate.plate_id)
+        .returning(Sample.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+
+
+def claim_queue_samples(
+    db: Session,
+    plate: ExtractionPlate,
+    limit: int,
+    project_ids: Optional[Iterable[int]] = None,
+    sample_types: Optional[Iterable[str]] = None,
+) -> List[Sample]:
+    """
+    Reserve up to `limit` extraction-queue samples for the plate, earliest due first
+
+    Returns the claimed samples in queue order; the caller lays out their
+    wells and commits.
+    """
+    claimed: List[int] = []
+    for _ in range(CLAIM_ROUNDS if limit > 0 else 0):
+        wanted = limit - len(claimed)
+        query = (
+            select(Sample.id)
+            .where(
+                Sample.status == SampleStatus.EXTRACTION_QUEUE,
+                Sample.extraction_plate_ref_id.is_(None),
+            )
+            .order_by(Sample.due_date.nullslast(), Sample.project_id, Sample.id)
+            .limit(wanted)
+            .with_for_update(skip_locked=True)
+        )
+        if project_ids:
+            query = query.where(Sample.project_id.in_(list(project_ids)))
+        if sample_types:
+            query = query.where(Sample.sample_type.in_(list(sample_types)))
+        candidates = db.execute(query).scalars().all()
+        won = _claim(db, plate, candidates)
+        claimed.extend(sample_id for sample_id in candidates if sample_id in won)
+        if len(candidates) < wanted or len(won) == len(candidates):
+            break  # The queue is exhausted, or no candidate went to another builder
+    return _load(db, claimed)
+
+
+def claim_samples(db: Session, plate: ExtractionPlate, sample_ids: Sequence[int], queued_only: bool = True) -> List[Sample]:
+    """
+    Reserve specific samples for the plate
+
+    Samples already on a plate (this one included), held by another builder
+    or, with queued_only, not in the extraction queue are left out; compare
+    the result with sample_ids to tell.
+    """
+    query = (
+        select(Sample.id)
+        .where(Sample.id.in_(list(sample_ids)))
+        .with_for_update(skip_locked=True)
+    )
+    if queued_only:
+        query = query.where(Sample.status == SampleStatus.EXTRACTION_QUEUE)
+    won = _claim(db, plate, db.execute(query).scalars().all())
+    return _load(db, [sample_id for sample_id in dict.fromkeys(sample_ids) if sample_id in won])
+
+
+def _load(db: Session, sample_ids: List[int]) -> List[Sample]:
+    """The samples, in the given order, refreshed to show the claim"""
+    if not sample_ids:
+        return []
+    samples = {
+        sample.id: sample
+        for sample in db.execute(
+            select(Sample)
+            .where(Sample.id.in_(sample_ids))
+            .options(joinedload(Sample.project))
+            .execution_options(populate_existing=True)
+        ).scalars()
+    }
+    return [samples[sample_id] for sample_id in sample_ids]
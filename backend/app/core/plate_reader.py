@@ -0,0 +1,195 @@
+"""
+Plate-reader exports (Qubit, NanoDrop) for 96-well extraction plates
+
+A file is parsed into 8x12 NumPy grids, one per measurement, indexed
+[row A-H, column 1-12]; wells without a reading are NaN. Two layouts are
+recognised:
+
+- table: one row per well with a well column ("Well", "Well Position",
+  "Position", ...) and measurement columns such as "Original sample conc."
+  (Qubit) or "Nucleic Acid(ng/uL)", "260/280", "260/230" (NanoDrop)
+- grid: an 8x12 block with the row letters in the first column, as plate
+  readers print a single measurement (taken as the concentration)
+
+QC is evaluated for the whole plate at once with evaluate_qc(). This module
+imports NumPy at the top, so import it where it is used rather than at
+application startup.
+"""
+import csv
+import io
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+ROWS = "ABCDEFGH"
+COLUMNS = 12
+WELL_PATTERN = re.compile(r"^\s*([A-Ha-h])\s*0?([1-9]|1[0-2])\s*$")
+
+WELL_HEADERS = ("well", "well position", "position", "well id", "plate well")
+MEASUREMENT_HEADERS = {
+    "concentration": (
+        "original sample conc.", "original sample conc", "original sample concentration",
+        "nucleic acid(ng/ul)", "nucleic acid (ng/ul)", "nucleic acid conc.", "nucleic acid conc",
+        "concentration", "conc.", "conc", "ng/ul", "dsdna (ng/ul)",
+    ),
+    "ratio_260_280": ("260/280", "a260/a280", "a260/280"),
+    "ratio_260_230": ("260/230", "a260/a230", "a260/230"),
+}
+
+
+@dataclass
+class QCThresholds:
+    min_concentration: float = 1.0  # ng/µL, samples and positive controls
+    min_260_280: float = 1.6
+    max_260_280: float = 2.2
+    min_260_230: float = 1.0
+    max_negative_concentration: float = 0.5  # ng/µL, negative controls
+
+
+@dataclass
+class PlateReading:
+    concentration: np.ndarray
+    ratio_260_280: np.ndarray
+    ratio_260_230: np.ndarray
+    layout: str
+
+    @property
+    def wells_read(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.concentration)))
+
+
+def well_index(well: str) -> Optional[tuple]:
+    """(row, column) grid index of a well name such as "B7" or "b07", or None"""
+    match = WELL_PATTERN.match(str(well))
+    if not match:
+        return None
+    return ROWS.index(match.group(1).upper()), int(match.group(2)) - 1
+
+
+def _number(value) -> float:
+    """A reading as a float; below-range readings count as 0, unreadable ones as NaN"""
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(",", "")
+    if not text:
+        return np.nan
+    if text.startswith("<") or "low" in text.lower():
+        return 0.0
+    if text.startswith(">"):
+        text = text[1:]
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def read_rows(contents: bytes, filename: str) -> List[List]:
+    """All rows of the first sheet of an XLSX file, or of a CSV/TSV file"""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(io.BytesIO(contents), read_only=True, data_only=True)
+        try:
+            return [list(row) for row in workbook.worksheets[0].iter_rows(values_only=True)]
+        finally:
+            workbook.close()
+    text = contents.decode("utf-8-sig", errors="replace")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",\t;")
+    except csv.Error:
+        dialect = csv.excel
+    return [row for row in csv.reader(io.StringIO(text), dialect)]
+
+
+def _header(cell) -> str:
+    return re.sub(r"\s+", " ", str(cell or "")).strip().lower()
+
+
+def _parse_table(rows: Sequence[Sequence]) -> Optional[PlateReading]:
+    for header_index, row in enumerate(rows):
+        headers = [_header(cell) for cell in row]
+        well_column = next((i for i, h in enumerate(headers) if h in WELL_HEADERS), None)
+        if well_column is None:
+            continue
+        columns: Dict[str, int] = {}
+        for name, aliases in MEASUREMENT_HEADERS.items():
+            for alias in aliases:
+                if alias in headers:
+                    columns[name] = headers.index(alias)
+                    break
+        if "concentration" not in columns:
+            continue
+
+        grids = {name: np.full((len(ROWS), COLUMNS), np.nan) for name in MEASUREMENT_HEADERS}
+        positions, values = [], {name: [] for name in columns}
+        for data_row in rows[header_index + 1:]:
+            if well_column >= len(data_row):
+                continue
+            index = well_index(data_row[well_column])
+            if index is None:
+                continue
+            positions.append(index)
+            for name, column in columns.items():
+                values[name].append(_number(data_row[column]) if column < len(data_row) else np.nan)
+        if positions:
+            rows_index, cols_index = np.array(positions).T
+            for name, column_values in values.items():
+                grids[name][rows_index, cols_index] = column_values
+        return PlateReading(layout="table", **grids)
+    return None
+
+
+def _parse_grid(rows: Sequence[Sequence]) -> Optional[PlateReading]:
+    for start in range(len(rows) - len(ROWS) + 1):
+        block = rows[start:start + len(ROWS)]
+        labels = [str(row[0]).strip().upper() if row else "" for row in block]
+        if labels != list(ROWS):
+            continue
+        concentration = np.array([
+            [_number(row[c]) if c < len(row) else np.nan for c in range(1, COLUMNS + 1)]
+            for row in block
+        ], dtype=float)
+        empty = np.full(concentration.shape, np.nan)
+        return PlateReading(concentration=concentration, ratio_260_280=empty, ratio_260_230=empty.copy(), layout="grid")
+    return None
+
+
+def parse_plate_reader_file(contents: bytes, filename: str) -> PlateReading:
+    """Parse a plate-reader export into 8x12 grids; raises ValueError if no plate is found"""
+    rows = read_rows(contents, filename)
+    reading = _parse_table(rows) or _parse_grid(rows)
+    if reading is None:
+        raise ValueError(
+            "No plate found: expected a table with a Well column and a concentration column, "
+            "or an 8x12 grid with row labels A-H"
+        )
+    return reading
+
+
+def evaluate_qc(reading: PlateReading, thresholds: QCThresholds) -> Dict[str, np.ndarray]:
+    """
+    Pass/fail grids for every well at once
+
+    Returns boolean grids "sample" (samples and positive controls: enough
+    DNA, and purity ratios in range where measured) and "negative"
+    (negative controls: no more than a trace of DNA). Wells without a
+    concentration reading fail both, except negatives reported below range.
+    """
+    concentration = reading.concentration
+    has_reading = ~np.isnan(concentration)
+    r280, r230 = reading.ratio_260_280, reading.ratio_260_230
+    with np.errstate(invalid="ignore"):
+        purity_280 = np.isnan(r280) | ((r280 >= thresholds.min_260_280) & (r280 <= thresholds.max_260_280))
+        purity_230 = np.isnan(r230) | (r230 >= thresholds.min_260_230)
+        sample_pass = has_reading & (concentration >= thresholds.min_concentration) & purity_280 & purity_230
+        negative_pass = has_reading & (concentration <= thresholds.max_negative_concentration)
+    return {"sample": sample_pass, "negative": negative_pass}
+
+
+def value_at(grid: np.ndarray, index: tuple) -> Optional[float]:
+    value = grid[index]
+    return None if np.isnan(value) else round(float(value), 4)
@@ -0,0 +1,88 @@
+"""
+JSON responses rendered with orjson / pydantic-core instead of stdlib json
+
+ORJSONResponse is the application's default response class. For the large
+list endpoints, model_response() goes one step further: the models are
+written to JSON bytes directly by pydantic-core, skipping both FastAPI's
+dump-to-dicts pass and the separate json encoding of those dicts.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Optional
+
+import orjson
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+def _default(obj: Any) -> Any:
+    # Types orjson does not handle natively
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode(errors="replace")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
+@lru_cache(maxsize=None)
+def _adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
+def model_response(
+    content: Any,
+    annotation: Any,
+    status_code: int = 200,
+    headers: Optional[dict] = None,
+    background: Optional[BackgroundTask] = None,
+) -> Response:
+    """
+    Serialize content as `annotation` (e.g. List[SampleWithLabData]) in one pass
+
+    Model instances that are already validated are passed through as they
+    are; ORM objects and dicts are validated (from attributes) first. Keep
+    the same type as the route's response_model so the OpenAPI schema stays
+    accurate.
+    """
+    adapter = _adapter(annotation)
+    value = adapter.validate_python(content, from_attributes=True)
+    return Response(
+        content=adapter.dump_json(value),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+        background=background,
+    )
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves some paths alone (event streams must not be buffered)"""
+
+    def __init__(self, app: ASGIApp, exclude_paths: tuple = (), **kwargs: Any) -> None:
+        super().__init__(app, **kwargs)
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,44 @@
+"""
+Gunicorn worker class of the API (worker_class in gunicorn.conf.py)
+
+On shutdown - SIGTERM from a deploy, or max_requests recycling - uvicorn
+first waits for the open connections to finish and only then runs the
+lifespan shutdown (event broker, access log flush). Event streams
+(/api/v1/events/queues) stay open for as long as the browser tab, so that
+wait would last until gunicorn's graceful_timeout kills the worker and the
+shutdown hooks never run. Here the streams are ended as soon as the
+shutdown starts (clients reconnect to another worker after their `retry:`
+delay), and requests still running after SHUTDOWN_GRACE_SECONDS are
+cancelled.
+"""
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+from app.core.config import settings
+from app.core.events import event_broker
+
+
+class LimsServer(Server):
+    """uvicorn Server that ends the event streams before draining connections"""
+
+    async def shutdown(self, sockets=None) -> None:
+        event_broker.close_subscriptions()
+        await super().shutdown(sockets=sockets)
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """uvicorn's gunicorn worker, running LimsServer with a bounded graceful shutdown"""
+
+    CONFIG_KWARGS = {**BaseUvicornWorker.CONFIG_KWARGS, "timeout_graceful_shutdown": settings.SHUTDOWN_GRACE_SECONDS}
+
+    async def _serve(self) -> None:
+        # uvicorn.workers.UvicornWorker._serve, with LimsServer
+        self.config.app = self.wsgi
+        server = LimsServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
@@ -0,0 +1,269 @@
+"""
+Incremental stage-aging aggregates built from sample status_change logs
+
+refresh_stage_analytics() reads the status_change rows of sample_logs past
+its watermark (analytics_watermarks, by log id) and maintains:
+
+- sample_stage_intervals: one row per sample and stage visit, with entry and
+  exit time; a sample's open row is the stage it is in now
+- stage_daily_counts: samples entering and leaving each stage per day
+
+Only the new logs, the open intervals of the samples they touch and the
+affected daily rows are read, so a pass costs the size of the increment.
+
+Log ids are assigned when a row is inserted but become visible when its
+transaction commits, so the id watermark must not move past a log that is
+still in flight. Passes only read up to the watermark's settled_id, which
+is moved with transaction snapshots rather than timestamps (see
+_advance_settled): a long transaction holding a low id holds the
+aggregates back until it commits or rolls back, instead of being skipped.
+The workers run a pass every STAGE_ANALYTICS_INTERVAL_SECONDS (see
+app.worker); the watermark row is locked while it is advanced, so
+concurrent passes wait for each other instead of double counting.
+"""
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.base import SessionLocal
+from app.models.analytics import AnalyticsWatermark, SampleStageInterval, StageDailyCount
+from app.models.sample import Sample, SampleLog, SampleStatus
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = "sample_stage_intervals"
+BATCH_SIZE = 5000
+LOOKUP_BATCH_SIZE = 1000  # Ids per IN (...) lookup
+SETTLE_POLL_SECONDS = 0.05
+
+# Lower-cased member names and values of SampleStatus -> value
+STAGES = {
+    **{status.name.lower(): status.value for status in SampleStatus},
+    **{status.value.lower(): status.value for status in SampleStatus},
+}
+
+
+def stage_of(value: Optional[str]) -> Optional[str]:
+    """
+    The SampleStatus value a logged status refers to
+
+    Logs hold the status as it was stringified at the time: a value
+    ("extraction_queue"), a member name ("EXTRACTION_QUEUE") or str() of the
+    enum member ("SampleStatus.EXTRACTION_QUEUE"), in any case. None when it
+    is not a SampleStatus.
+    """
+    if not value:
+        return None
+    text = value.strip()
+    if text.startswith("SampleStatus."):
+        text = text[len("SampleStatus."):]
+    return STAGES.get(text.lower())
+
+
+def as_utc(moment: datetime) -> datetime:
+    """SQLite hands back naive UTC timestamps, PostgreSQL aware ones"""
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def _chunks(ids: List[int]):
+    for start in range(0, len(ids), LOOKUP_BATCH_SIZE):
+        yield ids[start:start + LOOKUP_BATCH_SIZE]
+
+
+def _lock_watermark(db: Session) -> Optional[AnalyticsWatermark]:
+    watermark = db.execute(
+        select(AnalyticsWatermark).where(AnalyticsWatermark.name == WATERMARK).with_for_update()
+    ).scalar_one_or_none()
+    if watermark is not None:
+        return watermark
+    try:
+        db.add(AnalyticsWatermark(name=WATERMARK, last_id=0))
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # Another pass created it first
+    return db.execute(
+        select(AnalyticsWatermark).where(AnalyticsWatermark.name == WATERMARK).with_for_update()
+    ).scalar_one()
+
+
+def _advance_settled(db: Session) -> bool:
+    """
+    Move the watermark's settled_id forward, if the transactions below it are
+    finished; returns whether every log visible now is settled
+
+    PostgreSQL: a pass records the highest visible log id (pending_id); the
+    next pass records the snapshot xmax (pending_xmax) - by then every
+    transaction that drew an id up to pending_id has an xid below it - and
+    once the snapshot xmin reaches pending_xmax all of them have committed
+    or rolled back, so no log up to pending_id can still appear. SQLite runs
+    one writer at a time, so every visible id is settled.
+
+    Each step is its own transaction, so calling again right away works
+    with a fresh snapshot: with no older transaction running, three calls
+    settle everything visible at the first.
+    """
+    watermark = _lock_watermark(db)
+    max_id = db.execute(select(func.max(SampleLog.id))).scalar() or 0
+    if db.get_bind().dialect.name != "postgresql":
+        watermark.settled_id = max(watermark.settled_id or 0, max_id)
+        db.commit()
+        return True
+    xmin, xmax = db.execute(text(
+        "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint, "
+        "pg_snapshot_xmax(pg_current_snapshot())::text::bigint"
+    )).one()
+    if watermark.pending_xmax is not None and xmin >= watermark.pending_xmax:
+        watermark.settled_id = watermark.pending_id
+        watermark.pending_id = watermark.pending_xmax = None
+    if watermark.pending_id is None:
+        if max_id > (watermark.settled_id or 0):
+            watermark.pending_id = max_id
+    elif watermark.pending_xmax is None:
+        watermark.pending_xmax = xmax
+    settled = (watermark.settled_id or 0) >= max_id
+    db.commit()
+    return settled
+
+
+def _apply_batch(db: Session, batch_size: int) -> Tuple[int, bool]:
+    """Apply up to batch_size settled logs in one transaction; returns (applied, more_waiting)"""
+    watermark = _lock_watermark(db)
+    settled_id = watermark.settled_id or 0
+    if watermark.last_id >= settled_id:
+        db.rollback()
+        return 0, False
+    settled = db.execute(
+        select(SampleLog.id, SampleLog.sample_id, SampleLog.old_value, SampleLog.new_value, SampleLog.created_at)
+        .where(
+            SampleLog.log_type == "status_change",
+            SampleLog.id > watermark.last_id,
+            SampleLog.id <= settled_id,
+            SampleLog.created_at.isnot(None)
+        )
+        .order_by(SampleLog.id)
+        .limit(batch_size)
+    ).all()
+    more = len(settled) == batch_size
+
+    sample_ids = sorted({log.sample_id for log in settled})
+    samples: Dict[int, Tuple] = {}
+    open_intervals: Dict[int, dict] = {}
+    for chunk in _chunks(sample_ids):
+        for row in db.execute(select(Sample.id, Sample.project_id, Sample.created_at).where(Sample.id.in_(chunk))):
+            samples[row.id] = row
+        for row in db.execute(
+            select(
+                SampleStageInterval.id, SampleStageInterval.sample_id,
+                SampleStageInterval.stage, SampleStageInterval.entered_at
+            ).where(SampleStageInterval.sample_id.in_(chunk), SampleStageInterval.exited_at.is_(None))
+        ):
+            open_intervals[row.sample_id] = {"id": row.id, "stage": row.stage, "entered_at": as_utc(row.entered_at)}
+
+    new_intervals: List[dict] = []
+    closed: List[dict] = []
+    counts: Dict[Tuple[str, date], List[int]] = defaultdict(lambda: [0, 0])  # (stage, day) -> [entered, exited]
+
+    def enter(sample, stage: str, moment: datetime) -> None:
+        interval = {
+            "sample_id": sample.id, "project_id": sample.project_id, "stage": stage,
+            "entered_at": moment, "exited_at": None, "duration_seconds": None,
+        }
+        new_intervals.append(interval)
+        open_intervals[sample.id] = interval
+        counts[(stage, moment.date())][0] += 1
+
+    for log in settled:
+        sample = samples.get(log.sample_id)
+        new_stage = stage_of(log.new_value)
+        if sample is None or new_stage is None:
+            continue
+        moment = as_utc(log.created_at)
+        current = open_intervals.get(sample.id)
+        if current is None:
+            # First transition seen for this sample: it was in the old stage since creation
+            old_stage = stage_of(log.old_value)
+            if old_stage and old_stage != new_stage:
+                created = as_utc(sample.created_at) if sample.created_at else moment
+                enter(sample, old_stage, min(created, moment))
+                current = open_intervals[sample.id]
+        elif current["stage"] == new_stage:
+            continue
+        if current is not None:
+            current["exited_at"] = moment
+            current["duration_seconds"] = max((moment - current["entered_at"]).total_seconds(), 0.0)
+            counts[(current["stage"], moment.date())][1] += 1
+            if "id" in current:
+                closed.append(current)
+        enter(sample, new_stage, moment)
+
+    if closed:
+        db.execute(update(SampleStageInterval), [
+            {"id": c["id"], "exited_at": c["exited_at"], "duration_seconds": c["duration_seconds"]} for c in closed
+        ])
+    if new_intervals:
+        db.execute(insert(SampleStageInterval), new_intervals)
+
+    if counts:
+        stages = {stage for stage, _ in counts}
+        days = {day for _, day in counts}
+        existing = {
+            (row.stage, row.day): row
+            for row in db.execute(
+                select(StageDailyCount.id, StageDailyCount.stage, StageDailyCount.day,
+                       StageDailyCount.entered, StageDailyCount.exited)
+                .where(StageDailyCount.stage.in_(stages), StageDailyCount.day.in_(days))
+            )
+        }
+        updates, inserts = [], []
+        for (stage, day), (entered, exited) in counts.items():
+            row = existing.get((stage, day))
+            if row is None:
+                inserts.append({"stage": stage, "day": day, "entered": entered, "exited": exited})
+            else:
+                updates.append({"id": row.id, "entered": row.entered + entered, "exited": row.exited + exited})
+        if updates:
+            db.execute(update(StageDailyCount), updates)
+        if inserts:
+            db.execute(insert(StageDailyCount), inserts)
+
+    watermark.last_id = settled[-1].id if more else settled_id
+    db.commit()
+    return len(settled), more
+
+
+def refresh_stage_analytics(
+    db: Optional[Session] = None, batch_size: int = BATCH_SIZE, settle_wait: float = 0.0
+) -> int:
+    """
+    Bring the stage aggregates up to date; returns the number of logs applied
+
+    With settle_wait, keeps advancing the settled id for up to that many
+    seconds until every log visible now can be applied; otherwise (the
+    periodic passes) takes one step and leaves the rest to the next pass.
+    """
+    session = db or SessionLocal()
+    applied = 0
+    try:
+        deadline = time.monotonic() + settle_wait
+        while not _advance_settled(session) and time.monotonic() < deadline:
+            time.sleep(SETTLE_POLL_SECONDS)
+        while True:
+            count, more = _apply_batch(session, batch_size)
+            applied += count
+            if not more:
+                break
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if db is None:
+            session.close()
+    if applied:
+        logger.info(f"Stage analytics: applied {applied} status change(s)")
+    return applied
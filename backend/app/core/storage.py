@@ -0,0 +1,344 @@
+"""
+Storage box occupancy
+
+Each registered box (storage_boxes) keeps its grid size and an occupancy
+bitmap: bit i is set when position i - row-major from A1, so A1, A2, ...,
+B1, ... - is taken by a sample or a reservation. Finding free positions
+reads only the box rows, never the storage_locations table.
+
+Bitmap changes are compare-and-swap updates on the box's version column,
+retried on a fresh read when another transaction got there first, so they
+are safe inside the caller's transaction on PostgreSQL and SQLite alike.
+Reserving checks that the chosen positions are still free as it takes them;
+if another reservation won a position, what was taken so far is given back
+and the search starts over.
+
+A position is taken when its storage location is unavailable or holds a
+(live) sample. Every path that changes either calls sync_locations(), and
+reserving double-checks the positions it picked against storage_locations:
+one found taken there keeps its bit and the search starts over.
+"""
+import re
+import string
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import or_, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models.storage import StorageBox, StorageLocation
+
+POSITION_PATTERN = re.compile(r"^\s*([A-Za-z])\s*0*(\d+)\s*$")
+CHANGE_ATTEMPTS = 10
+RESERVE_ATTEMPTS = 5
+LOOKUP_BATCH_SIZE = 500
+
+BoxKey = Tuple[str, str, str]
+SlotKey = Tuple[str, str, str, Optional[str]]
+
+
+class StorageFull(Exception):
+    """Not enough free positions for the request"""
+
+
+class StorageConflict(Exception):
+    """Concurrent changes kept a box from being updated"""
+
+
+def capacity(box: StorageBox) -> int:
+    return box.rows * box.columns
+
+
+def position_name(box: StorageBox, index: int) -> str:
+    return f"{string.ascii_uppercase[index // box.columns]}{index % box.columns + 1}"
+
+
+def position_index(box: StorageBox, position: Optional[str]) -> Optional[int]:
+    """Grid index of "B7" (or of a plain slot number, 1-based), None if not on the grid"""
+    if not position:
+        return None
+    match = POSITION_PATTERN.match(position)
+    if match:
+        row = string.ascii_uppercase.index(match.group(1).upper())
+        column = int(match.group(2)) - 1
+        if row < box.rows and 0 <= column < box.columns:
+            return row * box.columns + column
+        return None
+    if position.strip().isdigit():
+        index = int(position) - 1
+        return index if 0 <= index < capacity(box) else None
+    return None
+
+
+def _bits(occupancy: bytes) -> int:
+    return int.from_bytes(occupancy or b"", "little")
+
+
+def _bytes(bits: int, size: int) -> bytes:
+    return bits.to_bytes((size + 7) // 8, "little")
+
+
+def occupied_positions(box: StorageBox) -> List[str]:
+    bits = _bits(box.occupancy)
+    return [position_name(box, i) for i in range(capacity(box)) if bits >> i & 1]
+
+
+def _taken():
+    """Whether a storage location's position is taken: marked unavailable or holding a sample"""
+    return or_(StorageLocation.is_available == False, StorageLocation.samples.any())
+
+
+def _taken_ids(db: Session, location_ids: List[int]) -> Set[int]:
+    """Which of these storage locations are taken"""
+    taken = set()
+    for start in range(0, len(location_ids), LOOKUP_BATCH_SIZE):
+        taken.update(db.execute(
+            select(StorageLocation.id).where(
+                StorageLocation.id.in_(location_ids[start:start + LOOKUP_BATCH_SIZE]), _taken()
+            )
+        ).scalars())
+    return taken
+
+
+def _occupied_mask(db: Session, box: StorageBox) -> int:
+    """Positions of the box taken by samples or marked unavailable, from storage_locations"""
+    mask = 0
+    for location in db.query(StorageLocation).filter(
+        StorageLocation.freezer == box.freezer,
+        StorageLocation.shelf == box.shelf,
+        StorageLocation.box == box.box,
+        _taken(),
+    ):
+        index = position_index(box, location.position)
+        if index is not None:
+            mask |= 1 << index
+    return mask
+
+
+def create_box(db: Session, freezer: str, shelf: str, box: str, rows: int, columns: int) -> StorageBox:
+    """Register a box; positions already holding samples start out occupied (the caller commits)"""
+    storage_box = StorageBox(freezer=freezer, shelf=shelf, box=box, rows=rows, columns=columns, version=0)
+    bits = _occupied_mask(db, storage_box)
+    storage_box.occupancy = _bytes(bits, capacity(storage_box))
+    storage_box.free_count = capacity(storage_box) - bin(bits).count("1")
+    db.add(storage_box)
+    db.flush()
+    return storage_box
+
+
+def _change_bits(db: Session, box_id: int, set_mask: int = 0, clear_mask: int = 0, require_free: bool = False) -> bool:
+    """
+    Set and clear occupancy bits of one box
+
+    With require_free, returns False (and changes nothing) if any position
+    in set_mask is already taken.
+    """
+    for _ in range(CHANGE_ATTEMPTS):
+        row = db.execute(
+            select(StorageBox.version, StorageBox.occupancy, StorageBox.rows, StorageBox.columns)
+            .where(StorageBox.id == box_id)
+        ).one()
+        bits = _bits(row.occupancy)
+        if require_free and bits & set_mask:
+            return False
+        size = row.rows * row.columns
+        new_bits = (bits | set_mask) & ~clear_mask & ((1 << size) - 1)
+        changed = db.execute(
+            update(StorageBox)
+            .where(StorageBox.id == box_id, StorageBox.version == row.version)
+            .values(
+                occupancy=_bytes(new_bits, size),
+                free_count=size - bin(new_bits).count("1"),
+                version=row.version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if changed:
+            return True
+    raise StorageConflict(f"Storage box {box_id} is being changed by other requests; try again")
+
+
+def _boxes(db: Session, keys: Iterable[BoxKey]) -> Dict[BoxKey, StorageBox]:
+    keys = list(set(keys))
+    boxes = {}
+    for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        for box in db.execute(
+            select(StorageBox).where(
+                tuple_(StorageBox.freezer, StorageBox.shelf, StorageBox.box).in_(keys[start:start + LOOKUP_BATCH_SIZE])
+            )
+        ).scalars():
+            boxes[(box.freezer, box.shelf, box.box)] = box
+    return boxes
+
+
+def load_locations(db: Session, keys: Iterable[SlotKey]) -> Dict[SlotKey, StorageLocation]:
+    """Existing storage_locations rows for these slots, fetched box by box in a few queries"""
+    box_keys = list({key[:3] for key in keys})
+    locations = {}
+    for start in range(0, len(box_keys), LOOKUP_BATCH_SIZE):
+        for location in db.execute(
+            select(StorageLocation).where(
+                tuple_(StorageLocation.freezer, StorageLocation.shelf, StorageLocation.box)
+                .in_(box_keys[start:start + LOOKUP_BATCH_SIZE])
+            )
+        ).scalars():
+            locations[(location.freezer, location.shelf, location.box, location.position)] = location
+    return locations
+
+
+def mark_occupied(db: Session, keys: Iterable[SlotKey]) -> None:
+    """Set the bits of these slots in their (registered) boxes"""
+    masks: Dict[BoxKey, int] = defaultdict(int)
+    keys = list(keys)
+    boxes = _boxes(db, (key[:3] for key in keys))
+    for key in keys:
+        box = boxes.get(key[:3])
+        index = position_index(box, key[3]) if box else None
+        if index is not None:
+            masks[key[:3]] |= 1 << index
+    for box_key, mask in masks.items():
+        _change_bits(db, boxes[box_key].id, set_mask=mask)
+
+
+def sync_locations(db: Session, location_ids: Iterable[Optional[int]]) -> None:
+    """Set or clear the bits of these locations from their current state (after samples moved in or out)"""
+    location_ids = list({location_id for location_id in location_ids if location_id is not None})
+    rows = []
+    for start in range(0, len(location_ids), LOOKUP_BATCH_SIZE):
+        rows += db.execute(
+            select(StorageLocation.freezer, StorageLocation.shelf, StorageLocation.box,
+                   StorageLocation.position, _taken().label("taken"))
+            .where(StorageLocation.id.in_(location_ids[start:start + LOOKUP_BATCH_SIZE]))
+        ).all()
+    boxes = _boxes(db, ((row.freezer, row.shelf, row.box) for row in rows))
+    set_masks: Dict[int, int] = defaultdict(int)
+    clear_masks: Dict[int, int] = defaultdict(int)
+    for row in rows:
+        box = boxes.get((row.freezer, row.shelf, row.box))
+        index = position_index(box, row.position) if box else None
+        if index is not None:
+            (set_masks if row.taken else clear_masks)[box.id] |= 1 << index
+    for box_id in set_masks.keys() | clear_masks.keys():
+        _change_bits(db, box_id, set_mask=set_masks[box_id], clear_mask=clear_masks[box_id])
+
+
+def release(db: Session, locations: Iterable[StorageLocation]) -> None:
+    """Make these locations available again and clear their bits"""
+    locations = list(locations)
+    boxes = _boxes(db, ((l.freezer, l.shelf, l.box) for l in locations))
+    masks: Dict[int, int] = defaultdict(int)
+    for location in locations:
+        location.is_available = True
+        box = boxes.get((location.freezer, location.shelf, location.box))
+        index = position_index(box, location.position) if box else None
+        if index is not None:
+            masks[box.id] |= 1 << index
+    for box_id, mask in masks.items():
+        _change_bits(db, box_id, clear_mask=mask)
+
+
+def find_free_slots(
+    db: Session,
+    count: int,
+    freezer: Optional[str] = None,
+    shelf: Optional[str] = None,
+    contiguous: bool = True,
+) -> List[Tuple[StorageBox, List[int]]]:
+    """
+    Plan `count` free positions, in freezer/shelf/box order
+
+    With contiguous, the first box with `count` consecutive free positions
+    wins; otherwise (or if no box has such a run) boxes are filled in order
+    from their first free position. Raises StorageFull if there is not
+    enough room.
+    """
+    query = select(StorageBox).where(StorageBox.free_count > 0)
+    if freezer:
+        query = query.where(StorageBox.freezer == freezer)
+    if shelf:
+        query = query.where(StorageBox.shelf == shelf)
+    boxes = db.execute(
+        query.order_by(StorageBox.freezer, StorageBox.shelf, StorageBox.box, StorageBox.id)
+        .execution_options(populate_existing=True)
+    ).scalars().all()
+
+    if contiguous:
+        run = (1 << count) - 1
+        for box in boxes:
+            size = capacity(box)
+            if box.free_count < count:
+                continue
+            free = ~_bits(box.occupancy) & ((1 << size) - 1)
+            for start in range(size - count + 1):
+                if free >> start & run == run:
+                    return [(box, list(range(start, start + count)))]
+
+    plan, needed = [], count
+    for box in boxes:
+        bits = _bits(box.occupancy)
+        free = [i for i in range(capacity(box)) if not bits >> i & 1][:needed]
+        if free:
+            plan.append((box, free))
+            needed -= len(free)
+        if not needed:
+            return plan
+    raise StorageFull(f"Only {count - needed} free position(s) available, {count} requested")
+
+
+def reserve_slots(
+    db: Session,
+    count: int,
+    freezer: Optional[str] = None,
+    shelf: Optional[str] = None,
+    contiguous: bool = True,
+    notes: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> List[StorageLocation]:
+    """Take `count` free positions and return their (unavailable) storage locations; the caller commits"""
+    conflicts = 0
+    while True:
+        plan = find_free_slots(db, count, freezer, shelf, contiguous)
+        taken = []
+        for box, indices in plan:
+            mask = sum(1 << i for i in indices)
+            if not _change_bits(db, box.id, set_mask=mask, require_free=True):
+                break
+            taken.append((box, mask))
+        else:
+            picked = [
+                (box, index, (box.freezer, box.shelf, box.box, position_name(box, index)))
+                for box, indices in plan for index in indices
+            ]
+            existing = load_locations(db, [slot for _, _, slot in picked])
+            occupied = _taken_ids(db, [existing[slot].id for _, _, slot in picked if slot in existing])
+            keep: Dict[int, int] = defaultdict(int)
+            for box, index, slot in picked:
+                if slot in existing and existing[slot].id in occupied:
+                    keep[box.id] |= 1 << index
+            if not keep:
+                break
+            # The bitmap was behind storage_locations: those positions keep their bits, the rest is given back
+            for box, mask in taken:
+                _change_bits(db, box.id, clear_mask=mask & ~keep[box.id])
+            continue
+        # Lost a position to another reservation: give back what we took and plan again
+        for box, mask in taken:
+            _change_bits(db, box.id, clear_mask=mask)
+        conflicts += 1
+        if conflicts == RESERVE_ATTEMPTS:
+            raise StorageConflict("Storage is being reserved by other requests; try again")
+
+    locations = []
+    for _, _, slot in picked:
+        location = existing.get(slot)
+        if location is None:
+            location = StorageLocation(
+                freezer=slot[0], shelf=slot[1], box=slot[2], position=slot[3], created_by_id=user_id
+            )
+            db.add(location)
+        location.is_available = False
+        location.notes = notes or location.notes
+        location.updated_by_id = user_id
+        locations.append(location)
+    db.flush()
+    return locations
@@ -0,0 +1,51 @@
+"""
+Single-use tickets for the event streams
+
+EventSource cannot send an Authorization header, so a stream is opened with
+`?ticket=` instead: the client asks POST /api/v1/events/ticket (with its
+bearer token) for a ticket and opens the stream with it right away. Unlike
+the access token, a ticket is worthless once it shows up in an access log -
+it expires after STREAM_TICKET_EXPIRE_SECONDS and can be redeemed once, on
+any worker (tickets live in the database).
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.stream_ticket import StreamTicket
+
+
+def _hash(ticket: str) -> str:
+    return hashlib.sha256(ticket.encode()).hexdigest()
+
+
+def issue_ticket(db: Session, username: str) -> str:
+    """A new ticket for the user; also clears the expired ones"""
+    now = datetime.now(timezone.utc)
+    ticket = secrets.token_urlsafe(32)
+    db.execute(delete(StreamTicket).where(StreamTicket.expires_at <= now))
+    db.add(StreamTicket(
+        ticket_hash=_hash(ticket),
+        username=username,
+        expires_at=now + timedelta(seconds=settings.STREAM_TICKET_EXPIRE_SECONDS)
+    ))
+    db.commit()
+    return ticket
+
+
+def redeem_ticket(db: Session, ticket: str) -> Optional[str]:
+    """The username of a valid ticket, which is used up; None if it is unknown, expired or already used"""
+    now = datetime.now(timezone.utc)
+    valid = (StreamTicket.ticket_hash == _hash(ticket), StreamTicket.expires_at > now)
+    username = db.execute(select(StreamTicket.username).where(*valid)).scalar_one_or_none()
+    if username is None:
+        return None
+    # Only the request whose delete removes the row gets in
+    redeemed = db.execute(delete(StreamTicket).where(*valid)).rowcount == 1
+    db.commit()
+    return username if redeemed else None
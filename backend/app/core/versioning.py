@@ -0,0 +1,155 @@
+"""
+Versioned reference data and conditional GET
+
+Each reference-data resource (sample types, clients, employees, client
+project configs) has a change counter in the resource_versions table. Write
+endpoints call bump_version() before committing; list endpoints declare
+Depends(conditional_get(...)) ahead of their other dependencies, which tags
+the response with an ETag built from the counter and answers a matching
+If-None-Match with 304 before the endpoint (or the user lookup) runs.
+
+Counters are cached per process for REFERENCE_VERSION_TTL_SECONDS, so a
+revalidation normally costs no database access at all. A worker drops its
+cached counters as soon as its own write commits; other workers pick the new
+version up within the TTL.
+"""
+import logging
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.audit import get_request_username
+from app.core.config import settings
+from app.db.base import SessionLocal, engine
+from app.models.base import ResourceVersion
+
+logger = logging.getLogger(__name__)
+
+# Resource names shared by the readers and writers
+SAMPLE_TYPES = "sample_types"
+CLIENTS = "clients"
+EMPLOYEES = "employees"
+CLIENT_PROJECT_CONFIGS = "client_project_configs"
+
+_cache: Dict[str, Tuple[int, float]] = {}
+_lock = threading.Lock()
+
+
+def bump_version(db: Session, *resources: str) -> None:
+    """
+    Increment the version of each resource in the caller's transaction
+
+    The new version becomes visible together with the data change when the
+    session commits, and is discarded with it on rollback.
+    """
+    for resource in resources:
+        result = db.execute(
+            update(ResourceVersion)
+            .where(ResourceVersion.resource == resource)
+            .values(version=ResourceVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            # First write to this resource - another request may be creating the row too
+            try:
+                with db.begin_nested():
+                    db.add(ResourceVersion(resource=resource, version=1))
+            except IntegrityError:
+                db.execute(
+                    update(ResourceVersion)
+                    .where(ResourceVersion.resource == resource)
+                    .values(version=ResourceVersion.version + 1)
+                    .execution_options(synchronize_session=False)
+                )
+        db.info.setdefault("bumped_resources", set()).add(resource)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _expire_committed_versions(session: Session) -> None:
+    resources = session.info.pop("bumped_resources", None)
+    if resources:
+        with _lock:
+            for resource in resources:
+                _cache.pop(resource, None)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_versions(session: Session) -> None:
+    session.info.pop("bumped_resources", None)
+
+
+def get_version(resource: str) -> Optional[int]:
+    """Current version of a resource, or None if it cannot be determined"""
+    now = time.monotonic()
+    cached = _cache.get(resource)
+    if cached and now - cached[1] < settings.REFERENCE_VERSION_TTL_SECONDS:
+        return cached[0]
+
+    try:
+        with engine.connect() as conn:
+            version = conn.execute(
+                select(ResourceVersion.version).where(ResourceVersion.resource == resource)
+            ).scalar()
+    except SQLAlchemyError as e:
+        logger.warning(f"Could not read version of {resource}: {e}")
+        return None
+
+    version = version or 0
+    with _lock:
+        _cache[resource] = (version, now)
+    return version
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): the W/ prefix is ignored
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_get(
+    resource: str,
+    *,
+    version: Optional[str] = None,
+    max_age: int = 0,
+    authenticated: bool = True,
+) -> Callable[[Request, Response], None]:
+    """
+    Dependency that adds ETag/Cache-Control headers and answers If-None-Match
+
+    The ETag covers the resource version and the query string, so every
+    page/filter combination is cached separately. Pass `version` for data
+    that only changes with a deploy (enum lists); otherwise the counter in
+    resource_versions is used. With `authenticated`, a 304 is only given to
+    requests carrying a valid bearer token; anything else falls through to
+    the endpoint and its normal authentication.
+    """
+    cache_control = f"private, max-age={max_age}" if max_age else "private, no-cache"
+
+    def check(request: Request, response: Response) -> None:
+        current = version if version is not None else get_version(resource)
+        if current is None:
+            return
+
+        query = request.url.query
+        etag = f'W/"{resource}-{current}-{zlib.crc32(query.encode()):08x}"'
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            if not authenticated or get_request_username(
+                request.headers.get("authorization"), verify_exp=True
+            ):
+                raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return check
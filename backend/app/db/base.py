@@ -1,22 +1,63 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
 from app.core.config import settings
 
+
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_engine(url)
+
+
 # Use SQLite for free deployment, PostgreSQL for paid
 if os.getenv("USE_SQLITE", "false").lower() == "true":
     # SQLite database (free forever)
     DATABASE_URL = "sqlite:///./nyu_lims.db"
-    engine = create_engine(
-        DATABASE_URL, 
-        connect_args={"check_same_thread": False}
-    )
+    engine = _create_engine(DATABASE_URL)
 else:
     # PostgreSQL database (paid after 90 days)
-    engine = create_engine(settings.DATABASE_URL)
+    engine = _create_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=True, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+# Read replica (None when DATABASE_REPLICA_URL is unset); see app.db.routing
+replica_engine = _create_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+ReplicaSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine is not None else None
+)
+
+
+def async_url(url: URL) -> tuple:
+    """The asyncio-driver equivalent of a sync database URL, plus its connect_args"""
+    connect_args = {}
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), connect_args
+    # asyncpg takes the libpq sslmode values through its own `ssl` argument
+    sslmode = url.query.get("sslmode")
+    if sslmode:
+        connect_args["ssl"] = sslmode
+        url = url.difference_update_query(["sslmode"])
+    return url.set(drivername="postgresql+asyncpg"), connect_args
+
+
+# Same database through asyncio drivers (asyncpg / aiosqlite), for the
+# read-heavy list endpoints; writes stay on the sync engine above
+_async_url, _async_connect_args = async_url(engine.url)
+async_engine = create_async_engine(_async_url, connect_args=_async_connect_args)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if replica_engine is not None:
+    _replica_url, _replica_connect_args = async_url(replica_engine.url)
+    async_replica_engine = create_async_engine(_replica_url, connect_args=_replica_connect_args)
+    AsyncReplicaSessionLocal = async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_replica_engine = None
+    AsyncReplicaSessionLocal = None
+
+Base = declarative_base()
@@ -0,0 +1,53 @@
+"""
+Explicit schema initialization, run once per deploy rather than per worker
+
+    python -m app.db.init_db
+
+Creates any missing tables and the search indexes, then makes sure the
+default admin user exists. All steps are idempotent. The API no longer does
+this on boot unless DB_INIT_ON_STARTUP is set (handy for a local SQLite
+database), and health checks never do it.
+"""
+import logging
+
+from sqlalchemy.engine import Engine
+
+from app.crud import user as crud_user
+from app.db.base import Base, SessionLocal, engine as default_engine
+from app.db.search import ensure_search_indexes
+import app.models  # noqa: F401 - registers every table on Base.metadata
+
+logger = logging.getLogger(__name__)
+
+
+def init_db(engine: Engine = default_engine) -> None:
+    """Create missing tables and search indexes"""
+    Base.metadata.create_all(bind=engine, checkfirst=True)
+    logger.info("Database tables initialized successfully")
+    ensure_search_indexes(engine)
+    logger.info("Search indexes initialized successfully")
+
+
+def ensure_admin_user() -> bool:
+    """Create the default admin user if it is missing; returns True if created"""
+    db = SessionLocal()
+    try:
+        if crud_user.get_user_by_username(db, "admin"):
+            return False
+        crud_user.create_user(db, {
+            "email": "admin@lims.com",
+            "username": "admin",
+            "full_name": "Admin User",
+            "role": "super_admin",
+            "password": "Admin123!"
+        })
+        logger.info("Admin user created")
+        return True
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    ensure_admin_user()
@@ -0,0 +1,118 @@
+"""
+Reprocessing lineage of samples (Sample.parent_sample_id chains)
+
+lineage_query() builds one statement with two recursive CTEs: the first
+climbs from the requested samples to the root of their lineage, the second
+walks down from those roots to every descendant. Each row is one sample of
+a tree with its depth below the root and its latest extraction, library
+prep and sequencing results, picked with row_number() windows, so a whole
+family - or the families of a plate's worth of samples - comes back in a
+single round trip. Both walks stop after MAX_LINEAGE_DEPTH hops, which also
+keeps a corrupted parent cycle from recursing forever.
+"""
+from typing import Iterable
+
+from sqlalchemy import Select, and_, func, literal, select
+from sqlalchemy.orm import aliased
+
+from app.models.sample import ExtractionResult, LibraryPrepResult, Sample
+from app.models.sequencing import SequencingRun, SequencingRunSample
+
+MAX_LINEAGE_DEPTH = 50
+
+
+def _latest(columns, sample_id, order_by, members, *joins):
+    """Most recent row per sample among the lineage members, as a subquery"""
+    query = select(
+        sample_id.label("sample_id"),
+        *columns,
+        func.row_number().over(partition_by=sample_id, order_by=order_by).label("rn"),
+    )
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    return query.where(sample_id.in_(members)).subquery()
+
+
+def lineage_query(sample_ids: Iterable[int]) -> Select:
+    """Every sample in the lineage trees of sample_ids, with root_id, depth and latest lab results"""
+    parent = aliased(Sample)
+    up = select(
+        Sample.id.label("id"),
+        Sample.parent_sample_id.label("parent_id"),
+        literal(0).label("hops"),
+    ).where(Sample.id.in_(list(sample_ids))).cte("lineage_up", recursive=True)
+    up = up.union_all(
+        select(parent.id, parent.parent_sample_id, up.c.hops + 1)
+        .join(up, parent.id == up.c.parent_id)
+        .where(up.c.hops < MAX_LINEAGE_DEPTH)
+    )
+    roots = select(up.c.id).where(up.c.parent_id.is_(None))
+
+    child = aliased(Sample)
+    down = select(
+        Sample.id.label("id"),
+        Sample.id.label("root_id"),
+        literal(0).label("depth"),
+    ).where(Sample.id.in_(roots)).cte("lineage_down", recursive=True)
+    down = down.union_all(
+        select(child.id, down.c.root_id, down.c.depth + 1)
+        .join(down, child.parent_sample_id == down.c.id)
+        .where(down.c.depth < MAX_LINEAGE_DEPTH)
+    )
+    members = select(down.c.id)
+
+    extraction = _latest(
+        (ExtractionResult.extraction_kit, ExtractionResult.concentration_ng_ul),
+        ExtractionResult.sample_id,
+        (ExtractionResult.created_at.desc(), ExtractionResult.id.desc()),
+        members,
+    )
+    prep = _latest(
+        (LibraryPrepResult.prep_kit, LibraryPrepResult.library_concentration_ng_ul),
+        LibraryPrepResult.sample_id,
+        (LibraryPrepResult.created_at.desc(), LibraryPrepResult.id.desc()),
+        members,
+    )
+    sequencing = _latest(
+        (
+            SequencingRun.run_id, SequencingRunSample.reads_generated, SequencingRunSample.yield_mb,
+            SequencingRunSample.percent_q30, SequencingRunSample.passed_qc,
+        ),
+        SequencingRunSample.sample_id,
+        (SequencingRun.created_at.desc(), SequencingRunSample.id.desc()),
+        members,
+        (SequencingRun, SequencingRun.id == SequencingRunSample.sequencing_run_id),
+    )
+
+    return (
+        select(
+            down.c.root_id,
+            down.c.depth,
+            Sample.id,
+            Sample.barcode,
+            Sample.parent_sample_id,
+            Sample.status,
+            Sample.reprocess_type,
+            Sample.reprocess_reason,
+            Sample.reprocess_count,
+            Sample.failed_stage,
+            Sample.created_at,
+            Sample.extraction_concentration,
+            Sample.extraction_qc_pass,
+            extraction.c.extraction_kit,
+            extraction.c.concentration_ng_ul.label("dna_concentration_ng_ul"),
+            prep.c.prep_kit.label("library_prep_kit"),
+            prep.c.library_concentration_ng_ul,
+            sequencing.c.run_id.label("sequencing_run_id"),
+            sequencing.c.reads_generated,
+            sequencing.c.yield_mb,
+            sequencing.c.percent_q30,
+            sequencing.c.passed_qc.label("sequencing_passed_qc"),
+        )
+        .select_from(down)
+        .join(Sample, Sample.id == down.c.id)
+        .outerjoin(extraction, and_(extraction.c.sample_id == Sample.id, extraction.c.rn == 1))
+        .outerjoin(prep, and_(prep.c.sample_id == Sample.id, prep.c.rn == 1))
+        .outerjoin(sequencing, and_(sequencing.c.sample_id == Sample.id, sequencing.c.rn == 1))
+        .order_by(down.c.root_id, down.c.depth, Sample.id)
+    )
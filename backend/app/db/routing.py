@@ -0,0 +1,128 @@
+"""
+Read-replica routing for request sessions
+
+With DATABASE_REPLICA_URL set, get_db/get_async_db hand safe requests (GET,
+HEAD) a session on the replica and everything else a session on the
+primary. A user whose request commits a write is pinned to the primary for
+REPLICA_STICKY_SECONDS, so their next reads see what they just wrote even
+while the replica lags.
+
+Pins are shared between workers through the event broker: the commit also
+publishes a {"type": "db.write", "user": ...} event, and every worker pins
+that user when it arrives. This needs the PostgreSQL broker when there is
+more than one worker (the in-process broker only reaches its own worker).
+While the broker is not listening, all requests go to the primary.
+
+To try it locally, point DATABASE_REPLICA_URL at a second database that
+receives a copy of the first (e.g. sqlite:///./replica.db).
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.audit import get_request_username
+from app.core.config import settings
+from app.core.events import event_broker, publish
+from app.db.base import SessionLocal, replica_engine
+
+SAFE_METHODS = {"GET", "HEAD"}
+WRITE_EVENT = "db.write"
+
+_USER = "routing_user"
+_ANNOUNCED = "routing_announced"
+_WROTE = "routing_wrote"
+
+
+class PrimaryPins:
+    """Users who must read from the primary, with the time their pin runs out"""
+
+    def __init__(self, seconds: float = settings.REPLICA_STICKY_SECONDS):
+        self.seconds = seconds
+        self._until: Dict[str, float] = {}
+        self._lock = threading.Lock()  # Sync endpoints commit from the threadpool
+
+    def pin(self, username: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[username] = now + self.seconds
+            if len(self._until) > 1000:
+                self._until = {user: until for user, until in self._until.items() if until > now}
+
+    def is_pinned(self, username: str) -> bool:
+        with self._lock:
+            until = self._until.get(username)
+        return until is not None and until > time.monotonic()
+
+
+primary_pins = PrimaryPins()
+
+
+def use_replica(request: Request) -> bool:
+    """Whether this request's session may read from the replica"""
+    if replica_engine is None or request.method not in SAFE_METHODS:
+        return False
+    if not event_broker.listening:
+        # Pins from other workers cannot be seen; stay on the primary
+        return False
+    username = get_request_username(request.headers.get("authorization"))
+    return username is None or not primary_pins.is_pinned(username)
+
+
+def track_writes(db: Session, request: Request) -> None:
+    """Pin the request's user to the primary if this session commits a write"""
+    pin_writes_to(db, get_request_username(request.headers.get("authorization")))
+
+
+def pin_writes_to(db: Session, username: Optional[str]) -> None:
+    """Pin this user to the primary if the session commits a write (e.g. a job run on their behalf)"""
+    if replica_engine is not None and username:
+        db.info[_USER] = username
+
+
+def _on_write_event(item: Dict[str, Any]) -> None:
+    if item.get("type") == WRITE_EVENT and item.get("user"):
+        primary_pins.pin(item["user"])
+
+
+event_broker.add_listener(_on_write_event)
+
+
+def _announce_write(session: Session) -> None:
+    username = session.info.get(_USER)
+    if not username:
+        return
+    session.info[_WROTE] = True
+    if not session.info.get(_ANNOUNCED):
+        session.info[_ANNOUNCED] = True
+        publish(session, [{"type": WRITE_EVENT, "user": username}])
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _on_flush(session: Session, flush_context) -> None:
+    _announce_write(session)
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _on_execute(orm_execute_state) -> None:
+    # Set-based INSERT/UPDATE/DELETE statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _announce_write(orm_execute_state.session)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _pin_writer(session: Session) -> None:
+    # Pin locally right away; other workers pin when the event reaches them
+    username = session.info.get(_USER)
+    if username and session.info.pop(_WROTE, False):
+        primary_pins.pin(username)
+    session.info.pop(_ANNOUNCED, None)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop(_WROTE, None)
+    session.info.pop(_ANNOUNCED, None)
@@ -0,0 +1,211 @@
+"""
+Indexed text search shared by the list endpoints and /search
+
+PostgreSQL uses pg_trgm GIN indexes: substring matches (ILIKE '%x%') and
+fuzzy matches (word similarity) are both answered from the index and ranked
+by word_similarity.
+
+SQLite uses an FTS5 shadow table per searchable table, tokenized into
+trigrams and kept in sync by triggers. A search term is split into its
+trigrams and rows are ranked by the fraction of those trigrams they contain,
+so exact substrings rank first and near misses (typos) still match.
+
+If the indexes have not been created yet, searches fall back to ILIKE.
+
+search_clause/apply_search work on legacy Query objects and on select()
+statements alike. For a statement run on an AsyncSession, look the backend
+up first with `await search_backend(db, Model)` and pass it in.
+"""
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, case, func, literal, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.elements import ColumnElement
+
+logger = logging.getLogger(__name__)
+
+# Searchable columns per table, in order of importance
+SEARCH_SPECS: Dict[str, Tuple[str, ...]] = {
+    "samples": ("barcode", "client_sample_id"),
+    "projects": ("project_id", "name"),
+    "clients": ("name", "institution"),
+    "products": ("name", "catalog_number", "vendor"),
+    "blockers": ("name",),
+}
+
+# Share of a term's trigrams a row must contain to match on SQLite
+# (comparable to pg_trgm's default word_similarity_threshold)
+SQLITE_MIN_TRIGRAM_OVERLAP = 0.5
+
+# Cache of the search backend available per (database, table)
+_backends: Dict[Tuple[str, str], str] = {}
+
+
+def _fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _trigrams(term: str) -> List[str]:
+    """Distinct lowercase trigrams of each word in the term"""
+    grams = []
+    for word in re.findall(r"\S+", term.lower()):
+        for i in range(len(word) - 2):
+            gram = word[i:i + 3]
+            if gram not in grams:
+                grams.append(gram)
+    return grams
+
+
+def _search_backend(db: Session, table: str) -> str:
+    bind = db.get_bind()
+    key = (str(bind.url), table)
+    if key not in _backends:
+        backend = "like"
+        try:
+            if bind.dialect.name == "postgresql":
+                installed = db.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                ).scalar()
+                if installed:
+                    backend = "trgm"
+            elif bind.dialect.name == "sqlite":
+                exists = db.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": _fts_table(table)}
+                ).scalar()
+                if exists:
+                    backend = "fts5"
+        except Exception as e:
+            logger.warning(f"Could not detect search index for {table}: {e}")
+        _backends[key] = backend
+    return _backends[key]
+
+
+async def search_backend(db: AsyncSession, model) -> str:
+    """The search backend for a model's table, looked up through an AsyncSession"""
+    return await db.run_sync(_search_backend, model.__tablename__)
+
+
+def search_clause(query: Query, model, term: str, backend: Optional[str] = None) -> Tuple[Query, ColumnElement]:
+    """
+    Restrict a query on a searchable model to rows matching the term
+
+    Returns the filtered query and a relevance score expression: 1 for a
+    prefix match plus the row's similarity to the term (0-1).
+    """
+    table = model.__tablename__
+    columns = [getattr(model, name) for name in SEARCH_SPECS[table]]
+    pattern = f"%{_escape_like(term)}%"
+    prefix = f"{_escape_like(term)}%"
+    prefix_hit = case((or_(*[c.ilike(prefix, escape="\\") for c in columns]), 1.0), else_=0.0)
+    if backend is None:
+        backend = _search_backend(query.session, table)
+
+    if backend == "trgm":
+        # Both operators are served by the gin_trgm_ops indexes
+        query = query.filter(or_(
+            *[c.ilike(pattern, escape="\\") for c in columns],
+            *[literal(term).op("<%")(c) for c in columns]
+        ))
+        similarity = [func.word_similarity(term, func.coalesce(c, "")) for c in columns]
+        score = func.greatest(*similarity) if len(similarity) > 1 else similarity[0]
+        return query, prefix_hit + score
+
+    grams = _trigrams(term)
+    if backend == "fts5" and grams:
+        fts = _fts_table(table)
+        params = {f"g{i}": '"' + gram.replace('"', '""') + '"' for i, gram in enumerate(grams)}
+        hits = " UNION ALL ".join(
+            f"SELECT rowid AS id FROM {fts} WHERE {fts} MATCH :g{i}" for i in range(len(grams))
+        )
+        ranked = text(
+            f"SELECT id, CAST(COUNT(*) AS REAL) / :n AS score FROM ({hits}) "
+            f"GROUP BY id HAVING COUNT(*) >= :min_hits"
+        ).bindparams(
+            n=len(grams),
+            min_hits=max(1, round(len(grams) * SQLITE_MIN_TRIGRAM_OVERLAP)),
+            **params
+        ).columns(id=Integer, score=Float).subquery(f"{table}_search")
+        query = query.join(ranked, ranked.c.id == model.id)
+        return query, prefix_hit + ranked.c.score
+
+    # No index (or a term too short for trigrams): plain substring scan
+    query = query.filter(or_(*[c.ilike(pattern, escape="\\") for c in columns]))
+    return query, prefix_hit + 1.0
+
+
+def apply_search(query: Query, model, term: str, backend: Optional[str] = None) -> Query:
+    """
+    Restrict a query on a searchable model to rows matching the term
+
+    Matches are ordered best first; callers can append their own ordering as
+    a tie-breaker.
+    """
+    term = term.strip()
+    if not term:
+        return query
+    query, score = search_clause(query, model, term, backend)
+    return query.order_by(score.desc())
+
+
+def _ensure_trgm_indexes(conn) -> None:
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for table, columns in SEARCH_SPECS.items():
+        for column in columns:
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm "
+                f"ON {table} USING gin ({column} gin_trgm_ops)"
+            ))
+
+
+def _ensure_fts_tables(conn) -> None:
+    for table, columns in SEARCH_SPECS.items():
+        fts = _fts_table(table)
+        cols = ", ".join(columns)
+        new_cols = ", ".join(f"new.{c}" for c in columns)
+        old_cols = ", ".join(f"old.{c}" for c in columns)
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts}
+        ).scalar()
+
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{cols}, content='{table}', content_rowid='id', tokenize='trigram')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+        ))
+        if not exists:
+            # Index the rows that existed before the triggers did
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def ensure_search_indexes(engine: Engine) -> None:
+    """Create the search indexes for the current database (idempotent)"""
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            _ensure_trgm_indexes(conn)
+        elif engine.dialect.name == "sqlite":
+            _ensure_fts_tables(conn)
+        else:
+            logger.info(f"No search index support for {engine.dialect.name}, using ILIKE")
+    _backends.clear()
@@ -1,37 +1,80 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import time
 import logging
 from sqlalchemy import text
 
 from app.core.config import settings
+from app.core.admission import AdmissionMiddleware, admission_controller
+from app.core.audit import access_log_writer, build_access_record
+from app.core.health import readiness_probe
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.events import event_broker
+from app.core.responses import ORJSONResponse, SelectiveGZipMiddleware
 from app.api.api_v1.api import api_router
-from app.db.base import engine, Base
-from app.models import *  # Import all models
+from app.db.base import async_engine, async_replica_engine, engine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    logger.info("Initializing database...")
+    # Startup - schema creation is a deploy step (python -m app.db.init_db), not a per-worker one
+    if settings.DB_INIT_ON_STARTUP:
+        from app.db.init_db import init_db, ensure_admin_user
+        logger.info("Initializing database...")
+        try:
+            init_db(engine)
+            ensure_admin_user()
+        except Exception as e:
+            logger.warning(f"Database initialization warning: {e}")
+            logger.info("Continuing with existing database schema...")
+    if settings.ACCESS_LOG_ENABLED:
+        access_log_writer.start()
     try:
-        # Try to create tables, but don't fail if they already exist
-        Base.metadata.create_all(bind=engine, checkfirst=True)
-        logger.info("Database tables initialized successfully")
+        await event_broker.start()
     except Exception as e:
-        logger.warning(f"Database initialization warning: {e}")
-        logger.info("Continuing with existing database schema...")
+        logger.warning(f"Live queue events unavailable: {e}")
+    job_worker = None
+    if settings.JOB_EMBEDDED_WORKERS > 0:
+        from app.worker import Worker
+        job_worker = Worker(concurrency=settings.JOB_EMBEDDED_WORKERS)
+        job_worker.start()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    if job_worker is not None:
+        # Unfinished jobs are requeued once their heartbeat lapses
+        await asyncio.to_thread(job_worker.stop, 10)
+    await event_broker.stop()
+    await access_log_writer.stop()
+    await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+# Per-route budgets for expensive requests (innermost); inside CORS so browsers can read the 503s
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
+# Replays of requests with an Idempotency-Key; outside admission control so that
+# replays and waiting duplicates take no budget, inside GZip so stored bodies are plain
+app.add_middleware(IdempotencyMiddleware)
+
+# Compress large payloads (sample, project and product tables), but not the event stream
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    exclude_paths=(f"{settings.API_V1_STR}/events",),
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL
 )
 
 # CORS middleware
@@ -55,11 +98,19 @@ async def audit_log_middleware(request: Request, call_next):
     response = await call_next(request)
     process_time = time.time() - start_time
     
-    # Log API access (you can expand this to save to database)
+    # Log API access; the record is persisted to access_logs in batches
     logger.info(
         f"Path: {request.url.path} | Method: {request.method} | "
         f"Status: {response.status_code} | Duration: {process_time:.3f}s"
     )
+    await access_log_writer.submit(build_access_record(
+        method=request.method,
+        path=request.url.path,
+        status_code=response.status_code,
+        duration=process_time,
+        authorization=request.headers.get("authorization"),
+        client_ip=request.headers.get("x-real-ip") or (request.client.host if request.client else None)
+    ))
     
     response.headers["X-Process-Time"] = str(process_time)
     return response
@@ -71,42 +122,25 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 async def root():
     return {"message": "LIMS System API", "version": settings.VERSION}
 
+@app.get("/livez")
+async def liveness_check():
+    """Liveness probe - no I/O, only shows the worker is responding"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness_check(response: Response):
+    """Readiness probe - cached, time-bounded database check"""
+    result = await readiness_probe.check()
+    if result["status"] != "ready":
+        response.status_code = 503
+    return result
+
 @app.get("/health")
-async def health_check():
-    """Health check endpoint that ensures admin user exists"""
-    from app.db.base import SessionLocal
-    from app.crud import user as crud_user
-    
-    try:
-        db = SessionLocal()
-        # Check if admin user exists, create if not
-        admin_user = crud_user.get_user_by_username(db, "admin")
-        if not admin_user:
-            # Create admin user
-            user_data = {
-                "email": "admin@lims.com",
-                "username": "admin",
-                "full_name": "Admin User",
-                "role": "super_admin",
-                "password": "Admin123!"
-            }
-            crud_user.create_user(db, user_data)
-            admin_created = True
-        else:
-            admin_created = False
-        
-        db.close()
-        
-        return {
-            "status": "healthy",
-            "admin_user_exists": True,
-            "admin_created": admin_created,
-            "admin_username": "admin",
-            "message": "LIMS system is running and admin access is guaranteed"
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e),
-            "admin_user_exists": False
-        }
\ No newline at end of file
+async def health_check(response: Response):
+    """Health check kept for existing monitors; same as /readyz (admin setup is `python -m app.db.init_db`)"""
+    return await readiness_check(response)
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """Admission control budgets of this worker: capacity, in use, waiting and counters"""
+    return admission_controller.snapshot()
@@ -1,9 +1,9 @@
-from app.models.base import AuditLog, TimestampMixin
+from app.models.base import AuditLog, AccessLog, ResourceVersion, TimestampMixin
 from app.models.user import User, ElectronicSignature
 from app.models.project import Client, Project, ProjectStatus, ProjectType, TAT, ProjectLog
 from app.models.sample import Sample, SampleType, SampleStatus, ExtractionResult, LibraryPrepResult, SampleLog
 from app.models.sample_type import SampleType as SampleTypeModel
-from app.models.storage import StorageLocation
+from app.models.storage import StorageLocation, StorageBox
 from app.models.workflow import ExtractionPlan, ExtractionPlanSample, PrepPlan, PrepPlanSample, PlanStatus
 from app.models.sequencing import SequencingRun, SequencingRunSample, RunStatus
 from app.models.employee import Employee
@@ -14,14 +14,22 @@ from app.models.client_project_config import ClientProjectConfig
 from app.models.product import Product, QuotationStatus, ProductStatus, Requestor, Storage, ProductLog
 from app.models.blocker import Blocker, BlockerLog
 from app.models.system_password import SystemPassword
+from app.models.job import Job, JobArtifact, JobStatus
+from app.models.analytics import SampleStageInterval, StageDailyCount, AnalyticsWatermark
+from app.models.idempotency import IdempotencyKey
+from app.models.stream_ticket import StreamTicket
+from app.models.archive import (
+    ArchivedSample, ArchivedSampleLog, ArchivedExtractionResult, ArchivedLibraryPrepResult,
+    ArchivedSequencingRunSample, ArchivedPlateWellAssignment, ArchivedSampleStageInterval
+)
 
 __all__ = [
-    "AuditLog", "TimestampMixin",
+    "AuditLog", "AccessLog", "ResourceVersion", "TimestampMixin",
     "User", "ElectronicSignature",
     "Client", "Project", "ProjectStatus", "ProjectType", "TAT", "ProjectLog",
     "Sample", "SampleType", "SampleStatus", "ExtractionResult", "LibraryPrepResult", "SampleLog",
     "SampleTypeModel",
-    "StorageLocation",
+    "StorageLocation", "StorageBox",
     "ExtractionPlan", "ExtractionPlanSample", "PrepPlan", "PrepPlanSample", "PlanStatus",
     "SequencingRun", "SequencingRunSample", "RunStatus",
     "Employee",
@@ -31,5 +39,11 @@ __all__ = [
     "ClientProjectConfig",
     "Product", "QuotationStatus", "ProductStatus", "Requestor", "Storage", "ProductLog",
     "Blocker", "BlockerLog",
-    "SystemPassword"
+    "SystemPassword",
+    "Job", "JobArtifact", "JobStatus",
+    "SampleStageInterval", "StageDailyCount", "AnalyticsWatermark",
+    "IdempotencyKey",
+    "StreamTicket",
+    "ArchivedSample", "ArchivedSampleLog", "ArchivedExtractionResult", "ArchivedLibraryPrepResult",
+    "ArchivedSequencingRunSample", "ArchivedPlateWellAssignment", "ArchivedSampleStageInterval"
 ]
\ No newline at end of file
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Date, ForeignKey, Float, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class SampleStageInterval(Base):
+    """Time a sample spent in one status, built from status_change logs (see app.core.stage_analytics)"""
+    __tablename__ = "sample_stage_intervals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sample_id = Column(Integer, ForeignKey("samples.id"), nullable=False, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)  # Copied from the sample for grouping
+    stage = Column(String, nullable=False)  # SampleStatus value
+    entered_at = Column(DateTime(timezone=True), nullable=False)
+    exited_at = Column(DateTime(timezone=True))  # NULL while the sample is still in the stage
+    duration_seconds = Column(Float)
+
+    __table_args__ = (
+        # Queue aging reads the open intervals of one stage
+        Index("ix_sample_stage_intervals_stage_exited", "stage", "exited_at"),
+    )
+
+class StageDailyCount(Base):
+    """Samples entering and leaving a stage per day; occupancy is the running total"""
+    __tablename__ = "stage_daily_counts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    stage = Column(String, nullable=False)
+    entered = Column(Integer, nullable=False, default=0)
+    exited = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("stage", "day", name="uq_stage_daily_counts_stage_day"),
+    )
+
+class AnalyticsWatermark(Base):
+    """Last source row an incremental aggregator has consumed"""
+    __tablename__ = "analytics_watermarks"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)
+    # Source ids up to settled_id belong to finished transactions; pending_* is the next candidate bound
+    settled_id = Column(BigInteger, nullable=False, default=0, server_default="0")
+    pending_id = Column(BigInteger)
+    pending_xmax = Column(BigInteger)  # Snapshot xmax recorded for pending_id (PostgreSQL)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
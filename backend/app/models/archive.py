@@ -0,0 +1,71 @@
+from sqlalchemy import Column, DateTime, Index, Table
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.models.analytics import SampleStageInterval
+from app.models.extraction_plate import PlateWellAssignment
+from app.models.sample import ExtractionResult, LibraryPrepResult, Sample, SampleLog
+from app.models.sequencing import SequencingRunSample
+
+def archive_table(table: Table, *indexed: str) -> Table:
+    """
+    `<table>_archive`: the live table's columns without its constraints, defaults
+    and indexes (archived rows are only read, by id or sample), plus archived_at
+    """
+    name = f"{table.name}_archive"
+    return Table(
+        name, Base.metadata,
+        *(Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False) for column in table.columns),
+        Column("archived_at", DateTime(timezone=True), server_default=func.now()),
+        *(Index(f"ix_{name}_{column}", column) for column in indexed)
+    )
+
+class ArchivedSample(Base):
+    """A sample moved out of `samples` by app.core.archive; same attributes, read-only relationships"""
+    __table__ = archive_table(Sample.__table__, "barcode", "project_id", "extraction_plate_ref_id")
+
+    project = relationship("Project", primaryjoin="foreign(ArchivedSample.project_id) == Project.id", viewonly=True)
+    storage_location = relationship(
+        "StorageLocation", primaryjoin="foreign(ArchivedSample.storage_location_id) == StorageLocation.id", viewonly=True
+    )
+    sample_type_ref = relationship(
+        "SampleType", primaryjoin="foreign(ArchivedSample.sample_type_id) == SampleType.id", viewonly=True
+    )
+    extraction_results = relationship(
+        "ArchivedExtractionResult", primaryjoin="foreign(ArchivedExtractionResult.sample_id) == ArchivedSample.id", viewonly=True
+    )
+    library_prep_results = relationship(
+        "ArchivedLibraryPrepResult", primaryjoin="foreign(ArchivedLibraryPrepResult.sample_id) == ArchivedSample.id", viewonly=True
+    )
+    sequencing_run_samples = relationship(
+        "ArchivedSequencingRunSample", primaryjoin="foreign(ArchivedSequencingRunSample.sample_id) == ArchivedSample.id", viewonly=True
+    )
+
+class ArchivedSampleLog(Base):
+    __table__ = archive_table(SampleLog.__table__, "sample_id")
+
+    created_by = relationship("User", primaryjoin="foreign(ArchivedSampleLog.created_by_id) == User.id", viewonly=True)
+
+class ArchivedExtractionResult(Base):
+    __table__ = archive_table(ExtractionResult.__table__, "sample_id")
+
+class ArchivedLibraryPrepResult(Base):
+    __table__ = archive_table(LibraryPrepResult.__table__, "sample_id")
+
+class ArchivedSequencingRunSample(Base):
+    __table__ = archive_table(SequencingRunSample.__table__, "sample_id")
+
+    sequencing_run = relationship(
+        "SequencingRun", primaryjoin="foreign(ArchivedSequencingRunSample.sequencing_run_id) == SequencingRun.id", viewonly=True
+    )
+
+class ArchivedPlateWellAssignment(Base):
+    __table__ = archive_table(PlateWellAssignment.__table__, "sample_id", "plate_id")
+
+    sample = relationship(
+        "ArchivedSample", primaryjoin="foreign(ArchivedPlateWellAssignment.sample_id) == ArchivedSample.id", viewonly=True
+    )
+
+class ArchivedSampleStageInterval(Base):
+    __table__ = archive_table(SampleStageInterval.__table__, "sample_id")
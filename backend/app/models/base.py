@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, String, Integer, ForeignKey, Text
+from sqlalchemy import Column, DateTime, String, Integer, ForeignKey, Text, Float
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -19,6 +19,27 @@ class AuditLog(Base):
     
     user = relationship("User", back_populates="audit_logs")
 
+class AccessLog(Base):
+    """API access trail, written in batches by app.core.audit"""
+    __tablename__ = "access_logs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String, index=True)  # JWT subject, NULL for anonymous requests
+    method = Column(String, nullable=False)
+    path = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=False)
+    duration_ms = Column(Float, nullable=False)
+    client_ip = Column(String)
+    timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class ResourceVersion(Base):
+    """Change counter per reference-data resource, bumped on every write (see app.core.versioning)"""
+    __tablename__ = "resource_versions"
+    
+    resource = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class TimestampMixin:
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Float, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Float, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base, TimestampMixin
@@ -56,5 +56,10 @@ class ControlSample(Base, TimestampMixin):
     # Relationships
     plate = relationship("ExtractionPlate", back_populates="control_samples")
     
+    __table_args__ = (
+        # Control QC aggregates of the plate list
+        Index("ix_control_samples_plate_id", "plate_id"),
+    )
+    
     def __repr__(self):
         return f"<ControlSample(id={self.control_id}, type={self.control_type}, well={self.well_position})>"
\ No newline at end of file
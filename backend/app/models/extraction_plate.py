@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base, TimestampMixin
@@ -83,4 +83,9 @@ class PlateWellAssignment(Base, TimestampMixin):
     
     # Relationships
     plate = relationship("ExtractionPlate")
-    sample = relationship("Sample")
\ No newline at end of file
+    sample = relationship("Sample")
+    
+    __table_args__ = (
+        # One sample or control per well, also when two supervisors edit a plate at once
+        Index("uq_plate_well_assignments_well", "plate_id", "well_position", unique=True),
+    )
\ No newline at end of file
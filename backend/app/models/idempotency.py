@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class IdempotencyStatus:
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+class IdempotencyKey(Base):
+    """A client's Idempotency-Key and the stored response of its request (see app.core.idempotency)"""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String, nullable=False)  # Keys are scoped per user
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 of method, path, query and body
+    status = Column(String, nullable=False, default=IdempotencyStatus.IN_PROGRESS)
+    owner = Column(String(32))  # Token of the request currently holding the key
+    locked_until = Column(DateTime(timezone=True))  # Lease of the running request, renewed while it runs
+
+    response_status = Column(Integer)
+    response_content_type = Column(String)
+    response_body = Column(LargeBinary)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("username", "key", name="uq_idempotency_keys_user_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
@@ -0,0 +1,61 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, LargeBinary, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+
+from app.db.base import Base
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(Base):
+    """Background job, run by `python -m app.worker` (see app.core.jobs)"""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # Handler name, e.g. "samples.bulk_import"
+    status = Column(String, nullable=False, default=JobStatus.QUEUED.value)
+    payload = Column(Text)  # JSON arguments for the handler
+    result = Column(Text)  # JSON result, or the error detail of a failed job
+    error = Column(Text)
+
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer)
+    progress_message = Column(String)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime(timezone=True), nullable=False)
+    locked_by = Column(String)  # Worker that claimed the job
+    heartbeat_at = Column(DateTime(timezone=True))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    created_by_id = Column(Integer, ForeignKey("users.id"))
+
+    created_by = relationship("User", foreign_keys=[created_by_id])
+    artifacts = relationship("JobArtifact", back_populates="job", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Claim query: oldest runnable queued job
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+class JobArtifact(Base):
+    """File attached to a job - an uploaded input or a result for download"""
+    __tablename__ = "job_artifacts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String, nullable=False)  # "input", "result", ...
+    filename = Column(String, nullable=False)
+    media_type = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    job = relationship("Job", back_populates="artifacts")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Float, Enum
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -108,4 +108,7 @@ class ProjectLog(Base, TimestampMixin):
     
     # Relationships
     project = relationship("Project", back_populates="logs")
-    created_by = relationship("User", foreign_keys=[created_by_id])
\ No newline at end of file
+    created_by = relationship("User", foreign_keys=[created_by_id])
+
+# A project's log, newest first (read_project_logs)
+Index("ix_project_logs_project_created", ProjectLog.project_id, ProjectLog.created_at.desc())
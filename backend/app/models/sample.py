@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Float, Enum
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -193,6 +193,17 @@ class Sample(Base, TimestampMixin):
     extraction_plate_ref = relationship("ExtractionPlate", back_populates="samples", foreign_keys=[extraction_plate_ref_id])
     logs = relationship("SampleLog", back_populates="sample", cascade="all, delete-orphan", order_by="desc(SampleLog.created_at)")
     
+    __table_args__ = (
+        # Per-project status rollups on the projects list (covering index)
+        Index("ix_samples_project_status", "project_id", "status"),
+        # Reprocessing lineage walks (app.db.lineage) and child counts
+        Index("ix_samples_parent_sample_id", "parent_sample_id"),
+        # Queue reads and plate claims (app.core.plate_claims), earliest due first
+        Index("ix_samples_status_due_date", "status", "due_date"),
+        # Plate detail samples and the per-plate aggregates of the plate list
+        Index("ix_samples_extraction_plate_ref_id", "extraction_plate_ref_id"),
+    )
+    
 class ExtractionResult(Base, TimestampMixin):
     __tablename__ = "extraction_results"
     
@@ -257,6 +268,9 @@ class SampleLog(Base, TimestampMixin):
     sample = relationship("Sample", back_populates="logs")
     created_by = relationship("User", foreign_keys=[created_by_id])
 
+# A sample's log, newest first (read_sample_logs)
+Index("ix_sample_logs_sample_created", SampleLog.sample_id, SampleLog.created_at.desc())
+
 class DiscrepancyApproval(Base, TimestampMixin):
     __tablename__ = "discrepancy_approvals"
     
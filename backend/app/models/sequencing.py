@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Float, Enum
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Float, Enum, Index, BigInteger
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -35,7 +35,7 @@ class SequencingRun(Base, TimestampMixin):
     run_by_id = Column(Integer, ForeignKey("users.id"))
     
     # Metrics
-    total_reads = Column(Integer)
+    total_reads = Column(BigInteger)  # A NovaSeq flowcell can exceed 2^31 reads
     total_yield_gb = Column(Float)
     cluster_density = Column(Float)
     percent_pf = Column(Float)  # Percent passing filter
@@ -69,4 +69,9 @@ class SequencingRunSample(Base):
     
     # Relationships
     sequencing_run = relationship("SequencingRun", back_populates="samples")
-    sample = relationship("Sample", back_populates="sequencing_run_samples")
\ No newline at end of file
+    sample = relationship("Sample", back_populates="sequencing_run_samples")
+    
+    __table_args__ = (
+        # One row per sample and run; demux imports look up a run's rows by sample
+        Index("uq_sequencing_run_samples_run_sample", "sequencing_run_id", "sample_id", unique=True),
+    )
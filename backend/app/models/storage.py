@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -17,8 +17,27 @@ class StorageLocation(Base, TimestampMixin):
     
     # Unique constraint on combination of freezer, shelf, box, and position
     __table_args__ = (
+        Index("uq_storage_locations_slot", "freezer", "shelf", "box", "position", unique=True),
         {'comment': 'Storage locations for samples'},
     )
     
     # Relationships
-    samples = relationship("Sample", back_populates="storage_location")
\ No newline at end of file
+    samples = relationship("Sample", back_populates="storage_location")
+
+class StorageBox(Base, TimestampMixin):
+    """A box's position grid with an occupancy bitmap (see app.core.storage)"""
+    __tablename__ = "storage_boxes"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    freezer = Column(String, nullable=False)
+    shelf = Column(String, nullable=False)
+    box = Column(String, nullable=False)
+    rows = Column(Integer, nullable=False, default=9)
+    columns = Column(Integer, nullable=False, default=9)
+    occupancy = Column(LargeBinary, nullable=False)  # Bit i set = position i taken, row-major from A1
+    free_count = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every occupancy change
+    
+    __table_args__ = (
+        UniqueConstraint("freezer", "shelf", "box", name="uq_storage_boxes_box"),
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class StreamTicket(Base):
+    """A single-use ticket opening an event stream (see app.core.stream_tickets)"""
+    __tablename__ = "stream_tickets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticket_hash = Column(String(64), unique=True, nullable=False)  # SHA-256; the ticket itself is never stored
+    username = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_stream_tickets_expires_at", "expires_at"),
+    )
@@ -14,6 +14,8 @@ from .sample_type import SampleType, SampleTypeCreate, SampleTypeUpdate
 from .employee import Employee, EmployeeCreate, EmployeeUpdate
 from .deletion_log import DeletionLog
 from .client_project_config import ClientProjectConfig, ClientProjectConfigCreate, ClientProjectConfigUpdate
+from .search import SearchHit, SearchResults
+from .job import Job, JobArtifact
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "UserBasic",
@@ -27,5 +29,7 @@ __all__ = [
     "SampleType", "SampleTypeCreate", "SampleTypeUpdate",
     "Employee", "EmployeeCreate", "EmployeeUpdate",
     "DeletionLog",
-    "ClientProjectConfig", "ClientProjectConfigCreate", "ClientProjectConfigUpdate"
+    "ClientProjectConfig", "ClientProjectConfigCreate", "ClientProjectConfigUpdate",
+    "SearchHit", "SearchResults",
+    "Job", "JobArtifact"
 ]
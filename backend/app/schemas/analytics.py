@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import date, datetime
+
+class AgingBucket(BaseModel):
+    label: str  # e.g. "1-2d", "30d+"
+    min_days: float
+    max_days: Optional[float] = None
+    count: int
+
+class QueueAging(BaseModel):
+    """How long samples have been (or were) in one stage"""
+    stage: str
+    as_of: Optional[datetime] = None  # When the aggregates were last brought up to date
+    in_stage: int
+    oldest_entered_at: Optional[datetime] = None
+    waiting: List[AgingBucket]  # Samples in the stage now, by time so far
+    completed: int  # Samples that left the stage within the window
+    completed_mean_days: Optional[float] = None
+    completed_durations: List[AgingBucket]
+
+class StageDay(BaseModel):
+    day: date
+    stage: str
+    entered: int
+    exited: int
+    in_stage: int  # At the end of the day
+
+class OnTimeGroup(BaseModel):
+    key: str  # Project ID, client ID or service type
+    label: str
+    delivered: int
+    delivered_on_time: int
+    on_time_percent: Optional[float] = None
+    overdue_open: int  # Samples not delivered yet whose project is past due
@@ -67,6 +67,24 @@ class ExtractionPlate(ExtractionPlateBase):
             data['sample_count'] = len(obj.samples)
         return cls(**data)
 
+class ExtractionPlateSummary(ExtractionPlate):
+    """Plate list row: the plate with aggregates of its samples and controls"""
+    assigned_tech_name: Optional[str] = None
+    project_breakdown: Dict[str, int] = {}  # Samples per project code
+    control_qc_status: Optional[str] = None  # "passed", "failed" or "pending"; None without controls
+
+class PlateSample(BaseModel):
+    """A sample on a plate, as listed in the plate detail"""
+    id: int
+    barcode: str
+    client_sample_id: Optional[str] = None
+    status: Optional[str] = None
+    extraction_well_position: Optional[str] = None
+    project_code: Optional[str] = None
+
+class ExtractionPlateDetail(ExtractionPlateSummary):
+    samples: List[PlateSample] = []
+
 class PlateWellAssignment(BaseModel):
     id: int
     plate_id: int
@@ -134,4 +152,29 @@ class PlateAutoAssignResponse(BaseModel):
     total_samples: int
     assigned_samples: List[dict]
     project_summary: Dict[str, int]
-    control_wells: dict
\ No newline at end of file
+    control_wells: dict
+
+class WellQCResult(BaseModel):
+    """QC outcome of one well from a plate-reader import"""
+    well_position: str
+    sample_id: Optional[int] = None
+    barcode: Optional[str] = None
+    control_type: Optional[str] = None
+    concentration: Optional[float] = None
+    ratio_260_280: Optional[float] = None
+    ratio_260_230: Optional[float] = None
+    qc_pass: bool
+
+class PlateQCImportResponse(BaseModel):
+    """Result of importing a plate-reader export for a plate"""
+    plate_id: str
+    layout: str  # "table" or "grid"
+    dry_run: bool
+    wells_read: int
+    samples_updated: int
+    controls_updated: int
+    passed: int
+    failed: int
+    missing_wells: List[str]  # Assigned wells without a reading
+    unassigned_wells: List[str]  # Readings for wells with nothing assigned
+    results: List[WellQCResult]
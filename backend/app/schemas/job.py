@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from datetime import datetime
+
+
+class JobArtifact(BaseModel):
+    name: str
+    filename: str
+    media_type: str
+    size: int
+    url: str
+
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress_done: int = 0
+    progress_total: Optional[int] = None
+    progress_message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_by_id: Optional[int] = None
+    artifacts: List[JobArtifact] = []
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import BaseModel
 from datetime import datetime
 from app.models.project import ProjectStatus, ProjectType, TAT
@@ -67,6 +67,11 @@ class Project(ProjectBase):
     class Config:
         from_attributes = True
 
+class ProjectListItem(Project):
+    """Project with its sample counts, as returned by the projects list"""
+    sample_counts: Dict[str, int] = {}  # Sample status -> count
+    sample_total: int = 0  # Excluding deleted samples
+
 class ProjectLogBase(BaseModel):
     comment: str
     log_type: str = "comment"
@@ -1,5 +1,5 @@
-from typing import Optional, List
-from pydantic import BaseModel, validator
+from typing import Optional, List, Dict
+from pydantic import BaseModel, Field, validator
 from datetime import datetime
 from app.models.sample import SampleType, SampleStatus
 
@@ -140,6 +140,40 @@ class StorageLocation(StorageLocationBase):
     class Config:
         from_attributes = True
 
+class StorageBoxCreate(BaseModel):
+    freezer: str
+    shelf: str
+    box: str
+    rows: int = Field(9, ge=1, le=26)
+    columns: int = Field(9, ge=1, le=100)
+
+class StorageBox(BaseModel):
+    id: int
+    freezer: str
+    shelf: str
+    box: str
+    rows: int
+    columns: int
+    capacity: int
+    free_count: int
+    occupied_positions: List[str]
+
+class StorageSlot(BaseModel):
+    freezer: str
+    shelf: str
+    box: str
+    position: str
+
+class StorageReserveRequest(BaseModel):
+    count: int = Field(..., ge=1, le=10000)
+    freezer: Optional[str] = None
+    shelf: Optional[str] = None
+    contiguous: bool = True  # Prefer one unbroken run of positions in a single box
+    notes: Optional[str] = None
+
+class StorageReleaseRequest(BaseModel):
+    location_ids: List[int]
+
 class Sample(SampleBase):
     id: int
     barcode: str
@@ -218,6 +252,45 @@ class SampleWithLabData(Sample):
     class Config:
         from_attributes = True
 
+# Reprocessing lineage
+class LineageNode(BaseModel):
+    """One sample of a lineage tree with its latest lab results"""
+    id: int
+    barcode: str
+    parent_sample_id: Optional[int] = None
+    depth: int  # Hops below the root sample
+    status: Optional[str] = None
+    reprocess_type: Optional[str] = None
+    reprocess_reason: Optional[str] = None
+    reprocess_count: Optional[int] = None
+    failed_stage: Optional[str] = None
+    created_at: Optional[datetime] = None
+    extraction_concentration: Optional[float] = None
+    extraction_qc_pass: Optional[bool] = None
+    extraction_kit: Optional[str] = None
+    dna_concentration_ng_ul: Optional[float] = None
+    library_prep_kit: Optional[str] = None
+    library_concentration_ng_ul: Optional[float] = None
+    sequencing_run_id: Optional[str] = None
+    reads_generated: Optional[int] = None
+    yield_mb: Optional[float] = None
+    percent_q30: Optional[float] = None
+    sequencing_passed_qc: Optional[bool] = None
+    
+    class Config:
+        from_attributes = True
+
+class LineageTree(BaseModel):
+    root_id: int
+    nodes: List[LineageNode]  # Root first, then by depth
+
+class LineageRequest(BaseModel):
+    sample_ids: List[int]
+
+class LineageBatch(BaseModel):
+    roots: Dict[int, int]  # Requested sample ID -> root_id of its tree
+    trees: List[LineageTree]
+
 # Sample Log Schemas
 class SampleLogBase(BaseModel):
     comment: str
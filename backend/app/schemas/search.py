@@ -0,0 +1,19 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    type: str  # sample, project, client, product, blocker
+    id: int
+    label: str  # Primary identifier (barcode, project ID, name)
+    detail: Optional[str] = None  # Secondary text shown under the label
+    status: Optional[str] = None
+    score: float
+
+
+class SearchResults(BaseModel):
+    query: str
+    hits: Dict[str, List[SearchHit]]  # Top hits per type, best first
+    partial: bool = False  # True when some types were skipped to stay within budget
+    skipped: List[str] = []
+    elapsed_ms: float
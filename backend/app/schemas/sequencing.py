@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+class SampleDemuxResult(BaseModel):
+    """Demux metrics and QC outcome of one sample in a run"""
+    sample_id: int
+    barcode: str
+    reads_generated: int
+    yield_mb: float
+    percent_q30: Optional[float] = None
+    passed_qc: bool
+
+class DemuxImportResponse(BaseModel):
+    """Result of importing demultiplexing reports for a sequencing run"""
+    run_id: str
+    dry_run: bool
+    files: List[str]
+    samples_reported: int  # Distinct samples in the reports, Undetermined excluded
+    samples_matched: int
+    rows_inserted: int
+    rows_updated: int
+    passed: int
+    failed: int
+    total_reads: int
+    total_yield_gb: float
+    percent_q30: Optional[float] = None
+    percent_pf: Optional[float] = None
+    undetermined_reads: int
+    unmatched: List[str]  # Report sample IDs with no sample of that barcode
+    results: List[SampleDemuxResult]
@@ -0,0 +1,114 @@
+"""
+Background job worker
+
+    python -m app.worker [--concurrency 2]
+
+Claims jobs from the `jobs` table and runs them (see app.core.jobs). Any
+number of workers can run against the same database, on one host or many.
+Between jobs the workers also run the periodic maintenance in PERIODIC_TASKS.
+SIGTERM/SIGINT stop claiming new jobs and wait for the running ones.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from typing import List
+
+from app.core.archive import archive_samples
+from app.core.config import settings
+from app.core.idempotency import purge_expired_keys
+from app.core.jobs import claim_job, load_handlers, requeue_stale_jobs, run_job
+from app.core.log_storage import maintain_log_storage
+from app.core.stage_analytics import refresh_stage_analytics
+
+logger = logging.getLogger(__name__)
+
+STALE_CHECK_INTERVAL_SECONDS = 60.0
+
+# (interval in seconds, function) - run by whichever worker thread finds it due
+PERIODIC_TASKS = (
+    (STALE_CHECK_INTERVAL_SECONDS, requeue_stale_jobs),
+    (settings.STAGE_ANALYTICS_INTERVAL_SECONDS, refresh_stage_analytics),
+    (settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS, purge_expired_keys),
+    (settings.ARCHIVE_INTERVAL_SECONDS, archive_samples),
+    (settings.LOG_MAINTENANCE_INTERVAL_SECONDS, maintain_log_storage),
+)
+
+
+class Worker:
+    """A pool of threads that each claim and run one job at a time"""
+
+    def __init__(self, concurrency: int = 1, poll_interval: float = settings.JOB_POLL_INTERVAL_SECONDS):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._last_run = {task: 0.0 for _, task in PERIODIC_TASKS}
+        self._periodic_lock = threading.Lock()
+
+    def start(self) -> None:
+        load_handlers()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, args=(f"{self.name}/{i}",), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Job worker {self.name} started with {self.concurrency} thread(s)")
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop claiming jobs and wait (up to timeout) for the running ones"""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                self._run_periodic()
+                job_id = claim_job(worker_id)
+            except Exception as e:
+                logger.warning(f"Could not claim a job: {e}")
+                job_id = None
+            if job_id is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+            logger.info(f"{worker_id} running job {job_id}")
+            run_job(job_id, worker_id)
+
+    def _run_periodic(self) -> None:
+        for interval, task in PERIODIC_TASKS:
+            with self._periodic_lock:
+                now = time.monotonic()
+                if now - self._last_run[task] < interval:
+                    continue
+                self._last_run[task] = now
+            try:
+                task()
+            except Exception as e:
+                logger.warning(f"Periodic task {task.__name__} failed: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs to run at the same time")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = Worker(concurrency=args.concurrency)
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    worker.start()
+    stop.wait()
+    logger.info("Stopping; waiting for running jobs to finish")
+    worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -44,9 +44,9 @@ pip install gunicorn
 
 # Install systemd service
 echo "⚙️ Installing systemd service..."
-cp nyu-lims.service /etc/systemd/system/
+cp nyu-lims.service nyu-lims-worker.service /etc/systemd/system/
 systemctl daemon-reload
-systemctl enable nyu-lims
+systemctl enable nyu-lims nyu-lims-worker
 
 # Setup nginx
 echo "🌐 Setting up nginx..."
@@ -76,8 +76,8 @@ chmod 600 /opt/nyu-lims/backend/.env
 
 # Start services
 echo "🚀 Starting services..."
-systemctl start nyu-lims
-systemctl status nyu-lims
+systemctl start nyu-lims nyu-lims-worker
+systemctl status nyu-lims nyu-lims-worker
 
 echo "✅ Deployment complete!"
 echo ""
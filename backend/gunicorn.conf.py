@@ -1,4 +1,5 @@
 # Gunicorn configuration for production deployment
+import gc
 import multiprocessing
 
 # Server socket
@@ -7,15 +8,21 @@ backlog = 2048
 
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "uvicorn.workers.UvicornWorker"
+worker_class = "app.core.server.UvicornWorker"  # Ends event streams on shutdown (see app.core.server)
 worker_connections = 1000
 timeout = 30
+graceful_timeout = 30  # Must exceed SHUTDOWN_GRACE_SECONDS, or shutdown hooks are skipped
 keepalive = 2
 
 # Restart workers after this many requests, to help prevent memory leaks
 max_requests = 1000
 max_requests_jitter = 50
 
+# Import the app once in the master; workers (including the ones recycled by
+# max_requests) are forked from it instead of re-importing everything.
+# Schema creation is not part of startup: run `python -m app.db.init_db` first.
+preload_app = True
+
 # Logging
 accesslog = "-"
 errorlog = "-"
@@ -34,3 +41,20 @@ tmp_upload_dir = None
 # SSL (if needed)
 # keyfile = "/path/to/keyfile"
 # certfile = "/path/to/certfile"
+
+
+# Server hooks
+def pre_fork(server, worker):
+    # Move everything the master has loaded into the permanent generation, so
+    # the garbage collector in the workers never touches (and copies) those pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections must not be shared across processes; drop any the master opened
+    from app.db.base import async_engine, async_replica_engine, engine, replica_engine
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.dispose(close=False)
+        async_replica_engine.sync_engine.dispose(close=False)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Report what a worker spends importing the application, and fail on regressions.
+
+Runs `python -X importtime` on app.main plus every endpoint module in a fresh
+interpreter and prints the slowest imports. Exits non-zero when the total
+exceeds the budget or when a module that must stay lazy (pandas, openpyxl,
+numpy, holidays) is imported at startup.
+
+Usage:
+    python report_import_time.py [--top 25] [--budget-ms 4000]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Heavy libraries that only specific endpoints need; import them inside those functions
+LAZY_MODULES = ("pandas", "openpyxl", "numpy", "holidays")
+
+IMPORT_APP = """
+import pkgutil, importlib
+import app.main
+import app.api.api_v1.endpoints as endpoints
+for module in pkgutil.iter_modules(endpoints.__path__):
+    importlib.import_module(f"{endpoints.__name__}.{module.name}")
+"""
+
+
+def measure():
+    """Return [(module, depth, self_us, cumulative_us)] in import order"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_APP],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"❌ Importing the application failed (exit code {result.returncode})")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nesting is shown as two extra spaces of indentation per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="Number of slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=4000, help="Maximum total import time")
+    args = parser.parse_args()
+
+    imports = measure()
+    # Entries at depth 0 add up to the total; their cumulative time includes everything they pulled in
+    total_ms = sum(cumulative for _, depth, _, cumulative in imports if depth == 0) / 1000
+    # Self time summed per distribution, i.e. what each third-party package really costs
+    by_package = {}
+    for name, _, self_us, _ in imports:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    print(f"📦 {len(imports)} modules imported in {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)\n")
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, _, self_us, cumulative_us in sorted(imports, key=lambda i: i[3], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+
+    print(f"\n{'self ms':>14}  package")
+    for package, self_us in sorted(by_package.items(), key=lambda i: i[1], reverse=True)[:10]:
+        print(f"{self_us / 1000:>14.1f}  {package}")
+
+    failures = []
+    loaded = {name for name, _, _, _ in imports}
+    eager = [module for module in LAZY_MODULES if module in loaded]
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"total import time {total_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    print()
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Import time is within budget")
+
+
+if __name__ == "__main__":
+    main()
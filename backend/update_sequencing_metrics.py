@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Migration script for demux imports:
+- sequencing_runs.total_reads becomes BIGINT (PostgreSQL; SQLite integers are already 64-bit)
+- adds the unique (sequencing_run_id, sample_id) index on sequencing_run_samples,
+  replacing the earlier non-unique one; duplicate rows left by concurrent
+  imports are removed first, keeping the latest of each
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect, text
+
+from app.db.base import engine
+from app.models.sequencing import SequencingRunSample
+
+INDEX_NAME = "uq_sequencing_run_samples_run_sample"
+OLD_INDEX_NAME = "ix_sequencing_run_samples_run_sample"
+
+def update_schema():
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE sequencing_runs ALTER COLUMN total_reads TYPE BIGINT"))
+        print("✅ sequencing_runs.total_reads is BIGINT")
+
+    existing = {index["name"] for index in inspect(engine).get_indexes(SequencingRunSample.__tablename__)}
+    if INDEX_NAME in existing:
+        print(f"✅ '{INDEX_NAME}' already exists")
+        return
+    with engine.begin() as conn:
+        removed = conn.execute(text(
+            "DELETE FROM sequencing_run_samples WHERE id NOT IN ("
+            "SELECT MAX(id) FROM sequencing_run_samples GROUP BY sequencing_run_id, sample_id)"
+        )).rowcount
+        print(f"✅ Removed {removed} duplicate sequencing_run_samples row(s)")
+        if OLD_INDEX_NAME in existing:
+            conn.execute(text(f"DROP INDEX {OLD_INDEX_NAME}"))
+            print(f"✅ Dropped '{OLD_INDEX_NAME}'")
+        index = next(i for i in SequencingRunSample.__table__.indexes if i.name == INDEX_NAME)
+        index.create(conn)
+    print(f"✅ Created '{INDEX_NAME}'")
+
+if __name__ == "__main__":
+    print("🔄 Updating sequencing tables for demux imports...")
+    try:
+        update_schema()
+    except Exception as e:
+        print(f"❌ Error updating sequencing tables: {e}")
+        raise
+    print("✅ Migration completed successfully!")